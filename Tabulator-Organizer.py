@@ -1,16 +1,11 @@
-import pandas as pd
+from network_expansion_plan.organize import organize_table
+from network_expansion_plan.store import read_table, write_table
 
-# Datei einlesen
-df = pd.read_excel('Bsp.:geokodiert_VNB.xlsx')
+# Datei einlesen (Excel oder Parquet-Zwischenstand aus pdf2excel)
+df = read_table('Bsp.:geokodiert_VNB.xlsx')
 
-# Namen der zweiten Spalte (z.B. 'Teilnetzgebiet') anpassen
-zweite_spalte = df.columns[1]
+# Nach 'VNB-Name' und der (bereinigten) zweiten Spalte, z.B. 'Teilnetzgebiet', sortieren
+df_sorted = organize_table(df)
 
-# Werte der zweiten Spalte bereinigen (optional, verbessert Sortierung)
-df[zweite_spalte] = df[zweite_spalte].astype(str).str.strip()
-
-# Nach 'VNB-Name' und dann nach der zweiten Spalte sortieren
-df_sorted = df.sort_values(by=['VNB-Name', zweite_spalte], kind='stable')
-
-# Sortierte Tabelle speichern
-df_sorted.to_excel('geokodiert_sortiert.xlsx', index=False)
\ No newline at end of file
+# Sortierte Tabelle als Parquet-Zwischenstand und als Excel-Export speichern
+write_table(df_sorted, 'geokodiert_sortiert.parquet', export_excel='geokodiert_sortiert.xlsx')
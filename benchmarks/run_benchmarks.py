@@ -0,0 +1,135 @@
+# Zeitmessung der Pipeline-Schritte mit synthetischen Daten wachsender Größe
+# Ausführung aus dem Projektverzeichnis, z.B.:
+#   python -m benchmarks.run_benchmarks --sizes 1000 10000
+# Jede Größe ist ein eigener Lauf im Laufbericht (profiling.RunProfiler); die Berichte werden an
+# benchmarks/work/results.jsonl angehängt (nicht versioniert) und mit dem letzten Lauf derselben Größe verglichen.
+import argparse
+import json
+import os
+import time
+
+from network_expansion_plan.cube import METRICS, build_cube, coverage, slice_cube
+from network_expansion_plan.FWA_Plots import render_plots
+from network_expansion_plan.Foliumwebapp import MAP_SPECS, build_shared_layers, create_map, load_and_geocode
+from network_expansion_plan.profiling import RunProfiler
+from network_expansion_plan.store import table_path, write_table
+from network_expansion_plan.validation import BundeslandIndex, load_bundeslaender, validate_bundesland
+from benchmarks.synthetic import SIZES, StubGeocoder, generate_measures, generate_places, write_measures
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+BUNDESLAND_GEOJSON = os.path.join(BENCHMARK_DIR, os.pardir, "network_expansion_plan", "2_deutschland.geo.json")
+WORK_DIR = os.path.join(BENCHMARK_DIR, "work")
+RESULTS_PATH = os.path.join(WORK_DIR, "results.jsonl")
+
+
+# Letzter gespeicherter Lauf derselben Größe (None, wenn es keinen gibt)
+def previous_report(results_path, run):
+    if not os.path.exists(results_path):
+        return None
+    last = None
+    with open(results_path, encoding='utf-8') as f:
+        for line in f:
+            report = json.loads(line)
+            if report.get('run') == run and report.get('error') is None:
+                last = report
+    return last
+
+
+# Gibt die Laufzeiten je Schritt im Vergleich zum vorherigen Lauf aus
+def print_comparison(report, previous):
+    before = {} if previous is None else {
+        (stage['name'], json.dumps(stage['info'], sort_keys=True)): stage['seconds'] for stage in previous['stages']
+    }
+    print(f"📈 {report['run']}: {report['seconds']:.2f} s")
+    for stage in report['stages']:
+        seconds = stage['seconds']
+        old = before.get((stage['name'], json.dumps(stage['info'], sort_keys=True)))
+        change = f" (vorher {old:.2f} s, {seconds / old:.2f}×)" if old else ""
+        details = ", ".join(str(value) for key, value in stage['info'].items() if key != 'rows')
+        label = f"{stage['name']} ({details})" if details else stage['name']
+        print(f"   {label:<30} {seconds:10.2f} s{change}")
+
+
+# Misst alle Schritte für eine Tabellengröße: Laden und Geokodieren, Bundesland-Prüfung und Aggregation immer,
+# Karten (nur bis max_map_rows Zeilen) und Diagramme optional. Die Layer sind für alle Kennzahlen gleich,
+# daher wird je Markermodus nur die erste Karte aus MAP_SPECS erzeugt.
+def run_size(n_rows, bundeslaender_gdf, work_dir=WORK_DIR, results_path=RESULTS_PATH, seed=0, maps=True,
+             plots=True, max_map_rows=100_000, marker_modes=("circle", "geojson", "clustered"), profile=False,
+             trace_memory=False):
+    size_dir = os.path.join(work_dir, str(n_rows))
+    os.makedirs(size_dir, exist_ok=True)
+    run = f"benchmark_{n_rows}"
+    previous = previous_report(results_path, run)
+    with RunProfiler(run, results_path, profile, trace_memory) as profiler:
+        with profiler.stage('generate', rows=n_rows):
+            places = generate_places(n_rows, bundeslaender_gdf, seed)
+            df = generate_measures(n_rows, bundeslaender_gdf, places, seed, with_coordinates=False)
+            input_path = write_measures(df, size_dir)
+            profiler.add_bytes(input_path)
+        geocode = StubGeocoder(places, bundeslaender_gdf)
+
+        with profiler.stage('load_and_geocode', rows=n_rows):
+            df = load_and_geocode(input_path, profiler.counted('geocoder_calls', geocode))
+            profiler.count('geocode_failures', int(df['latitude'].isna().sum()))
+        with profiler.stage('validate', rows=n_rows):
+            gdf = validate_bundesland(df, BundeslandIndex(bundeslaender_gdf))
+            df_valid = gdf[gdf['passt']].drop(columns=['geometry', 'index_right', 'name'], errors='ignore')
+            profiler.count('rows_valid', len(df_valid))
+            profiler.count('rows_invalid', len(gdf) - len(df_valid))
+
+        with profiler.stage('aggregate', rows=n_rows):
+            cube = build_cube(df_valid)
+            df_bundesland = slice_cube(cube, 'Bundesland', METRICS)
+            coverage(cube, 'VNB-Name', METRICS)
+            profiler.count('cube_rows', len(cube))
+
+        if maps and n_rows <= max_map_rows:
+            choropleth_col, fill_color, map_file = MAP_SPECS[0]
+            for marker_mode in marker_modes:
+                with profiler.stage('map_layers', rows=n_rows, marker_mode=marker_mode):
+                    shared_layers = build_shared_layers(df_valid, bundeslaender_gdf, df_bundesland,
+                                                        os.path.join(size_dir, "vnb_csv"), marker_mode)
+                with profiler.stage('create_map', rows=n_rows, marker_mode=marker_mode):
+                    output_map = os.path.join(size_dir, f"{marker_mode}_{map_file}")
+                    create_map(choropleth_col, fill_color, output_map, bundeslaender_gdf, df_bundesland,
+                               shared_layers, prefer_canvas=marker_mode != "circle")
+                    profiler.add_bytes(output_map)
+        elif maps:
+            print(f"⏭️  Karten für {n_rows} Zeilen übersprungen (max_map_rows={max_map_rows})")
+
+        if plots:
+            # Würfel neben der Tabelle ablegen, damit render_plots ihn nicht erneut bildet
+            source_path = os.path.join(size_dir, "geokodiert.parquet")
+            write_table(df_valid, source_path)
+            write_table(cube, table_path(source_path, ".cube.parquet"))
+            with profiler.stage('plots', rows=n_rows):
+                written = render_plots(source_path, os.path.join(size_dir, "plots"), max_workers=1)
+                profiler.add_bytes(*written)
+    print_comparison(profiler.report, previous)
+    return profiler.report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks der Netzausbau-Pipeline mit synthetischen Daten")
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES[:3],
+                        help=f"Zeilenzahlen (Standard: {' '.join(map(str, SIZES[:3]))}; 1000000 für den Volllauf)")
+    parser.add_argument('--no-maps', action='store_true', help="Karten nicht erzeugen")
+    parser.add_argument('--no-plots', action='store_true', help="Diagramme nicht erzeugen")
+    parser.add_argument('--results', default=RESULTS_PATH, help="Laufberichte (JSON Lines, wird angehängt)")
+    parser.add_argument('--work-dir', default=WORK_DIR)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-map-rows', type=int, default=100_000)
+    parser.add_argument('--profile', action='store_true', help="cProfile je Größe")
+    parser.add_argument('--trace-memory', action='store_true', help="Speicherspitze je Schritt (tracemalloc)")
+    args = parser.parse_args(argv)
+
+    bundeslaender_gdf = load_bundeslaender(BUNDESLAND_GEOJSON, cache_dir=args.work_dir)
+    start = time.time()
+    for n_rows in args.sizes:
+        run_size(n_rows, bundeslaender_gdf, args.work_dir, args.results, args.seed, not args.no_maps,
+                 not args.no_plots, args.max_map_rows, profile=args.profile, trace_memory=args.trace_memory)
+    print(f"⏱️ Laufzeit: {time.time() - start:.1f} Sekunden")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+# Synthetische Maßnahmentabellen im Schema der Netzausbaupläne (für Benchmarks mit 1k bis 1M Zeilen)
+# Die Orte liegen zufällig innerhalb der Bundesland-Polygone; ein kleiner Anteil der Zeilen trägt ein falsches
+# Bundesland (schlägt in der Prüfung fehl) oder 'k.A.' statt eines Werts.
+import os
+
+import numpy as np
+import pandas as pd
+import shapely
+
+from network_expansion_plan.geocache import normalize_query
+from network_expansion_plan.geocoders import GeoResult
+
+SIZES = [1_000, 10_000, 100_000, 1_000_000]
+# Größere Tabellen werden als CSV statt als Excel geschrieben (Excel ist auf ca. 1M Zeilen begrenzt und sehr langsam)
+EXCEL_MAX_ROWS = 100_000
+
+NETZEBENEN = ['MS', 'HS', 'k.A.', 'NS', 'HS/MS', 'MS/NS']
+NETZEBENEN_P = [0.46, 0.28, 0.17, 0.05, 0.035, 0.005]
+PROJEKTSTATUS = ['vorgesehene Maßnahme', 'konkrete Planung', 'im Bau', 'abgeschlossen', 'ausstehend', 'k.A.', None]
+PROJEKTSTATUS_P = [0.33, 0.2, 0.15, 0.08, 0.07, 0.04, 0.13]
+ZEITHORIZONTE = [2024, 2025, 2026, 2027, 2028, 2029, 2030, 'k.A.']
+ZEITHORIZONTE_P = [0.14, 0.11, 0.07, 0.06, 0.12, 0.06, 0.04, 0.4]
+ARTEN = ['Neubau UW', 'Ertüchtigungen Trafo', 'Neubau Leitung', 'Verstärkung Leitung', 'Ersatzneubau']
+
+# Anteil der Zeilen ohne Angabe (0) je Kennzahl und Verteilung der angegebenen Werte (lognormal: mu, sigma)
+METRIC_SPECS = {
+    'Leitungslänge in km': (0.45, 1.0, 1.0),
+    'Übertragungskapazität in MVA': (0.8, 3.8, 0.8),
+    'Kosten in Mio.€': (0.25, 1.2, 1.1),
+}
+
+
+# Zufällige Punkte innerhalb eines Polygons (Verwerfungsmethode über die Bounding-Box)
+def random_points(polygon, n, rng):
+    minx, miny, maxx, maxy = polygon.bounds
+    xs, ys = [], []
+    found = 0
+    while found < n:
+        x = rng.uniform(minx, maxx, 2 * (n - found) + 16)
+        y = rng.uniform(miny, maxy, len(x))
+        inside = shapely.contains_xy(polygon, x, y)
+        xs.append(x[inside])
+        ys.append(y[inside])
+        found += int(inside.sum())
+    return np.concatenate(xs)[:n], np.concatenate(ys)[:n]
+
+
+# Ortsverzeichnis der synthetischen Orte: Name, Bundesland und Koordinaten (etwa ein Ort je places_per_row Zeilen)
+def generate_places(n_rows, bundeslaender_gdf, seed=0, places_per_row=0.05):
+    rng = np.random.default_rng(seed)
+    names = bundeslaender_gdf['name'].to_numpy()
+    polygons = bundeslaender_gdf.geometry.to_numpy()
+    # Mehr Orte in flächengroßen Ländern (die Fläche wird nur als Gewicht genutzt)
+    weights = shapely.area(polygons)
+    weights = weights / weights.sum()
+    n_places = max(len(names), int(n_rows * places_per_row))
+    per_state = np.maximum(1, np.round(weights * n_places).astype(int))
+    frames = []
+    for name, polygon, count in zip(names, polygons, per_state):
+        lon, lat = random_points(polygon, count, rng)
+        frames.append(pd.DataFrame({'bundesland': name, 'latitude': lat, 'longitude': lon}))
+    places = pd.concat(frames, ignore_index=True)
+    places['name'] = [f"Ort {i}" for i in range(len(places))]
+    return places[['name', 'bundesland', 'latitude', 'longitude']]
+
+
+# Setzt in einem Anteil der Zeilen 'k.A.' ein (Spalte wird dabei zu object wie in den echten Tabellen)
+def with_noise(values, share, rng, noise='k.A.'):
+    values = pd.Series(values, dtype=object)
+    values[rng.random(len(values)) < share] = noise
+    return values
+
+
+# Maßnahmentabelle mit n_rows Zeilen; with_coordinates=False liefert die Tabelle vor der Geokodierung
+# invalid_share: Anteil 'k.A.' in Ort und Kennzahlen; wrong_state_share: Anteil Zeilen mit falschem Bundesland
+def generate_measures(n_rows, bundeslaender_gdf, places=None, seed=0, n_vnbs=None, invalid_share=0.05,
+                      wrong_state_share=0.02, with_coordinates=True):
+    rng = np.random.default_rng(seed + 1)
+    if places is None:
+        places = generate_places(n_rows, bundeslaender_gdf, seed)
+    n_vnbs = n_vnbs or int(np.clip(np.sqrt(n_rows), 5, 800))
+
+    # Jeder VNB ist in einem Land tätig und nutzt die dortigen Orte
+    states = places['bundesland'].unique()
+    vnb_state = states[rng.integers(0, len(states), n_vnbs)]
+    vnb = rng.zipf(1.6, n_rows) % n_vnbs
+    place_positions = places.groupby('bundesland').indices
+    state = vnb_state[vnb]
+    place = np.empty(n_rows, dtype=np.int64)
+    for name in np.unique(state):
+        rows = np.flatnonzero(state == name)
+        candidates = place_positions[name]
+        place[rows] = candidates[rng.integers(0, len(candidates), len(rows))]
+
+    bundesland = pd.Series(state, dtype=object)
+    wrong = rng.random(n_rows) < wrong_state_share
+    bundesland[wrong] = states[rng.integers(0, len(states), int(wrong.sum()))]
+
+    df = pd.DataFrame({
+        'VNB-Name': pd.Series([f"Netzbetreiber {i:03d} GmbH" for i in range(n_vnbs)], dtype=object).to_numpy()[vnb],
+        'Teilnetzgebiet': rng.choice(['Nord', 'Süd', 'Ost', 'West', 'k.A.'], n_rows),
+        'Bundesland': bundesland,
+        'Ort / Trasse': with_noise(places['name'].to_numpy()[place], invalid_share, rng),
+        'Netzebene': rng.choice(NETZEBENEN, n_rows, p=NETZEBENEN_P),
+        'Art der Maßnahme': rng.choice(ARTEN, n_rows),
+    })
+    for metric, (zero_share, mu, sigma) in METRIC_SPECS.items():
+        values = np.round(rng.lognormal(mu, sigma, n_rows), 2)
+        values[rng.random(n_rows) < zero_share] = 0.0
+        df[metric] = with_noise(values, invalid_share, rng)
+    df['Projektstatus'] = pd.Series(rng.choice(len(PROJEKTSTATUS), n_rows, p=PROJEKTSTATUS_P)).map(
+        dict(enumerate(PROJEKTSTATUS)))
+    df['Zeithorizont'] = pd.Series(ZEITHORIZONTE, dtype=object).to_numpy()[
+        rng.choice(len(ZEITHORIZONTE), n_rows, p=ZEITHORIZONTE_P)]
+    if with_coordinates:
+        df['latitude'] = places['latitude'].to_numpy()[place]
+        df['longitude'] = places['longitude'].to_numpy()[place]
+    return df
+
+
+# Lokaler Ersatz für den Geokodierer: beantwortet die Anfragen der synthetischen Orte und der Bundesländer
+# ohne Netzwerk und ohne Wartezeit (unbekannte Anfragen liefern None wie Nominatim)
+class StubGeocoder:
+    def __init__(self, places, bundeslaender_gdf):
+        self.index = {
+            normalize_query(f"{name}, Deutschland"): GeoResult(f"{name}, {state}, Deutschland", lat, lon)
+            for name, state, lat, lon in zip(places['name'], places['bundesland'], places['latitude'],
+                                             places['longitude'])
+        }
+        for name, point in zip(bundeslaender_gdf['name'], bundeslaender_gdf.geometry.representative_point()):
+            self.index[normalize_query(f"{name}, Deutschland")] = GeoResult(f"{name}, Deutschland", point.y, point.x)
+        self.calls = 0
+
+    def __call__(self, query):
+        self.calls += 1
+        return self.index.get(normalize_query(query))
+
+
+# Schreibt die Eingabetabelle (Excel bis EXCEL_MAX_ROWS Zeilen, darüber CSV) und liefert den Pfad
+def write_measures(df, directory, name=None):
+    os.makedirs(directory, exist_ok=True)
+    name = name or f"massnahmen_{len(df)}"
+    if len(df) <= EXCEL_MAX_ROWS:
+        path = os.path.join(directory, f"{name}.xlsx")
+        df.to_excel(path, index=False)
+    else:
+        path = os.path.join(directory, f"{name}.csv")
+        df.to_csv(path, index=False)
+    return path
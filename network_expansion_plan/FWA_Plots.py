@@ -1,174 +1,225 @@
-import pandas as pd
+import html
+import os
+import time
+import webbrowser
+from concurrent.futures import ProcessPoolExecutor
+
 import plotly.express as px
 import plotly.graph_objects as go
+from plotly.offline import get_plotlyjs
+from plotly.offline.offline import get_plotlyjs_version
+from .cube import METRICS, coverage, load_or_build_cube, slice_cube
+
+PLOTLY_BUNDLE = 'plotly.min.js'
+
+# Bezeichnung der fehlenden Angaben in den Fußnoten
+MISSING_TEXTS = {
+    'Leitungslänge in km': 'Leitungslängen',
+    'Übertragungskapazität in MVA': 'Übertragungskapazitäten',
+    'Kosten in Mio.€': 'Kostenangaben'
+}
+
+
+# Dateiname der Diagramme nach Fertigstellungsjahr (z.B. plot_Kosten_in_Mioeur_nach_zeithorizont)
+def metric_slug(metric):
+    return metric.replace(" ", "_").replace("ä", "ae").replace("ü", "ue").replace("ö", "oe").replace(".", "").replace("€", "eur")
 
-# --- 1. Daten laden ---
-excel_datei = 'geokodiert_zugestimmt.xlsx'
-df = pd.read_excel(excel_datei)
 
-# --- 2. Metriken definieren ---
-metrics = [
-    'Leitungslänge in km',
-    'Übertragungskapazität in MVA',
-    'Kosten in Mio.€'
+# --- Deklarative Liste aller Diagramme und Tabellen ---
+# data: Ausschnitt des Würfels ('per_vnb', 'by_date', 'all'); footnote: Kennzahl, deren Fußnote angezeigt wird
+PLOT_SPECS = [
+    # Balkendiagramme je Kennzahl (je VNB) mit Fußnote
+    dict(name='plot_kosten_je_vnb', kind='bar', data='per_vnb', x='VNB-Name', y='Kosten in Mio.€',
+         hover_data=['Angaben Kosten in Mio.€ (%)'], tickangle=-45,
+         title='Summe angegebener Kosten* in Mio.€ je VNB',
+         yaxis_title='Summe angegebener Kosten in Mio.€', footnote='Kosten in Mio.€'),
+    dict(name='plot_kapazitaet_je_vnb', kind='bar', data='per_vnb', x='VNB-Name', y='Übertragungskapazität in MVA',
+         hover_data=['Angaben Übertragungskapazität in MVA (%)'], tickangle=-45,
+         title='Summe angegebene Übertragungskapazität* in MVA je VNB',
+         yaxis_title='Summe angegebene Übertragungskapazität in MVA', footnote='Übertragungskapazität in MVA'),
+    dict(name='plot_leitungslänge_je_vnb', kind='bar', data='per_vnb', x='VNB-Name', y='Leitungslänge in km',
+         hover_data=['Angaben Leitungslänge in km (%)'], tickangle=-45,
+         title='Summe angegebene Leitungslänge* in km je VNB',
+         yaxis_title='Summe angegebene Leitungslänge in km', footnote='Leitungslänge in km'),
+    # Treemap der Kostenverteilung
+    dict(name='plot_treemap_kostenverteilung', kind='treemap', data='per_vnb', path=['VNB-Name'],
+         values='Kosten in Mio.€', texttemplate="%{label}<br>%{value:.2f} Mio €",
+         title='Kostenverteilung der angegebenen Kosten* je VNB', footnote='Kosten in Mio.€'),
+    # Tabellen: Gesamtsummen und Sammelstatistik je VNB
+    dict(name='tabelle_gesamtsummen', kind='table', data='all', columns=['Kennzahl', 'Gesamtwert'],
+         format=[None, '.2f'], title='Gesamtsummen aller Kennzahlen'),
+    dict(name='tabelle_sammelstatistik_je_vnb', kind='table', data='per_vnb', columns=['VNB-Name'] + METRICS,
+         format=['', '.2f', '.2f', '.2f'], title='Sammelstatistik je VNB-Name'),
+] + [
+    # Balkendiagramme je Kennzahl nach Fertigstellungsjahr
+    dict(name=f'plot_{metric_slug(metric)}_nach_zeithorizont', kind='bar', data='by_date', x='Zeithorizont', y=metric,
+         title=f"Summe angegebener {metric}* nach Fertigstellungsjahr", xaxis_title='Fertigstellungsjahr',
+         yaxis_title=f"Summe angegebener {metric}", footnote=metric)
+    for metric in METRICS
 ]
 
-# --- 3. Aggregationen berechnen ---
-summary_all = df[metrics].sum().reset_index()
-summary_all.columns = ['Kennzahl', 'Gesamtwert']
-summary_all['Gesamtwert'] = summary_all['Gesamtwert'].round(2)
-
-summary_per_vnb = df.groupby('VNB-Name')[metrics].sum().reset_index()
-summary_per_vnb[metrics] = summary_per_vnb[metrics].round(2)
-
-summary_by_date = df.groupby('Zeithorizont')[metrics].sum().reset_index()
-summary_by_date[metrics] = summary_by_date[metrics].round(2)
-
-# --- 4. Balkendiagramme je Kennzahl (je VNB) mit Fußnote ---
-# 4.1 Kosten
-fig_costs_vnb = px.bar(
-    summary_per_vnb,
-    x='VNB-Name', y='Kosten in Mio.€',
-    title='Summe angegebener Kosten* in Mio.€ je VNB'
-)
-fig_costs_vnb.update_layout(
-    xaxis_tickangle=-45,
-    yaxis_title='Summe angegebener Kosten in Mio.€',
-    annotations=[
-        dict(
-            text='*Für einen Teil der Maßnahmen liegen keine Kostenangaben vor.<br>Zudem variiert die Vollständigkeit der Angaben zwischen den Verteilnetzbetreibern erheblich.',
-            xref='paper', yref='paper',
-            x=0, y=1.08,
-            showarrow=False,
-            font=dict(size=12, color='gray'),
-            align='left'
-        )
-    ]
-)
-fig_costs_vnb.write_html('plot_kosten_je_vnb.html')
-fig_costs_vnb.show()
-
-# 4.2 Übertragungskapazität
-fig_capacity_vnb = px.bar(
-    summary_per_vnb,
-    x='VNB-Name', y='Übertragungskapazität in MVA',
-    title='Summe angegebene Übertragungskapazität* in MVA je VNB'
-)
-fig_capacity_vnb.update_layout(
-    xaxis_tickangle=-45,
-    yaxis_title='Summe angegebene Übertragungskapazität in MVA',
-    annotations=[
-        dict(
-            text='*Für einen Teil der Maßnahmen liegen keine Übertragungskapazitäten vor.<br>Zudem variiert die Vollständigkeit der Angaben zwischen den Verteilnetzbetreibern erheblich.',
-            xref='paper', yref='paper',
-            x=0, y=1.08,
-            showarrow=False,
-            font=dict(size=12, color='gray'),
-            align='left'
-        )
-    ]
-)
-fig_capacity_vnb.write_html('plot_kapazitaet_je_vnb.html')
-fig_capacity_vnb.show()
-
-# 4.3 Leitungslänge
-fig_length_vnb = px.bar(
-    summary_per_vnb,
-    x='VNB-Name', y='Leitungslänge in km',
-    title='Summe angegebene Leitungslänge* in km je VNB'
-)
-fig_length_vnb.update_layout(
-    xaxis_tickangle=-45,
-    yaxis_title='Summe angegebene Leitungslänge in km',
-    annotations=[
-        dict(
-            text='*Für einen Teil der Maßnahmen liegen keine Leitungslängen vor.<br>Zudem variiert die Vollständigkeit der Angaben zwischen den Verteilnetzbetreibern erheblich.',
-            xref='paper', yref='paper',
-            x=0, y=1.08,
-            showarrow=False,
-            font=dict(size=12, color='gray'),
-            align='left'
-        )
-    ]
-)
-fig_length_vnb.write_html('plot_leitungslänge_je_vnb.html')
-fig_length_vnb.show()
-
-# --- 5. Treemap der Kostenverteilung ---
-fig_treemap = px.treemap(
-    summary_per_vnb,
-    path=['VNB-Name'],
-    values='Kosten in Mio.€',
-    title='Kostenverteilung der angegebenen Kosten* je VNB'
-)
-fig_treemap.data[0].texttemplate = "%{label}<br>%{value:.2f} Mio €"
-fig_treemap.update_layout(
-    annotations=[
-        dict(
-            text='*Für einen Teil der Maßnahmen liegen keine Kostenangaben vor.<br>Zudem variiert die Vollständigkeit der Angaben zwischen den Verteilnetzbetreibern erheblich.',
-            xref='paper', yref='paper',
-            x=0, y=1.08,
-            showarrow=False,
-            font=dict(size=12, color='gray'),
-            align='left'
+
+# Ausschnitte des Würfels, die die Diagramme benötigen, sowie die Fußnoten mit dem Anteil der Angaben
+def build_frames(cube, metrics=METRICS):
+    summary_all = slice_cube(cube, metrics=metrics).reset_index()
+    summary_all.columns = ['Kennzahl', 'Gesamtwert']
+    summary_all['Gesamtwert'] = summary_all['Gesamtwert'].round(2)
+
+    summary_per_vnb = slice_cube(cube, 'VNB-Name', metrics)
+    summary_per_vnb[metrics] = summary_per_vnb[metrics].round(2)
+
+    summary_by_date = slice_cube(cube, 'Zeithorizont', metrics)
+    summary_by_date[metrics] = summary_by_date[metrics].round(2)
+
+    # Anteil der Maßnahmen mit Angabe (gesamt und je VNB) für Fußnoten und Tooltips
+    coverage_all = coverage(cube, metrics=metrics)
+    coverage_per_vnb = coverage(cube, 'VNB-Name', metrics)
+    for metric in metrics:
+        summary_per_vnb[f'Angaben {metric} (%)'] = coverage_per_vnb[metric].round(1)
+
+    footnotes = {}
+    for metric in metrics:
+        anteil = f"{coverage_all[metric]:.1f}".replace('.', ',')
+        footnotes[metric] = (
+            f'*Für einen Teil der Maßnahmen liegen keine {MISSING_TEXTS[metric]} vor (Angaben für {anteil} % der Maßnahmen).'
+            '<br>Zudem variiert die Vollständigkeit der Angaben zwischen den Verteilnetzbetreibern erheblich.'
         )
-    ]
-)
-fig_treemap.write_html('plot_treemap_kostenverteilung.html')
-fig_treemap.show()
-
-# --- 6. Tabellen: Gesamtsummen und Sammelstatistik je VNB ---
-fig_table_all = go.Figure(data=[go.Table(
-    header=dict(values=list(summary_all.columns),
-                fill_color='paleturquoise', align='left'),
-    cells=dict(
-        values=[summary_all['Kennzahl'], summary_all['Gesamtwert']],
-        fill_color='lavender', align='left', format=[None, '.2f']
-    )
-)])
-fig_table_all.update_layout(title='Gesamtsummen aller Kennzahlen')
-fig_table_all.write_html('tabelle_gesamtsummen.html')
-fig_table_all.show()
-
-fig_table_vnb = go.Figure(data=[go.Table(
-    header=dict(values=['VNB-Name'] + metrics,
-                fill_color='paleturquoise', align='left'),
-    cells=dict(
-        values=[summary_per_vnb[col] for col in ['VNB-Name'] + metrics],
-        fill_color='lavender', align='left', format=['', '.2f', '.2f', '.2f']
-    )
-)])
-fig_table_vnb.update_layout(title='Sammelstatistik je VNB-Name')
-fig_table_vnb.write_html('tabelle_sammelstatistik_je_vnb.html')
-fig_table_vnb.show()
-
-# --- 7. Balkendiagramme je Kennzahl nach Fertigstellungsjahr ---
-footnotes = {
-    'Leitungslänge in km': '*Für einen Teil der Maßnahmen liegen keine Leitungslängen vor.<br>Zudem variiert die Vollständigkeit der Angaben zwischen den Verteilnetzbetreibern erheblich.',
-    'Übertragungskapazität in MVA': '*Für einen Teil der Maßnahmen liegen keine Übertragungskapazitäten vor.<br>Zudem variiert die Vollständigkeit der Angaben zwischen den Verteilnetzbetreibern erheblich.',
-    'Kosten in Mio.€': '*Für einen Teil der Maßnahmen liegen keine Kostenangaben vor.<br>Zudem variiert die Vollständigkeit der Angaben zwischen den Verteilnetzbetreibern erheblich.'
-}
+    return {'all': summary_all, 'per_vnb': summary_per_vnb, 'by_date': summary_by_date}, footnotes
 
-for metric in metrics:
-    fig = px.bar(
-        summary_by_date,
-        x='Zeithorizont', y=metric,
-        title=f"Summe angegebener {metric}* nach Fertigstellungsjahr"
+
+def footnote_annotation(text):
+    return dict(
+        text=text,
+        xref='paper', yref='paper',
+        x=0, y=1.08,
+        showarrow=False,
+        font=dict(size=12, color='gray'),
+        align='left'
     )
-    fig.update_layout(
-        xaxis_title='Fertigstellungsjahr',
-        yaxis_title=f"Summe angegebener {metric}",
-        annotations=[
-            dict(
-                text=footnotes[metric],
-                xref='paper', yref='paper',
-                x=0, y=1.08,
-                showarrow=False,
-                font=dict(size=12, color='gray'),
-                align='left'
+
+
+# Erstellt eine Abbildung aus ihrer Beschreibung
+def build_figure(spec, frame, footnote=None):
+    if spec['kind'] == 'table':
+        fig = go.Figure(data=[go.Table(
+            header=dict(values=spec['columns'], fill_color='paleturquoise', align='left'),
+            cells=dict(
+                values=[frame[col] for col in spec['columns']],
+                fill_color='lavender', align='left', format=spec['format']
             )
-        ]
-    )
-    filename = f'plot_{metric.replace(" ", "_").replace("ä", "ae").replace("ü", "ue").replace("ö", "oe").replace(".", "").replace("€", "eur")}_nach_zeithorizont.html'
-    fig.write_html(filename)
-    fig.show()
\ No newline at end of file
+        )])
+        fig.update_layout(title=spec['title'])
+        return fig
+    if spec['kind'] == 'treemap':
+        fig = px.treemap(frame, path=spec['path'], values=spec['values'], title=spec['title'])
+        fig.data[0].texttemplate = spec['texttemplate']
+        layout = {}
+    else:
+        fig = px.bar(frame, x=spec['x'], y=spec['y'], hover_data=spec.get('hover_data'), title=spec['title'])
+        layout = {'yaxis_title': spec['yaxis_title']}
+        if 'tickangle' in spec:
+            layout['xaxis_tickangle'] = spec['tickangle']
+        if 'xaxis_title' in spec:
+            layout['xaxis_title'] = spec['xaxis_title']
+    if footnote:
+        layout['annotations'] = [footnote_annotation(footnote)]
+    fig.update_layout(**layout)
+    return fig
+
+
+# Arbeitseinheit im Prozesspool: Abbildung erstellen, als eigene HTML-Datei schreiben (optional) und den
+# HTML-Ausschnitt für das Dashboard liefern. plotly.js wird nur referenziert, nicht eingebettet.
+def render_spec(spec, frame, footnote, output_path, plotlyjs_src):
+    fig = build_figure(spec, frame, footnote)
+    if output_path:
+        fig.write_html(output_path, include_plotlyjs=plotlyjs_src)
+    return fig.to_html(full_html=False, include_plotlyjs=False)
+
+
+DASHBOARD_TEMPLATE = """<!DOCTYPE html>
+<html lang="de">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<script charset="utf-8" src="{plotlyjs_src}"></script>
+<style>body {{ font-family: sans-serif; margin: 0 2em; }} section {{ margin: 2em 0; height: 600px; }}</style>
+</head>
+<body>
+<h1>{title}</h1>
+{sections}
+</body>
+</html>
+"""
+
+
+# Legt plotly.min.js im Ausgabeordner ab; eine vorhandene Datei wird ersetzt, sobald sie nicht mehr dem plotly.js
+# der installierten plotly-Version entspricht (z.B. nach einem Update), sonst bleibt sie unverändert
+def write_plotly_bundle(output_dir):
+    bundle = get_plotlyjs()
+    bundle_path = os.path.join(output_dir, PLOTLY_BUNDLE)
+    if os.path.exists(bundle_path) and os.path.getsize(bundle_path) == len(bundle.encode('utf-8')):
+        with open(bundle_path, encoding='utf-8') as f:
+            if f.read() == bundle:
+                return bundle_path
+    with open(f"{bundle_path}.tmp", 'w', encoding='utf-8') as f:
+        f.write(bundle)
+    os.replace(f"{bundle_path}.tmp", bundle_path)
+    return bundle_path
+
+
+# Erstellt alle Diagramme ohne Browserfenster. Die Abbildungen werden parallel im Prozesspool erzeugt
+# (max_workers=1: im eigenen Prozess) und teilen sich ein plotly.js: plotlyjs="directory" legt einmal
+# plotly.min.js im Ausgabeordner ab, plotlyjs="cdn" lädt es aus dem Netz.
+# Mit dashboard werden alle Abbildungen zusätzlich in eine einzige HTML-Datei geschrieben,
+# mit single_files=False nur dorthin.
+def render_plots(source_path, output_dir=".", specs=PLOT_SPECS, max_workers=None, plotlyjs="directory",
+                 dashboard="dashboard.html", single_files=True, open_browser=False):
+    return render_cube_plots(load_or_build_cube(source_path), output_dir, specs, max_workers, plotlyjs, dashboard,
+                             single_files, open_browser)
+
+
+# Wie render_plots, aber aus einem bereits gebildeten Aggregationswürfel (z.B. aus dem vorherigen Pipeline-Schritt)
+def render_cube_plots(cube, output_dir=".", specs=PLOT_SPECS, max_workers=None, plotlyjs="directory",
+                      dashboard="dashboard.html", single_files=True, open_browser=False):
+    os.makedirs(output_dir, exist_ok=True)
+    frames, footnotes = build_frames(cube)
+
+    if plotlyjs == "cdn":
+        plotlyjs_src = f"https://cdn.plot.ly/plotly-{get_plotlyjs_version()}.min.js"
+    else:
+        plotlyjs_src = PLOTLY_BUNDLE
+        write_plotly_bundle(output_dir)
+
+    jobs = [
+        (spec, frames[spec['data']], footnotes.get(spec.get('footnote')),
+         os.path.join(output_dir, f"{spec['name']}.html") if single_files else None, plotlyjs_src)
+        for spec in specs
+    ]
+    max_workers = min(max_workers or os.cpu_count() or 1, len(jobs)) or 1
+    if max_workers > 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            fragments = list(executor.map(render_spec, *zip(*jobs)))
+    else:
+        fragments = [render_spec(*job) for job in jobs]
+
+    written = [job[3] for job in jobs if job[3]]
+    if dashboard:
+        dashboard_path = os.path.join(output_dir, dashboard)
+        title = "Netzausbaupläne – Auswertungen"
+        sections = "\n".join(f'<section id="{html.escape(spec["name"])}">{fragment}</section>'
+                             for spec, fragment in zip(specs, fragments))
+        with open(dashboard_path, 'w', encoding='utf-8') as f:
+            f.write(DASHBOARD_TEMPLATE.format(title=title, plotlyjs_src=plotlyjs_src, sections=sections))
+        written.append(dashboard_path)
+        if open_browser:
+            webbrowser.open(f"file://{os.path.abspath(dashboard_path)}")
+    return written
+
+
+if __name__ == "__main__":
+    start = time.time()
+    # Eingabedatei (Excel oder Parquet; eine aktuellere Parquet-Kopie wird bevorzugt)
+    written = render_plots('geokodiert_zugestimmt.xlsx')
+    for path in written:
+        print(f"✔️ {path}")
+    print(f"⏱️ Laufzeit: {time.time() - start:.1f} Sekunden")
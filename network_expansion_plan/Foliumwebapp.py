@@ -4,67 +4,113 @@ import re
 import certifi
 import pandas as pd
 import numpy as np
-from geopy.geocoders import Nominatim
-from geopy.extra.rate_limiter import RateLimiter
 import folium
+from folium.map import Layer
 from folium.plugins import MarkerCluster
-import geopandas as gpd
-from shapely.geometry import Point
-import html
+from folium.utilities import JsCode
 import matplotlib.pyplot as plt
 import time
 import json
+from .cleaning import invalid_frame, invalid_mask, is_invalid
+from .clustering import PRE_CLUSTER_SCRIPT, PreClusteredMarkers
+from .geocache import GeocodeCache, resolve_queries
+from .geocoders import build_geocoder
+from .ingest import REPORT_FILE, ingest, is_collection, write_report
+from .popups import POPUP_ORDER, POPUP_TEMPLATE_SCRIPT, popup_values, render_popups
+from .validation import bundesland_index, load_bundeslaender, validate_bundesland
+from .store import group_ranges, read_table, table_path, write_table
+from .incremental import fingerprint_settings, fingerprint_vnbs, merge_previous, plan_update, save_manifest, vnb_keys
+from .cube import METRICS, build_cube, patch_cube, slice_cube
+from .profiling import profiled
 
 # Stellt sicher, dass das SSL-Zertifikat korrekt gesetzt ist
 os.environ['SSL_CERT_FILE'] = certifi.where()
 
 
-# Prüft, ob ein Wert ungültig ist (leer, "k.A.", etc.)
-def is_invalid(value):
-    if pd.isna(value):
-        return True
-    value = str(value).strip().lower()
-    return value in ['', 'nan', 'k.a.', 'k.a', 'ka', 'none']
+# Erstellt die Suchanfrage für die Geokodierung (Ort oder Bundesland)
+def build_query(row):
+    if not is_invalid(row.get('Ort / Trasse', None)):
+        return f"{row['Ort / Trasse']}, Deutschland"
+    else:
+        return f"{row['Bundesland']}, Deutschland"
 
 
-# Konvertiert Werte zu Float und behandelt ungültige Einträge
-def to_number(val):
-    try:
-        if is_invalid(val):
-            return 0.0
-        return float(str(val).replace(',', '.'))
-    except Exception:
-        return 0.0
+# Erstellt die Suchanfragen für alle Zeilen vektorisiert (Ort oder, falls ungültig, Bundesland)
+def build_queries(df):
+    bundesland = df['Bundesland'].astype(str) if 'Bundesland' in df.columns else pd.Series('nan', index=df.index)
+    if 'Ort / Trasse' not in df.columns:
+        return bundesland + ", Deutschland"
+    ort = df['Ort / Trasse'].astype(str)
+    return ort.where(~invalid_mask(df['Ort / Trasse']), bundesland) + ", Deutschland"
 
 
 # Erstellt eine Adresse für die Geokodierung (Ort oder Bundesland)
 def geocode_address(row, geocode):
-    if not is_invalid(row.get('Ort / Trasse', None)):
-        return geocode(f"{row['Ort / Trasse']}, Deutschland")
-    else:
-        return geocode(f"{row['Bundesland']}, Deutschland")
+    return geocode(build_query(row))
 
 
-# Lädt Excel-Datei und ergänzt Latitude/Longitude durch Geokodierung
-def load_and_geocode(input_excel, geocode):
-    df = pd.read_excel(input_excel)
-    num_cols = ['Leitungslänge in km', 'Übertragungskapazität in MVA', 'Kosten in Mio.€']
-    for col in num_cols:
-        if col in df.columns:
-            df[col] = df[col].map(to_number)
+# Lädt eine Tabelle (Excel oder spaltenorientierter Zwischenstand) mit bereinigten Kennzahlen
+def load_table(input_path):
+    return read_table(input_path)
+
+
+# Ergänzt Latitude/Longitude durch Geokodierung
+# Jeder eindeutige Ort wird nur einmal geokodiert (bzw. aus dem Cache gelesen) und über die Codes der Anfragen
+# auf alle Zeilen verteilt; die Adresse wird als Kategorie gespeichert
+def geocode_frame(df, geocode, cache=None, max_workers=1):
+    df = df.copy()
     if not {'latitude', 'longitude'}.issubset(df.columns):
-        df['location'] = df.apply(lambda row: geocode_address(row, geocode), axis=1)
-        df['latitude'] = df['location'].apply(lambda loc: loc.latitude if loc else np.nan)
-        df['longitude'] = df['location'].apply(lambda loc: loc.longitude if loc else np.nan)
+        queries = build_queries(df)
+        codes, unique_queries = pd.factorize(queries)
+        results = resolve_queries(unique_queries, geocode, cache, max_workers=max_workers)
+        found = pd.DataFrame([results[q] for q in unique_queries], columns=['location', 'latitude', 'longitude'])
+        df['location'] = pd.Categorical(found['location'].to_numpy(dtype=object))[codes]
+        for col in ['latitude', 'longitude']:
+            df[col] = pd.to_numeric(found[col], errors='coerce').to_numpy(dtype='float64')[codes]
     else:
         df['latitude'] = pd.to_numeric(df['latitude'], errors='coerce')
         df['longitude'] = pd.to_numeric(df['longitude'], errors='coerce')
     return df
 
+
+# Lädt Excel-Datei und ergänzt Latitude/Longitude durch Geokodierung
+def load_and_geocode(input_excel, geocode, cache=None, max_workers=1):
+    return geocode_frame(load_table(input_excel), geocode, cache, max_workers)
+
 # Fügt einen Toggle-Button hinzu, um alle VNBs anzuzeigen oder auszublenden
-def add_toggle_all_button(map_object):
-    toggle_script = """
-    <script>
+# Mit manifest_url (nachgeladene VNB-Layer, siehe vnb_site.py) werden die Layer nacheinander eingeblendet:
+# zuerst die VNB im aktuellen Kartenausschnitt (Bounds aus dem Manifest), jeweils nach dem Laden des vorherigen
+def add_toggle_all_button(map_object, manifest_url=None):
+    if manifest_url:
+        toggle_function = """
+    function toggleLayers(action) {
+        var generation = ++vnbSite.generation;
+        if (!action) {
+            Object.keys(vnbSite.layers).forEach(function(name) {
+                vnbSite.map.removeLayer(vnbSite.layers[name]);
+            });
+            return;
+        }
+        vnbSite.manifest = vnbSite.manifest || fetch(%s).then(function(response) { return response.json(); });
+        vnbSite.manifest.then(function(manifest) {
+            var view = vnbSite.map.getBounds();
+            var visible = function(entry) { return entry.bounds ? view.intersects(entry.bounds) : false; };
+            var entries = manifest.vnb.slice().sort(function(a, b) { return visible(b) - visible(a); });
+            entries.reduce(function(chain, entry) {
+                return chain.then(function() {
+                    var layer = vnbSite.layers[entry.name];
+                    if (generation !== vnbSite.generation || !layer || vnbSite.map.hasLayer(layer)) {
+                        return;
+                    }
+                    vnbSite.map.addLayer(layer);
+                    return layer.vnbLoaded;
+                });
+            }, Promise.resolve());
+        });
+    }
+""" % json.dumps(manifest_url)
+    else:
+        toggle_function = """
     function toggleLayers(action) {
         var checkboxes = document.querySelectorAll('.leaflet-control-layers-overlays .leaflet-control-layers-selector');
         checkboxes.forEach(function(checkbox) {
@@ -73,7 +119,9 @@ def add_toggle_all_button(map_object):
             }
         });
     }
-    </script>
+"""
+    toggle_script = """
+    <script>""" + toggle_function + """    </script>
     <div style="position: fixed; bottom: 70px; left: 50px; z-index: 1000;">
         <button onclick="toggleLayers(true)">Alle VNB einblenden</button>
         <button onclick="toggleLayers(false)">Alle VNB ausblenden</button>
@@ -86,211 +134,496 @@ def safe_filename(name):
     # Erlaubt nur Buchstaben, Zahlen, Unterstrich, Punkt und Bindestrich
     return re.sub(r'[^A-Za-z0-9_.-]', '_', name)
 
+# Erzeugt die Bundesland-Umrisse mit Statistik-Popups (für alle Karten gleich)
+def build_bundesland_popups(bundeslaender_gdf, df_bundesland):
+    # Bundesland-Statistiken für Popups vorbereiten
+    bundesland_stats = df_bundesland.set_index('Bundesland').to_dict(orient='index')
+    def style_function(feature):
+        return {'fillOpacity': 0, 'weight': 0}
+
+    def popup_function(feature):
+        name = feature['properties']['name']
+        stats = bundesland_stats.get(name)
+        if stats:
+            return folium.Popup(
+                f"<b>{name}</b><br>"
+                f"Kosten: {stats['Kosten in Mio.€']:.2f} Mio.€<br>"
+                f"Übertragungskapazität: {stats['Übertragungskapazität in MVA']:.2f} MVA<br>"
+                f"Leitungslänge: {stats['Leitungslänge in km']:.2f} km",
+                max_width=300
+            )
+        else:
+            return folium.Popup(f"<b>{name}</b><br>Keine Daten", max_width=200)
+
+    layers = []
+    for feature in bundeslaender_gdf.iterfeatures(drop_id=True):
+        popup = popup_function(feature)
+        layers.append(folium.GeoJson(
+            feature,
+            style_function=style_function,
+            highlight_function=lambda x: {'weight': 2, 'color': 'blue'},
+            tooltip=feature['properties']['name'],
+            popup=popup,
+            control=False
+        ))
+    return layers
+
+
+# Karten je Kennzahl: (Choropleth-Spalte, Farbskala, Dateiname)
+MAP_SPECS = [
+    ("Kosten in Mio.€", "YlOrRd", "interaktive_karte_kosten.html"),
+    ("Übertragungskapazität in MVA", "Blues", "interaktive_karte_uebertragung.html"),
+    ("Leitungslänge in km", "Greens", "interaktive_karte_leitung.html"),
+]
+
+# Darstellung der Maßnahmen (siehe build_vnb_layers)
+MARKER_MODES = ("circle", "geojson", "clustered")
+# Skripte, die die Darstellungen einmal je Karte voraussetzen
+MARKER_ELEMENTS = {"circle": [], "geojson": [POPUP_TEMPLATE_SCRIPT], "clustered": [PRE_CLUSTER_SCRIPT]}
+
+# Erzeugt das MarkerCluster, in das die Marker eines VNB eingehängt werden
+def build_marker_cluster():
+    return MarkerCluster(
+        maxClusterRadius=120,
+        disableClusteringAtZoom=12,
+        spiderfyOnMaxZoom=True,
+        showCoverageOnHover=True,
+        zoomToBoundsOnClick=True
+    )
+
+
+# Fügt jede Maßnahme als eigenen CircleMarker mit Popup hinzu
+# vnb_invalid: vorab berechnete Ungültig-Masken der Popup-Spalten (siehe build_vnb_layers)
+# Die Popups werden vorab für alle Zeilen spaltenweise zusammengesetzt (siehe popups.py)
+def add_circle_markers(vnb_rows, vnb_invalid, color, marker_cluster):
+    columns = list(vnb_invalid.columns)
+    popups = render_popups(popup_values(vnb_rows, vnb_invalid, columns), columns)
+    keep = ~vnb_invalid['Ort / Trasse'].to_numpy()
+    tooltips = vnb_rows.get('Ort / Trasse', vnb_rows['Bundesland']).to_numpy()
+    for lat, lon, popup, tooltip in zip(vnb_rows['latitude'].to_numpy()[keep], vnb_rows['longitude'].to_numpy()[keep],
+                                        popups[keep], tooltips[keep]):
+        folium.CircleMarker(
+            location=[lat, lon],
+            radius=7,
+            color=color,
+            fill=True,
+            fill_color=color,
+            fill_opacity=0.8,
+            popup=folium.Popup(popup, max_width=400),
+            tooltip=tooltip
+        ).add_to(marker_cluster)
+
+
+# Wandelt die Maßnahmen eines VNB in eine GeoJSON-FeatureCollection um (ohne Maßnahmen ohne Ort / Trasse)
+# Einzige Eigenschaft ist 'popup': die escapten Werte in der Reihenfolge von POPUP_ORDER (None für fehlende oder
+# ungültige Einträge); Popup und Tooltip setzt POPUP_TEMPLATE_SCRIPT im Browser daraus zusammen
+def vnb_feature_collection(vnb_rows, vnb_invalid):
+    keep = ~vnb_invalid['Ort / Trasse'].to_numpy()
+    values = popup_values(vnb_rows, vnb_invalid)[keep].tolist()
+    coordinates = np.column_stack([
+        pd.to_numeric(vnb_rows['longitude'], errors='coerce').to_numpy(dtype='float64')[keep],
+        pd.to_numeric(vnb_rows['latitude'], errors='coerce').to_numpy(dtype='float64')[keep],
+    ]).tolist()
+    features = [
+        {'type': 'Feature', 'geometry': {'type': 'Point', 'coordinates': point}, 'properties': {'popup': row}}
+        for point, row in zip(coordinates, values)
+    ]
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+# Fügt alle Maßnahmen eines VNB als eine GeoJSON-FeatureCollection hinzu;
+# Popups und Tooltips entstehen erst im Browser über die gemeinsame Vorlage (POPUP_TEMPLATE_SCRIPT)
+def add_geojson_markers(vnb_rows, vnb_invalid, color, marker_cluster):
+    folium.GeoJson(
+        vnb_feature_collection(vnb_rows, vnb_invalid),
+        marker=folium.CircleMarker(radius=7, color=color, fill=True, fill_color=color, fill_opacity=0.8),
+        on_each_feature=JsCode("vnbPopups.bind"),
+        control=False
+    ).add_to(marker_cluster)
+
+
+# Teilt die gültigen Zeilen einmalig nach VNB auf: Die Tabelle wird einmal stabil nach VNB sortiert, die Zeilen
+# jedes VNB sind danach ein zusammenhängender Bereich (iloc-Ausschnitt statt einer Maske über alle Zeilen)
+# Liefert die neu nummerierten Zeilen und je VNB (Name, Zeilen, Ungültig-Masken der Popup-Spalten, Farbe)
+def split_vnbs(df_valid):
+    df_valid = df_valid.reset_index(drop=True)
+    ranges = group_ranges(df_valid['VNB-Name'])
+    df_sorted = df_valid.take(ranges.order)
+    # Ungültig-Masken der Popup-Spalten einmalig für alle Zeilen berechnen
+    popup_invalid = invalid_frame(df_sorted, [col for col in POPUP_ORDER if col in df_sorted.columns or col == 'Ort / Trasse'])
+    cmap = plt.get_cmap('tab20')
+    colors = [
+        f'#{int(255 * r):02x}{int(255 * g):02x}{int(255 * b):02x}'
+        for r, g, b, _ in cmap(np.linspace(0, 1, len(ranges.names)))
+    ]
+    groups = [
+        (vnb, df_sorted.iloc[start:stop], popup_invalid.iloc[start:stop], color)
+        for vnb, start, stop, color in zip(ranges.names, ranges.starts, ranges.stops, colors)
+    ]
+    return df_valid, groups
+
+
+# Schreibt die CSV-Dateien je VNB und die Gesamt-CSV; liefert die Optionen für das Download-Overlay
+# export_vnbs: nur für diese VNB CSV-Dateien schreiben (None = alle); href_dir: Pfad der Links relativ zur Karte
+def export_vnb_csvs(df_valid, groups, csv_dir="vnb_csv", export_vnbs=None, href_dir=None):
+    href_dir = csv_dir if href_dir is None else href_dir
+    # CSV-Ordner anlegen
+    os.makedirs(csv_dir, exist_ok=True)
+    download_links = []
+    for vnb, vnb_rows, _, _ in groups:
+        # Sicheren Dateinamen erzeugen
+        csv_filename = f"{safe_filename(vnb)}.csv"
+        if export_vnbs is None or vnb in export_vnbs:
+            vnb_rows.to_csv(os.path.join(csv_dir, csv_filename), index=False)
+        # Link für Overlay
+        download_links.append(f'<option value="{href_dir}/{csv_filename}">{vnb}</option>')
+
+    # Gesamt-CSV erzeugen
+    gesamt_csv = os.path.join(csv_dir, "Alle_VNBs.csv")
+    df_valid.to_csv(gesamt_csv, index=False)
+    download_links.insert(0, f'<option value="{href_dir}/Alle_VNBs.csv">Alle VNBs (Gesamt)</option>')
+    return download_links
+
+
+# Erzeugt je VNB einen Layer mit Markern und schreibt die VNB-CSV-Dateien
+# marker_mode: "circle" (ein CircleMarker je Maßnahme), "geojson" (eine FeatureCollection je VNB) oder
+# "clustered" (Maßnahmen am selben Punkt zusammengefasst, Cluster je Zoomstufe vorberechnet, siehe clustering.py)
+# export_vnbs: nur für diese VNB CSV-Dateien schreiben (None = alle)
+def build_vnb_layers(df_valid, csv_dir="vnb_csv", marker_mode="circle", export_vnbs=None, href_dir=None):
+    if marker_mode not in MARKER_MODES:
+        raise ValueError(f"❌ Unbekannter marker_mode: {marker_mode}")
+    df_valid, groups = split_vnbs(df_valid)
+    layers = []
+    for vnb, vnb_rows, vnb_invalid, color in groups:
+        vnb_fg = folium.FeatureGroup(name=f"VNB: {vnb}", show=False)
+        if marker_mode == "clustered":
+            PreClusteredMarkers(vnb_rows, vnb_invalid, color).add_to(vnb_fg)
+        elif marker_mode == "geojson":
+            add_geojson_markers(vnb_rows, vnb_invalid, color, build_marker_cluster().add_to(vnb_fg))
+        else:
+            add_circle_markers(vnb_rows, vnb_invalid, color, build_marker_cluster().add_to(vnb_fg))
+        layers.append(vnb_fg)
+    return layers, export_vnb_csvs(df_valid, groups, csv_dir, export_vnbs, href_dir)
+
+
+# Erzeugt das HTML-Overlay für Download-Links mit Button und Abstand zu den anderen Buttons
+def build_download_overlay(download_links):
+    return f"""
+    <div style="position: fixed; bottom: 17px; left: 50px; z-index: 1000; background: white; padding: 8px; border-radius: 6px;">
+        <label for="vnb_csv_select"><b>VNB-CSV herunterladen:</b></label>
+        <select id="vnb_csv_select">
+            <option value="">Bitte wählen ...</option>
+            {''.join(download_links)}
+        </select>
+        <button id="vnb_csv_download_btn" style="margin-left:8px;">Download</button>
+    </div>
+    <script>
+    document.getElementById('vnb_csv_download_btn').onclick = function() {{
+        var sel = document.getElementById('vnb_csv_select');
+        if(sel.value) {{
+            var link = document.createElement('a');
+            link.href = sel.value;
+            link.download = sel.options[sel.selectedIndex].text + ".csv";
+            document.body.appendChild(link);
+            link.click();
+            document.body.removeChild(link);
+        }}
+    }};
+    </script>
+    """
+
+
+# Kapselt einen Layer, der nur in der ersten Karte gerendert wird. Weitere Karten übernehmen die
+# fertigen HTML-/Skript-Fragmente, die Marker-Objekte werden danach freigegeben.
+# Voraussetzung: alle Karten tragen denselben JavaScript-Namen (siehe create_map).
+class PreRenderedLayer(Layer):
+    def __init__(self, layer):
+        super().__init__(name=layer.layer_name, overlay=layer.overlay, control=layer.control, show=layer.show)
+        self._name = layer._name
+        self._id = layer._id
+        self.layer = layer
+        self.fragments = None
+
+    def render(self, **kwargs):
+        figure = self.get_root()
+        sections = (figure.header, figure.html, figure.script)
+        if self.fragments is None:
+            before = [set(section._children) for section in sections]
+            self.layer._parent = self._parent
+            self.layer.render(**kwargs)
+            self.fragments = [
+                [(name, element) for name, element in section._children.items() if name not in seen]
+                for section, seen in zip(sections, before)
+            ]
+            self.layer = None
+        else:
+            for section, fragments in zip(sections, self.fragments):
+                for name, element in fragments:
+                    section.add_child(element, name=name)
+
+
+# Erzeugt alle kennzahlunabhängigen Kartenbestandteile in einem Durchlauf
+def build_shared_layers(df_valid, bundeslaender_gdf, df_bundesland, csv_dir="vnb_csv", marker_mode="circle",
+                        export_vnbs=None, href_dir=None):
+    vnb_layers, download_links = build_vnb_layers(df_valid, csv_dir, marker_mode, export_vnbs, href_dir)
+    return {
+        'bundesland_popups': [PreRenderedLayer(layer) for layer in build_bundesland_popups(bundeslaender_gdf, df_bundesland)],
+        'vnb_layers': [PreRenderedLayer(layer) for layer in vnb_layers],
+        'download_html': build_download_overlay(download_links),
+        'elements': MARKER_ELEMENTS[marker_mode],
+    }
+
+
+# Karte erstellen und die Bundesländer als Choropleth-Layer hinzufügen
+# Die gemeinsamen Layer werden nur einmal gerendert und in jede weitere Karte übernommen
+# Optionale Einträge in shared_layers: 'elements' (zusätzliche HTML-Bausteine) und 'manifest_url' (Toggle-Button)
+# prefer_canvas zeichnet die Marker per Canvas statt als einzelne SVG-Elemente (empfohlen für den GeoJSON-Modus)
+def create_map(choropleth_col, fill_color, output_map, bundeslaender_gdf, df_bundesland, shared_layers,
+               prefer_canvas=False):
+    karte = folium.Map(location=[51.0, 10.0], zoom_start=6, tiles="OpenStreetMap", prefer_canvas=prefer_canvas)
+    # Fester JavaScript-Name, damit die vorgerenderten Fragmente in jeder Karte gültig sind
+    karte._id = "netzausbau"
+    # Choropleth-Layer NICHT im LayerControl anzeigen (control=False)
+    folium.Choropleth(
+        geo_data=bundeslaender_gdf,
+        name=f"{choropleth_col} Choropleth",
+        data=df_bundesland,
+        columns=["Bundesland", choropleth_col],
+        key_on="feature.properties.name",
+        fill_color=fill_color,
+        fill_opacity=0.7,
+        line_opacity=0.2,
+        legend_name=choropleth_col,
+        control=False
+    ).add_to(karte)
+
+    for layer in shared_layers['bundesland_popups']:
+        karte.add_child(layer)
+    for layer in shared_layers['vnb_layers']:
+        karte.add_child(layer)
+    karte.get_root().html.add_child(folium.Element(shared_layers['download_html']))
+    for element in shared_layers.get('elements', []):
+        karte.get_root().html.add_child(folium.Element(element))
+
+    folium.LayerControl(collapsed=True).add_to(karte)
+    add_toggle_all_button(karte, shared_layers.get('manifest_url'))
+    karte.save(output_map)
+
+
+# Geokodiert alle Zeilen ohne Koordinaten: Offline-Ortsverzeichnis (falls angegeben) zuerst, danach Nominatim mit
+# Ratenlimit; die Ergebnisse landen im SQLite-Cache geocode_cache (None schaltet ihn ab)
+@profiled("geocode")
+def geocode_table(
+        df,
+        bundesland_geojson: str = "2_deutschland.geo.json",
+        geocode_cache: str = "geocode_cache.sqlite",
+        gazetteer: str = None,
+        offline: bool = False,
+        nominatim_domain: str = None,
+        min_delay_seconds: float = 1,
+        max_workers: int = 1,
+        geocode=None,
+        profiler=None
+):
+    # geocode: bereits zu denselben Einstellungen erzeugter Geokodierer (Dienstmodus, watch.py)
+    if geocode is None:
+        geocode = build_geocoder(
+            gazetteer=gazetteer,
+            bundesland_geojson=bundesland_geojson,
+            offline=offline,
+            nominatim_domain=nominatim_domain,
+            min_delay_seconds=min_delay_seconds
+        )
+    if offline:
+        namespace = "offline"
+    else:
+        namespace = "" if nominatim_domain is None else nominatim_domain
+        if gazetteer:
+            namespace += "+gazetteer"
+    cache = GeocodeCache(geocode_cache, namespace=namespace) if geocode_cache else None
+    with profiler.stage('geocode'):
+        try:
+            df = geocode_frame(df, profiler.counted('geocoder_calls', geocode), cache, max_workers)
+        finally:
+            if cache is not None:
+                profiler.count('geocode_cache_hits', cache.hits)
+                profiler.count('geocode_cache_misses', cache.misses)
+                cache.close()
+        profiler.count('rows_geocoded', len(df))
+        profiler.count('geocode_failures', int(df['latitude'].isna().sum()))
+    return df
+
+
+# Ordnet die Punkte vektorisiert über einen räumlichen Index den Bundesland-Polygonen zu
+# Liefert (gültige Zeilen, ungültige Zeilen)
+@profiled("validate")
+def validate_table(df, bundeslaender_gdf, simplify_tolerance=0.01, profiler=None):
+    with profiler.stage('validate'):
+        gdf = validate_bundesland(df, bundesland_index(bundeslaender_gdf, simplify_tolerance))
+        df_valid = gdf[gdf['passt']].drop(columns=['geometry', 'index_right', 'name'], errors='ignore')
+        df_invalid = gdf[~gdf['passt']].drop(columns=['geometry', 'index_right', 'name'], errors='ignore')
+        profiler.count('rows_valid', len(df_valid))
+        profiler.count('rows_invalid', len(df_invalid))
+    return df_valid, df_invalid
+
+
+# Schreibt je Kennzahl eine Karte (MAP_SPECS) nach output_dir und die VNB-CSV-Dateien nach csv_dir
+# (Standard: output_dir/vnb_csv); map_names ersetzt einzelne Dateinamen ({Kennzahl: Dateiname})
+# Liefert die Pfade der Karten
+@profiled("map")
+def write_maps(df_valid, bundeslaender_gdf, df_bundesland, output_dir=".", csv_dir=None, marker_mode="circle",
+               export_vnbs=None, map_names=None, profiler=None):
+    csv_dir = os.path.join(output_dir, "vnb_csv") if csv_dir is None else csv_dir
+    map_names = map_names or {}
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+# Gemeinsame Layer (Marker, Bundesland-Popups, Download-Overlay) und CSV-Dateien nur einmal erzeugen
+    # Die Download-Links verweisen relativ zur Karte auf die CSV-Dateien
+    href_dir = os.path.relpath(csv_dir, output_dir or ".").replace(os.sep, "/")
+    with profiler.stage('layers_and_csv', marker_mode=marker_mode):
+        shared_layers = build_shared_layers(df_valid, bundeslaender_gdf, df_bundesland, csv_dir, marker_mode,
+                                            export_vnbs, href_dir)
+        csv_files = [f"{safe_filename(vnb)}.csv" for vnb in df_valid['VNB-Name'].dropna().unique()
+                     if export_vnbs is None or vnb in export_vnbs] + ["Alle_VNBs.csv"]
+        profiler.add_bytes(*(os.path.join(csv_dir, f) for f in csv_files))
+        profiler.count('markers', len(df_valid))
+    prefer_canvas = marker_mode != "circle"
+# Karten für verschiedene Kennzahlen erstellen
+    written = []
+    for choropleth_col, fill_color, map_file in MAP_SPECS:
+        output_map = os.path.join(output_dir, map_names.get(choropleth_col, map_file))
+        with profiler.stage('create_map', map=output_map):
+            create_map(choropleth_col, fill_color, output_map, bundeslaender_gdf, df_bundesland, shared_layers, prefer_canvas)
+            profiler.add_bytes(output_map)
+        written.append(output_map)
+    return written
+
+
 # Hauptfunktion, die die Geokodierung und Kartenerstellung durchführt
+# output_map ist die Kostenkarte; die übrigen Karten und der Ordner vnb_csv (bzw. csv_dir) entstehen daneben
+# input_excel kann auch ein Ordner oder Glob-Muster sein: die Tabellen werden dann mit ingest_workers Prozessen
+# eingelesen, abgelehnte Dateien stehen in eingabe_bericht.csv neben output_excel
+# Laufzeit und Zähler je Schritt misst profiler (siehe profiling.py); ohne übergebenen profiler steuern die
+# Schlüsselwortargumente run_report="laufbericht.json", profile=True und trace_memory=True den Laufbericht
+@profiled("geocode_and_map")
 def geocode_and_map(
         input_excel: str,
         input_excel2: str = None,
         output_excel: str = "output_geokodiert.xlsx",
         output_failure: str = "output_failure.xlsx",
         output_map: str = "interaktive_karte_kosten.html",
-        bundesland_geojson: str = "2_deutschland.geo.json"
+        bundesland_geojson: str = "2_deutschland.geo.json",
+        geocode_cache: str = "geocode_cache.sqlite",
+        gazetteer: str = None,
+        offline: bool = False,
+        nominatim_domain: str = None,
+        min_delay_seconds: float = 1,
+        max_workers: int = 1,
+        simplify_tolerance: float = 0.01,
+        marker_mode: str = "circle",
+        incremental: bool = False,
+        manifest_path: str = "run_manifest.json",
+        output_cube: str = "output_cube.parquet",
+        csv_dir: str = None,
+        ingest_workers: int = None,
+        profiler=None
 ):
-    geolocator = Nominatim(user_agent="geo_map_app", timeout=60)
-    geocode = RateLimiter(geolocator.geocode, min_delay_seconds=1, max_retries=3)
-
-# Lädt die Excel-Datei und führt die Geokodierung durch
-    df1 = load_and_geocode(input_excel, geocode)
-    if input_excel2:
-        df2 = load_and_geocode(input_excel2, geocode)
-        df = pd.concat([df1, df2], ignore_index=True)
-    else:
-        df = df1
+    if marker_mode not in MARKER_MODES:
+        raise ValueError(f"❌ Unbekannter marker_mode: {marker_mode}")
+    map_dir = os.path.dirname(output_map)
+    csv_dir = os.path.join(map_dir, "vnb_csv") if csv_dir is None else csv_dir
+# Lädt die Eingabetabellen
+    with profiler.stage('load'):
+        if is_collection(input_excel):
+            df, report = ingest(input_excel, ingest_workers)
+            report_path = write_report(report, os.path.join(os.path.dirname(output_excel), REPORT_FILE))
+            if report_path:
+                profiler.add_bytes(report_path)
+        else:
+            df = load_table(input_excel)
+        if input_excel2:
+            df = pd.concat([df, load_table(input_excel2)], ignore_index=True)
+        profiler.count('rows_loaded', len(df))
 
-# GeoDataFrame erstellen und Geometrie hinzufügen
-    gdf = gpd.GeoDataFrame(
-        df,
-        geometry=[
-            Point(lon, lat) if not np.isnan(lat) and not np.isnan(lon) else None
-            for lon, lat in zip(df['longitude'], df['latitude'])
-        ],
-        crs="EPSG:4326"
+# Im inkrementellen Modus nur neue oder geänderte VNB geokodieren, prüfen und exportieren
+    fingerprints = fingerprint_vnbs(df)
+    settings = fingerprint_settings(
+        geojson_mtime=os.path.getmtime(bundesland_geojson), gazetteer=gazetteer, offline=offline,
+        nominatim_domain=nominatim_domain, simplify_tolerance=simplify_tolerance
     )
+    required_outputs = [output_excel, output_failure, output_cube]
+    plan = plan_update(manifest_path, fingerprints, settings, required_outputs) if incremental else None
+    if plan is not None:
+        if not plan.changed and not plan.removed:
+            print("✔️ Keine Änderungen seit dem letzten Lauf")
+            return
+        print(f"🔁 Inkrementeller Lauf: {len(plan.changed)} geänderte, {len(plan.removed)} entfernte VNB")
+        df = df[vnb_keys(df).isin(plan.changed)]
+        profiler.count('vnb_changed', len(plan.changed))
 
-# Bundesland Polygon-Daten laden und mit den Geodaten verbinden
-    bundeslaender_gdf = gpd.read_file(bundesland_geojson, encoding='utf-8')[['name', 'geometry']]
+# Führt die Geokodierung durch
+    df = geocode_table(
+        df, bundesland_geojson, geocode_cache, gazetteer, offline, nominatim_domain, min_delay_seconds, max_workers,
+        profiler=profiler
+    )
 
-    gdf = gpd.sjoin(gdf, bundeslaender_gdf, how='left', predicate='within')
-    gdf['passt'] = gdf['name'] == gdf['Bundesland']
-    df_valid = gdf[gdf['passt']].drop(columns=['geometry', 'index_right', 'name'], errors='ignore')
-    df_invalid = gdf[~gdf['passt']].drop(columns=['geometry', 'index_right', 'name'], errors='ignore')
+# Bundesland-Polygone laden (zwischengespeichert) und Punkte vektorisiert über einen räumlichen Index zuordnen
+    bundeslaender_gdf = load_bundeslaender(bundesland_geojson, cache_dir=os.path.dirname(os.path.abspath(output_excel)))
+    df_valid, df_invalid = validate_table(df, bundeslaender_gdf, simplify_tolerance, profiler=profiler)
 
-# Ergebnisse in Excel-Dateien speichern
-    df_valid.to_excel(output_excel, index=False)
-    df_invalid.to_excel(output_failure, index=False)
+# Aggregationswürfel der gültigen Maßnahmen; im inkrementellen Modus werden nur die Zeilen der geänderten VNB ersetzt
+    with profiler.stage('cube'):
+        cube = build_cube(df_valid)
+        if plan is not None:
+            cube = patch_cube(read_table(output_cube), cube, plan.changed | plan.removed)
+            df_valid = merge_previous(read_table(output_excel), df_valid, plan, fingerprints)
+            df_invalid = merge_previous(read_table(output_failure), df_invalid, plan, fingerprints)
+        write_table(cube, output_cube)
+        profiler.add_bytes(output_cube)
+        # Summen je Bundesland für die Choroplethen als Ausschnitt des Würfels
+        df_bundesland = slice_cube(cube, 'Bundesland', METRICS)
 
-# Aggregation der Daten nach Bundesland
-    if df_valid.empty or 'Bundesland' not in df_valid.columns:
-        df_bundesland = pd.DataFrame(
-            columns=['Bundesland', 'Leitungslänge in km', 'Übertragungskapazität in MVA', 'Kosten in Mio.€'])
-    else:
-        df_bundesland = (
-            df_valid
-            .groupby('Bundesland')[['Leitungslänge in km', 'Übertragungskapazität in MVA', 'Kosten in Mio.€']]
-            .sum()
-            .reset_index()
-        )
+# Ergebnisse als typisierten Zwischenstand (Parquet) und als Excel-Export speichern
+    with profiler.stage('write_tables'):
+        write_table(df_valid, table_path(output_excel), export_excel=output_excel)
+        write_table(df_invalid, table_path(output_failure), export_excel=output_failure)
+        profiler.add_bytes(output_excel, table_path(output_excel), output_failure, table_path(output_failure))
 
-# Karte erstellen und die Bundesländer als Choropleth-Layer hinzufügen
-    def create_map(choropleth_col, fill_color, output_map):
-        karte = folium.Map(location=[51.0, 10.0], zoom_start=6, tiles="OpenStreetMap")
-        # Choropleth-Layer NICHT im LayerControl anzeigen (control=False)
-        folium.Choropleth(
-            geo_data=bundeslaender_gdf,
-            name=f"{choropleth_col} Choropleth",
-            data=df_bundesland,
-            columns=["Bundesland", choropleth_col],
-            key_on="feature.properties.name",
-            fill_color=fill_color,
-            fill_opacity=0.7,
-            line_opacity=0.2,
-            legend_name=choropleth_col,
-            control=False
-        ).add_to(karte)
-
-        # Bundesland-Statistiken für Popups vorbereiten
-        bundesland_stats = df_bundesland.set_index('Bundesland').to_dict(orient='index')
-        def style_function(feature):
-            return {'fillOpacity': 0, 'weight': 0}
-
-        def popup_function(feature):
-            name = feature['properties']['name']
-            stats = bundesland_stats.get(name)
-            if stats:
-                return folium.Popup(
-                    f"<b>{name}</b><br>"
-                    f"Kosten: {stats['Kosten in Mio.€']:.2f} Mio.€<br>"
-                    f"Übertragungskapazität: {stats['Übertragungskapazität in MVA']:.2f} MVA<br>"
-                    f"Leitungslänge: {stats['Leitungslänge in km']:.2f} km",
-                    max_width=300
-                )
-            else:
-                return folium.Popup(f"<b>{name}</b><br>Keine Daten", max_width=200)
-
-        with open(bundesland_geojson, encoding='utf-8') as f:
-            geojson_data = json.load(f)
-        for feature in geojson_data['features']:
-            popup = popup_function(feature)
-            folium.GeoJson(
-                feature,
-                style_function=style_function,
-                highlight_function=lambda x: {'weight': 2, 'color': 'blue'},
-                tooltip=feature['properties']['name'],
-                popup=popup,
-                control=False
-            ).add_to(karte)
-
-        # VNBs als CircleMarker hinzufügen
-        vnb_names = df_valid['VNB-Name'].unique()
-        cmap = plt.get_cmap('tab20')
-        vnb_color_map = {
-            name: f'#{int(255 * r):02x}{int(255 * g):02x}{int(255 * b):02x}'
-            for name, (r, g, b, _) in zip(vnb_names, cmap(np.linspace(0, 1, len(vnb_names))))
-        }
-        popup_order = [
-            'Bundesland', 'Ort / Trasse', 'Netzebene', 'Art der Maßnahme', 'Netzkomponente',
-            'Projektstatus', 'Zeithorizont', 'Leitungslänge in km',
-            'Übertragungskapazität in MVA', 'Kosten in Mio.€', 'VNB-Name', 'latitude', 'longitude'
-        ]
-
-        # CSV-Ordner anlegen
-        csv_dir = "vnb_csv"
-        os.makedirs(csv_dir, exist_ok=True)
-        download_links = []
-        for vnb in vnb_names:
-            vnb_fg = folium.FeatureGroup(name=f"VNB: {vnb}", show=False)
-            marker_cluster = MarkerCluster(
-                maxClusterRadius=120,
-                disableClusteringAtZoom=12,
-                spiderfyOnMaxZoom=True,
-                showCoverageOnHover=True,
-                zoomToBoundsOnClick=True
-            ).add_to(vnb_fg)
-            vnb_rows = df_valid[df_valid['VNB-Name'] == vnb]
-            color = vnb_color_map.get(vnb, '#3186cc')
-            for _, row in vnb_rows.iterrows():
-                if not is_invalid(row.get('Ort / Trasse', None)):
-                    popup = "<br>".join(
-                        f"<b>{html.escape(col)}:</b> {html.escape(str(row[col]))}"
-                        for col in popup_order if col in row and not is_invalid(row[col])
-                    )
-                    folium.CircleMarker(
-                        location=[row['latitude'], row['longitude']],
-                        radius=7,
-                        color=color,
-                        fill=True,
-                        fill_color=color,
-                        fill_opacity=0.8,
-                        popup=folium.Popup(popup, max_width=400),
-                        tooltip=row.get('Ort / Trasse', row['Bundesland'])
-                    ).add_to(marker_cluster)
-            vnb_fg.add_to(karte)
-            # Sicheren Dateinamen erzeugen und Verzeichnis sicherstellen
-            csv_filename = f"{safe_filename(vnb)}.csv"
-            csv_path = os.path.join(csv_dir, csv_filename)
-            os.makedirs(os.path.dirname(csv_path), exist_ok=True)
-            vnb_rows.to_csv(csv_path, index=False)
-            # Link für Overlay
-            download_links.append(f'<option value="{csv_dir}/{csv_filename}">{vnb}</option>')
-
-        # Gesamt-CSV erzeugen
-        gesamt_csv = os.path.join(csv_dir, "Alle_VNBs.csv")
-        df_valid.to_csv(gesamt_csv, index=False)
-        download_links.insert(0, f'<option value="{csv_dir}/Alle_VNBs.csv">Alle VNBs (Gesamt)</option>')
-
-        # HTML-Overlay für Download-Links mit Button und Abstand zu den anderen Buttons
-        download_html = f"""
-        <div style="position: fixed; bottom: 17px; left: 50px; z-index: 1000; background: white; padding: 8px; border-radius: 6px;">
-            <label for="vnb_csv_select"><b>VNB-CSV herunterladen:</b></label>
-            <select id="vnb_csv_select">
-                <option value="">Bitte wählen ...</option>
-                {''.join(download_links)}
-            </select>
-            <button id="vnb_csv_download_btn" style="margin-left:8px;">Download</button>
-        </div>
-        <script>
-        document.getElementById('vnb_csv_download_btn').onclick = function() {{
-            var sel = document.getElementById('vnb_csv_select');
-            if(sel.value) {{
-                var link = document.createElement('a');
-                link.href = sel.value;
-                link.download = sel.options[sel.selectedIndex].text + ".csv";
-                document.body.appendChild(link);
-                link.click();
-                document.body.removeChild(link);
-            }}
-        }};
-        </script>
-        """
-        karte.get_root().html.add_child(folium.Element(download_html))
-
-        folium.LayerControl(collapsed=True).add_to(karte)
-        add_toggle_all_button(karte)
-        karte.save(output_map)
-# Karten für verschiedene Kennzahlen erstellen
-    create_map("Kosten in Mio.€", "YlOrRd", "interaktive_karte_kosten.html")
-    create_map("Übertragungskapazität in MVA", "Blues", "interaktive_karte_uebertragung.html")
-    create_map("Leitungslänge in km", "Greens", "interaktive_karte_leitung.html")
+# Karten und CSV-Dateien; im inkrementellen Modus nur die CSV-Dateien der geänderten VNB neu schreiben
+    export_vnbs = None
+    if plan is not None:
+        export_vnbs = plan.changed
+        for vnb in plan.removed:
+            csv_path = os.path.join(csv_dir, plan.previous[vnb].get('csv', ''))
+            if os.path.isfile(csv_path):
+                os.remove(csv_path)
+    map_names = {MAP_SPECS[0][0]: os.path.basename(output_map)}
+    written = write_maps(df_valid, bundeslaender_gdf, df_bundesland, map_dir, csv_dir, marker_mode, export_vnbs,
+                         map_names, profiler=profiler)
+# Manifest für den nächsten inkrementellen Lauf schreiben
+    save_manifest(manifest_path, {
+        'settings': settings,
+        'vnb': {
+            vnb: {
+                'fingerprint': fp,
+                'csv': f"{safe_filename(vnb)}.csv",
+            }
+            for vnb, fp in fingerprints.items()
+        },
+    })
 # Abschlussausgaben
     print(f"✔️ Geokodierte Datei: {output_excel}")
     print(f"✔️ Fehlerdatei: {output_failure}")
-    print(f"✔️ Interaktive Karte (Kosten): interaktive_karte_kosten.html")
-    print(f"✔️ Interaktive Karte (Übertragung): interaktive_karte_uebertragung.html")
-    print(f"✔️ Interaktive Karte (Leitung): interaktive_karte_leitung.html")
+    print(f"✔️ Aggregationswürfel: {output_cube}")
+    for (choropleth_col, _, _), path in zip(MAP_SPECS, written):
+        print(f"✔️ Interaktive Karte ({choropleth_col}): {path}")
 
 # Zeitmessung, Ausführung der Hauptfunktion und Eingabe Dateipfad
 if __name__ == "__main__":
     start = time.time()
-    geocode_and_map("Bsp.: /Users/user/PycharmProjects/PythonProject/geokodiert_zugestimmt.xlsx")
+    # run_report: maschinenlesbarer Laufbericht (profile=True / trace_memory=True für cProfile und Speicherspitzen)
+    geocode_and_map("Bsp.: /Users/user/PycharmProjects/PythonProject/geokodiert_zugestimmt.xlsx",
+                    run_report="laufbericht.json")
     end = time.time()
     mins, secs = divmod(int(end - start), 60)
     print(f"⏱️ Laufzeit: {mins:02d}:{secs:02d} Minuten:Sekunden")
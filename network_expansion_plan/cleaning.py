@@ -0,0 +1,91 @@
+# Bereinigung von Tabellenwerten (ungültige Angaben, Zahlen mit Dezimalkomma)
+# Die Spaltenfunktionen arbeiten vektorisiert und prüfen jeden eindeutigen Wert nur einmal.
+import numpy as np
+import pandas as pd
+
+# Platzhalter, die als fehlende Angabe gelten (Vergleich nach strip() und lower())
+INVALID_VALUES = ['', 'nan', 'k.a.', 'k.a', 'ka', 'none']
+
+
+# Prüft, ob ein Wert ungültig ist (leer, "k.A.", etc.)
+def is_invalid(value):
+    if pd.isna(value):
+        return True
+    value = str(value).strip().lower()
+    return value in INVALID_VALUES
+
+
+# Konvertiert Werte zu Float und behandelt ungültige Einträge
+def to_number(val):
+    try:
+        if is_invalid(val):
+            return 0.0
+        return float(str(val).replace(',', '.'))
+    except Exception:
+        return 0.0
+
+
+# Maske der ungültigen Einträge einer Spalte
+def invalid_mask(series):
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return series.isna()
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    unique_text = pd.Series(uniques, dtype=object).astype(str).str.strip().str.lower()
+    unique_invalid = unique_text.isin(INVALID_VALUES).to_numpy()
+    mask = np.ones(len(series), dtype=bool)
+    valid_codes = codes >= 0
+    mask[valid_codes] = unique_invalid[codes[valid_codes]]
+    return pd.Series(mask, index=series.index)
+
+
+# Masken der ungültigen Einträge für mehrere Spalten (fehlende Spalten gelten als ungültig)
+def invalid_frame(df, columns):
+    return pd.DataFrame(
+        {col: invalid_mask(df[col]) if col in df.columns else pd.Series(True, index=df.index) for col in columns},
+        index=df.index
+    )
+
+
+# Wandelt eine Spalte mit deutschen Dezimalkommas in float um
+# Liefert die Werte (ungültige/unlesbare Einträge = fill_value) sowie die Masken der Platzhalter
+# und der nicht lesbaren Einträge
+def to_numeric_de(series, fill_value=0.0):
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        values = series.astype('float64')
+        invalid = values.isna()
+        return values.fillna(fill_value), invalid, pd.Series(False, index=series.index)
+    invalid = invalid_mask(series)
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    unique_text = pd.Series(uniques, dtype=object).astype(str).str.strip().str.replace(',', '.', regex=False)
+    unique_values = pd.to_numeric(unique_text, errors='coerce').to_numpy(dtype='float64')
+    values = np.full(len(series), np.nan)
+    valid_codes = codes >= 0
+    values[valid_codes] = unique_values[codes[valid_codes]]
+    values = pd.Series(values, index=series.index)
+    values[invalid] = np.nan
+    unparsable = values.isna() & ~invalid
+    return values.fillna(fill_value), invalid, unparsable
+
+
+# Bereinigt die Kennzahl-Spalten und protokolliert je Spalte die umgewandelten Werte
+# Bericht: eine Zeile je Spalte, Rohwert und Grund ("ungültig" oder "nicht lesbar") mit Anzahl
+def clean_numeric_columns(df, columns, fill_value=0.0):
+    df = df.copy()
+    report = []
+    for col in columns:
+        if col not in df.columns:
+            continue
+        raw = df[col]
+        values, invalid, unparsable = to_numeric_de(raw, fill_value)
+        for reason, mask in (("ungültig", invalid), ("nicht lesbar", unparsable)):
+            if mask.any():
+                counts = raw[mask].astype(str).value_counts(dropna=False)
+                report.extend((col, value, reason, int(count)) for value, count in counts.items())
+        df[col] = values
+    return df, pd.DataFrame(report, columns=['Spalte', 'Wert', 'Grund', 'Anzahl'])
+
+
+# Entfernt Leerzeichen (inkl. geschützter Leerzeichen) am Rand von Textwerten; fehlende Werte bleiben erhalten
+def strip_text(series):
+    text = series.astype(str).str.replace('\xa0', ' ', regex=False).str.strip()
+    return text.where(series.notna(), series)
@@ -0,0 +1,198 @@
+# Kommandozeile der Pipeline: python -m network_expansion_plan <Schritt> ...
+# Jeder Schritt liest die angegebenen Eingaben und schreibt nur in den Ausgabeordner (-o); "all" führt die
+# Schritte organize bis plots nacheinander im Speicher aus, "watch" wiederholt sie bei jeder Änderung der Eingaben.
+import argparse
+import os
+import time
+
+from .Foliumwebapp import MARKER_MODES
+from .pipeline import DEFAULT_SETTINGS, STEPS, run_pipeline, run_regions
+
+EXTRACTION_CACHE_DIR = "extraction_cache"
+CACHE_DIR_HELP = f"Extraktions-Cache (Standard: <output-dir>/{EXTRACTION_CACHE_DIR}, '' schaltet ihn ab)"
+
+
+def add_report_options(parser):
+    parser.add_argument('--run-report', help="Laufbericht als JSON (Endung .jsonl: anhängen)")
+    parser.add_argument('--profile', action='store_true', help="cProfile über den ganzen Lauf")
+    parser.add_argument('--trace-memory', action='store_true', help="Speicherspitze je Schritt (tracemalloc)")
+
+
+def add_geocode_options(parser):
+    group = parser.add_argument_group("Geokodierung")
+    group.add_argument('--geocode-cache', default=DEFAULT_SETTINGS.geocode_cache,
+                       help="SQLite-Cache der Geokodierung ('' schaltet ihn ab)")
+    group.add_argument('--gazetteer', help="Ortsverzeichnis (CSV: name;bundesland;latitude;longitude)")
+    group.add_argument('--offline', action='store_true', help="ohne Netzwerk (Ortsverzeichnis und Bundesländer)")
+    group.add_argument('--nominatim-domain', help="eigene Nominatim-Instanz (z.B. localhost:8080)")
+    group.add_argument('--min-delay', type=float, default=DEFAULT_SETTINGS.min_delay_seconds,
+                       help="Mindestabstand zwischen Nominatim-Anfragen in Sekunden")
+    group.add_argument('--geocode-workers', type=int, default=DEFAULT_SETTINGS.max_workers,
+                       help="parallele Geokodierungsanfragen")
+
+
+def add_ingest_options(parser):
+    parser.add_argument('--ingest-workers', type=int,
+                        help="Prozesse zum Einlesen mehrerer Eingabetabellen (Standard: alle Kerne)")
+
+
+def add_boundary_options(parser):
+    parser.add_argument('--geojson', default=DEFAULT_SETTINGS.bundesland_geojson, help="Bundesland-Grenzen")
+    parser.add_argument('--simplify-tolerance', type=float, default=DEFAULT_SETTINGS.simplify_tolerance)
+
+
+def add_map_options(parser):
+    parser.add_argument('--marker-mode', choices=MARKER_MODES, default=DEFAULT_SETTINGS.marker_mode,
+                        help="clustered: Maßnahmen am selben Punkt zusammenfassen, Cluster vorberechnen")
+    parser.add_argument('--site', dest='site_dir', metavar='DIR',
+                        help="zusätzlich statische Kartenseite mit nachgeladenen VNB-Layern (z.B. für GitHub Pages)")
+
+
+def add_plot_options(parser):
+    parser.add_argument('--plot-workers', type=int, default=DEFAULT_SETTINGS.plot_workers,
+                        help="Prozesse für die Diagramme (Standard: alle Kerne)")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m network_expansion_plan",
+        description="Netzausbaupläne: PDF-Extraktion, Geokodierung, Prüfung, Karten und Diagramme"
+    )
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    extract = subparsers.add_parser('extract', help="Tabellen aus allen PDFs eines Ordners extrahieren")
+    extract.add_argument('input_dir', help="Ordner mit PDF-Dateien")
+    extract.add_argument('-o', '--output-dir', required=True)
+    extract.add_argument('--temp-dir', help="Ordner für OCR-CSV-Dateien (Standard: <output-dir>/temp)")
+    extract.add_argument('--workers', type=int, help="Prozesse (Standard: alle Kerne)")
+    extract.add_argument('--cache-dir', help=CACHE_DIR_HELP)
+    extract.add_argument('--flavor', choices=["lattice", "stream"], help="Camelot-Modus (Standard: lattice)")
+    extract.add_argument('--lang', help="Tesseract-Sprache (Standard: deu)")
+    extract.add_argument('--dpi', type=int, help="Auflösung für OCR (Standard: 200)")
+    add_report_options(extract)
+
+    descriptions = {
+        'organize': "Tabelle nach VNB und Teilnetzgebiet sortieren",
+        'geocode': "Koordinaten ergänzen",
+        'validate': "Koordinaten gegen die Bundesland-Angabe prüfen (geokodierte Tabelle)",
+        'map': "Interaktive Karten und VNB-CSV-Dateien erzeugen (geprüfte Tabelle)",
+        'plots': "Diagramme und Dashboard erzeugen (geprüfte Tabelle)",
+    }
+    for step in STEPS:
+        sub = subparsers.add_parser(step, help=descriptions[step])
+        sub.add_argument('inputs', nargs='+',
+                         help="Eingabetabellen (Excel, CSV oder Parquet), Ordner oder Glob-Muster; werden zusammengeführt")
+        sub.add_argument('-o', '--output-dir', required=True)
+        add_ingest_options(sub)
+        if step == 'geocode':
+            add_boundary_options(sub)
+            add_geocode_options(sub)
+        elif step in ('validate', 'map'):
+            add_boundary_options(sub)
+        if step == 'map':
+            add_map_options(sub)
+        if step == 'plots':
+            add_plot_options(sub)
+        add_report_options(sub)
+
+    run_all = subparsers.add_parser('all', help="organize, geocode, validate, map und plots nacheinander")
+    run_all.add_argument('inputs', nargs='+',
+                         help="Eingabetabellen oder Ordner/Glob-Muster (je Angabe eine Region, siehe --merge)")
+    run_all.add_argument('-o', '--output-dir', required=True)
+    run_all.add_argument('--merge', action='store_true', help="alle Eingaben als eine Tabelle verarbeiten")
+    run_all.add_argument('--steps', nargs='+', choices=STEPS, default=STEPS, help="nur diese Schritte")
+    run_all.add_argument('--workers', type=int, help="parallel verarbeitete Regionen (Standard: alle Kerne)")
+    add_ingest_options(run_all)
+    add_boundary_options(run_all)
+    add_geocode_options(run_all)
+    add_map_options(run_all)
+    add_plot_options(run_all)
+    add_report_options(run_all)
+
+    watch = subparsers.add_parser('watch',
+                                  help="Dienstmodus: Eingaben beobachten und betroffene Schritte neu ausführen")
+    watch.add_argument('inputs', nargs='*', help="Eingabetabellen, Ordner oder Glob-Muster; werden zusammengeführt")
+    watch.add_argument('-o', '--output-dir', required=True)
+    watch.add_argument('--pdf-dir', help="Ordner mit PDF-Dateien (Extraktion nach <output-dir>/extrahiert)")
+    watch.add_argument('--interval', type=float, default=2.0, help="Sekunden zwischen zwei Prüfungen der Eingaben")
+    watch.add_argument('--debounce', type=float, default=5.0,
+                       help="Sekunden ohne weitere Änderung, bevor ein Lauf startet")
+    watch.add_argument('--max-delay', type=float, default=60.0,
+                       help="spätester Start eines Laufs nach der ersten Änderung in Sekunden")
+    watch.add_argument('--extract-workers', type=int, help="Prozesse der PDF-Extraktion (Standard: alle Kerne)")
+    watch.add_argument('--cache-dir', help=CACHE_DIR_HELP)
+    add_ingest_options(watch)
+    add_boundary_options(watch)
+    add_geocode_options(watch)
+    add_map_options(watch)
+    add_plot_options(watch)
+    add_report_options(watch)
+    return parser
+
+
+# Extraktions-Cache im Ausgabeordner, sofern nicht anders angegeben; '' schaltet ihn ab (None)
+def extraction_cache_dir(args):
+    if args.cache_dir is None:
+        return os.path.join(args.output_dir, EXTRACTION_CACHE_DIR)
+    return args.cache_dir or None
+
+
+# Einstellungen der Pipeline aus den (je Unterbefehl vorhandenen) Argumenten
+def settings_from_args(args):
+    options = {
+        'bundesland_geojson': getattr(args, 'geojson', None),
+        'geocode_cache': getattr(args, 'geocode_cache', None),
+        'gazetteer': getattr(args, 'gazetteer', None),
+        'offline': getattr(args, 'offline', None),
+        'nominatim_domain': getattr(args, 'nominatim_domain', None),
+        'min_delay_seconds': getattr(args, 'min_delay', None),
+        'max_workers': getattr(args, 'geocode_workers', None),
+        'simplify_tolerance': getattr(args, 'simplify_tolerance', None),
+        'marker_mode': getattr(args, 'marker_mode', None),
+        'plot_workers': getattr(args, 'plot_workers', None),
+        'ingest_workers': getattr(args, 'ingest_workers', None),
+        'site_dir': getattr(args, 'site_dir', None),
+    }
+    settings = DEFAULT_SETTINGS._replace(**{k: v for k, v in options.items() if v is not None})
+    return settings._replace(geocode_cache=settings.geocode_cache or None)
+
+
+def report_options(args):
+    return {'run_report': args.run_report, 'profile': args.profile, 'trace_memory': args.trace_memory}
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    start = time.time()
+    if args.command == 'extract':
+        # camelot, pdf2image und pytesseract werden nur für die Extraktion gebraucht
+        from .extraction import DEFAULT_SETTINGS as DEFAULT_EXTRACTION_SETTINGS
+        from .pdfconvert import convert_pdfs
+        options = {'flavor': args.flavor, 'lang': args.lang, 'dpi': args.dpi}
+        settings = DEFAULT_EXTRACTION_SETTINGS._replace(**{k: v for k, v in options.items() if v is not None})
+        convert_pdfs(args.input_dir, args.output_dir, args.temp_dir or os.path.join(args.output_dir, "temp"),
+                     max_workers=args.workers, settings=settings, cache_dir=extraction_cache_dir(args),
+                     **report_options(args))
+        written = []
+    elif args.command == 'watch':
+        from .watch import watch
+        if not args.inputs and not args.pdf_dir:
+            raise SystemExit("❌ Eingabetabellen oder --pdf-dir angeben")
+        watch(args.inputs, args.output_dir, args.pdf_dir, settings_from_args(args), args.interval, args.debounce,
+              args.max_delay, args.extract_workers, extraction_cache_dir(args), **report_options(args))
+        written = []
+    elif args.command == 'all' and len(args.inputs) > 1 and not args.merge:
+        results = run_regions(args.inputs, args.output_dir, args.steps, settings_from_args(args), args.workers,
+                              args.run_report)
+        written = [path for paths in results.values() for path in paths]
+    else:
+        steps = args.steps if args.command == 'all' else [args.command]
+        written = run_pipeline(args.inputs, args.output_dir, steps, settings_from_args(args), **report_options(args))
+    for path in written:
+        print(f"✔️ {path}")
+    mins, secs = divmod(int(time.time() - start), 60)
+    print(f"⏱️ Laufzeit: {mins:02d}:{secs:02d} Minuten:Sekunden")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+# Serverseitige Vorverdichtung der Marker (marker_mode="clustered")
+# Maßnahmen eines VNB am selben bzw. fast selben Punkt werden zu einem Marker mit gemeinsamer Popup-Tabelle
+# zusammengefasst; die Cluster je Zoomstufe werden vorab über ein Raster in Pixelkoordinaten berechnet. Der Browser
+# zeigt je Zoomstufe nur noch die fertigen Cluster bzw. Marker an, statt jede Maßnahme anzulegen und zu clustern.
+import html
+
+import numpy as np
+import pandas as pd
+from branca.element import MacroElement
+from folium.template import Template
+
+from .popups import popup_values, render_popups
+from .store import group_ranges
+
+# Nachkommastellen, auf die die Koordinaten für die Zusammenfassung gerundet werden (4: ca. 11 m)
+DEDUP_PRECISION = 4
+# Clusterradius in Pixeln und Zoomstufe, ab der nicht mehr geclustert wird (wie build_marker_cluster)
+CLUSTER_RADIUS_PX = 120
+DISABLE_CLUSTERING_AT_ZOOM = 12
+TILE_SIZE = 256
+# Spalten, die bei mehreren Maßnahmen am selben Punkt nur einmal über der Tabelle stehen
+SHARED_POPUP_COLUMNS = ['VNB-Name', 'latitude', 'longitude']
+
+# Zeichnet die vorberechneten Cluster der aktuellen Zoomstufe; wird einmal je Karte eingebunden
+PRE_CLUSTER_SCRIPT = """
+<style>
+.vnb-cluster div { border-radius: 50%; border: 2px solid white; color: white; text-align: center;
+    font: bold 12px sans-serif; opacity: 0.85; box-shadow: 0 0 3px rgba(0, 0, 0, 0.5); }
+.vnb-popup-table { border-collapse: collapse; font-size: 11px; }
+.vnb-popup-table th, .vnb-popup-table td { border-bottom: 1px solid #ddd; padding: 2px 4px; text-align: left; }
+</style>
+<script>
+var preClustered = {
+    attach: function(group, map, data, color) {
+        var render = function() {
+            group.clearLayers();
+            var zoom = Math.round(map.getZoom());
+            var level = data.levels[zoom];
+            var points = level ? level.points : data.points.map(function(point, i) { return i; });
+            if (level) {
+                level.clusters.forEach(function(cluster) {
+                    group.addLayer(preClustered.cluster(cluster, color, map, zoom));
+                });
+            }
+            points.forEach(function(i) {
+                group.addLayer(preClustered.point(data.points[i], color));
+            });
+        };
+        group.on('add', render);
+        map.on('zoomend', function() {
+            if (map.hasLayer(group)) {
+                render();
+            }
+        });
+    },
+    point: function(point, color) {
+        return L.circleMarker([point[0], point[1]], {
+            radius: point[2] > 1 ? 9 : 7, color: color, fill: true, fillColor: color, fillOpacity: 0.8
+        }).bindPopup(point[3], {maxWidth: 600}).bindTooltip(point[4]);
+    },
+    cluster: function(cluster, color, map, zoom) {
+        var size = 26 + 6 * Math.floor(Math.log10(cluster[2]));
+        var marker = L.marker([cluster[0], cluster[1]], {
+            icon: L.divIcon({
+                className: 'vnb-cluster',
+                iconSize: [size, size],
+                html: '<div style="background:' + color + ';width:' + size + 'px;height:' + size +
+                    'px;line-height:' + size + 'px">' + cluster[2] + '</div>'
+            })
+        });
+        marker.on('click', function() {
+            map.setView(marker.getLatLng(), zoom + 2);
+        });
+        return marker;
+    }
+};
+</script>
+"""
+
+
+# Gemeinsames Popup mehrerer Maßnahmen am selben Punkt: gemeinsame Angaben oben, darunter eine Tabellenzeile
+# je Maßnahme (nur Spalten, die in mindestens einer Maßnahme gültig sind)
+# values: escapte Popup-Werte der Maßnahmen (siehe popups.popup_values, None für ungültige Einträge)
+def combined_popup(values, columns):
+    shared = [col for col in SHARED_POPUP_COLUMNS if col in columns]
+    present = np.not_equal(values, None)
+    shown = [i for i, col in enumerate(columns) if col not in shared and present[:, i].any()]
+    header = [f"<b>{len(values)} Maßnahmen</b>"] + [
+        f"<b>{html.escape(col)}:</b> {values[0, columns.index(col)]}"
+        for col in shared if present[0, columns.index(col)]
+    ]
+    head = "".join(f"<th>{html.escape(columns[i])}</th>" for i in shown)
+    body = "".join(
+        "<tr>" + "".join(f"<td>{'' if row[i] is None else row[i]}</td>" for i in shown) + "</tr>"
+        for row in values
+    )
+    return "<br>".join(header) + f'<table class="vnb-popup-table"><tr>{head}</tr>{body}</table>'
+
+
+# Fasst die Maßnahmen eines VNB mit gleichen gerundeten Koordinaten zusammen (ohne Maßnahmen ohne Ort / Trasse)
+# Liefert je Punkt [Breite, Länge, Anzahl, Popup, Tooltip] in der Reihenfolge des ersten Auftretens
+def colocated_points(vnb_rows, vnb_invalid, precision=DEDUP_PRECISION):
+    columns = list(vnb_invalid.columns)
+    ort = columns.index('Ort / Trasse')
+    lat = pd.to_numeric(vnb_rows['latitude'], errors='coerce').to_numpy(dtype='float64')
+    lon = pd.to_numeric(vnb_rows['longitude'], errors='coerce').to_numpy(dtype='float64')
+    keep = ~vnb_invalid['Ort / Trasse'].to_numpy() & np.isfinite(lat) & np.isfinite(lon)
+    scale = 10 ** precision
+    keys = np.round(lat[keep] * scale).astype(np.int64) * (400 * scale) + np.round(lon[keep] * scale).astype(np.int64)
+    ranges = group_ranges(pd.Series(keys))
+    # Escapte Werte und Einzel-Popups einmalig für alle Maßnahmen (siehe popups.py)
+    values = popup_values(vnb_rows.loc[keep], vnb_invalid.loc[keep], columns)
+    popups = render_popups(values, columns)
+    lat, lon = lat[keep], lon[keep]
+    points = []
+    for start, stop in zip(ranges.starts, ranges.stops):
+        # Der stabile Sortierindex lässt die Maßnahmen eines Punkts in ihrer Reihenfolge
+        members = ranges.order[start:stop]
+        if len(members) == 1:
+            popup = popups[members[0]]
+            tooltip = values[members[0], ort]
+        else:
+            member_values = values[members]
+            orte = set(member_values[:, ort])
+            popup = combined_popup(member_values, columns)
+            tooltip = f"{orte.pop()} ({len(members)} Maßnahmen)" if len(orte) == 1 else f"{len(members)} Maßnahmen"
+        points.append([float(lat[members].mean()), float(lon[members].mean()), len(members), popup, tooltip])
+    return points
+
+
+# Cluster je Zoomstufe über ein Raster mit Zellen von radius Pixeln (Web-Mercator)
+# Liefert {Zoomstufe: {'clusters': [[Breite, Länge, Anzahl], ...], 'points': [Index einzeln stehender Punkte]}};
+# Zellen mit nur einem Punkt zeigen den Punkt selbst, ab max_zoom + 1 werden alle Punkte einzeln gezeigt
+def zoom_levels(points, max_zoom=DISABLE_CLUSTERING_AT_ZOOM - 1, radius=CLUSTER_RADIUS_PX):
+    if not points:
+        return {}
+    lat = np.array([point[0] for point in points])
+    lon = np.array([point[1] for point in points])
+    counts = np.array([point[2] for point in points], dtype='float64')
+    x = (lon + 180) / 360
+    sin_lat = np.clip(np.sin(np.radians(lat)), -0.9999, 0.9999)
+    y = 0.5 - np.log((1 + sin_lat) / (1 - sin_lat)) / (4 * np.pi)
+    levels = {}
+    for zoom in range(max_zoom + 1):
+        cells = TILE_SIZE * 2 ** zoom / radius
+        cell_x = np.floor(x * cells).astype(np.int64)
+        cell_y = np.floor(y * cells).astype(np.int64)
+        codes, _ = pd.factorize(cell_x * (int(cells) + 1) + cell_y)
+        members = np.bincount(codes)
+        total = np.bincount(codes, weights=counts)
+        cluster_lat = np.bincount(codes, weights=lat * counts) / total
+        cluster_lon = np.bincount(codes, weights=lon * counts) / total
+        grouped = np.flatnonzero(members > 1)
+        levels[zoom] = {
+            'clusters': [[round(float(cluster_lat[c]), 6), round(float(cluster_lon[c]), 6), int(total[c])]
+                         for c in grouped],
+            'points': np.flatnonzero(members[codes] == 1).tolist(),
+        }
+    return levels
+
+
+# Vorverdichtete Marker eines VNB; wird in dessen FeatureGroup eingehängt und zeichnet sich beim Einblenden
+# und bei jedem Zoomwechsel aus den vorberechneten Daten (setzt PRE_CLUSTER_SCRIPT in der Karte voraus)
+class PreClusteredMarkers(MacroElement):
+    _template = Template(
+        """
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = L.layerGroup().addTo({{ this._parent.get_name() }});
+            preClustered.attach({{ this.get_name() }}, {{ this._parent._parent.get_name() }},
+                {{ this.data|tojson }}, {{ this.color|tojson }});
+        {% endmacro %}
+        """
+    )
+
+    def __init__(self, vnb_rows, vnb_invalid, color, precision=DEDUP_PRECISION):
+        super().__init__()
+        self._name = "PreClusteredMarkers"
+        points = colocated_points(vnb_rows, vnb_invalid, precision)
+        self.data = {'points': points, 'levels': zoom_levels(points)}
+        self.color = color
+
@@ -0,0 +1,104 @@
+# Aggregationswürfel: Summe, Anzahl der Maßnahmen und Anzahl der Angaben je Kennzahl über alle
+# Auswertungsdimensionen. Er wird in einem Durchlauf gebildet und gespeichert; Diagramme, Tabellen und
+# Choroplethen lesen danach nur noch Ausschnitte daraus statt die Rohdaten erneut zu gruppieren.
+import os
+
+import pandas as pd
+
+from .cleaning import to_numeric_de
+from .incremental import vnb_keys
+from .store import read_table, table_path, write_table
+
+METRICS = ['Leitungslänge in km', 'Übertragungskapazität in MVA', 'Kosten in Mio.€']
+DIMENSIONS = ['VNB-Name', 'Bundesland', 'Zeithorizont', 'Netzebene', 'Projektstatus']
+CUBE_COLUMNS = DIMENSIONS + ['Kennzahl', 'Summe', 'Anzahl', 'Angaben']
+VALUE_DTYPES = {'Summe': 'float64', 'Anzahl': 'int64', 'Angaben': 'int64'}
+
+
+# Langes Format: eine Zeile je Dimensionskombination und Kennzahl
+# Als Angabe zählt ein Wert ungleich 0 (ungültige Einträge wie 'k.A.' sind nach der Bereinigung 0)
+def build_cube(df, metrics=METRICS, dimensions=DIMENSIONS):
+    data = {
+        dim: df[dim] if dim in df.columns else pd.Series(None, index=df.index, dtype='category')
+        for dim in dimensions
+    }
+    for metric in metrics:
+        if metric in df.columns:
+            values, _, _ = to_numeric_de(df[metric])
+        else:
+            values = pd.Series(0.0, index=df.index)
+        data[(metric, 'Summe')] = values
+        data[(metric, 'Angaben')] = (values != 0).astype('int64')
+    data['Anzahl'] = pd.Series(1, index=df.index, dtype='int64')
+    grouped = pd.DataFrame(data, index=df.index).groupby(list(dimensions), dropna=False, sort=True, observed=True).sum()
+    parts = []
+    for metric in metrics:
+        part = pd.DataFrame({
+            'Kennzahl': metric,
+            'Summe': grouped[(metric, 'Summe')],
+            'Anzahl': grouped['Anzahl'],
+            'Angaben': grouped[(metric, 'Angaben')],
+        })
+        parts.append(part)
+    if not parts:
+        return empty_cube()
+    return pd.concat(parts).reset_index()[CUBE_COLUMNS]
+
+
+# Leerer Würfel mit denselben Datentypen wie ein gefüllter (Kategorien, float64-Summe, int64-Anzahlen)
+def empty_cube():
+    columns = {dim: pd.Series(dtype='category') for dim in DIMENSIONS}
+    columns['Kennzahl'] = pd.Series(dtype='str')
+    columns.update({col: pd.Series(dtype=dtype) for col, dtype in VALUE_DTYPES.items()})
+    return pd.DataFrame(columns)
+
+
+# Ausschnitt des Würfels: Werte (Summe, Anzahl oder Angaben) je Ausprägung von by, eine Spalte je Kennzahl
+# Ohne by eine Serie mit den Gesamtwerten je Kennzahl. Fehlende Ausprägungen (NaN) entfallen wie bei groupby.
+def slice_cube(cube, by=(), metrics=METRICS, value='Summe'):
+    by = [by] if isinstance(by, str) else list(by)
+    metrics = list(metrics)
+    part = cube[cube['Kennzahl'].isin(metrics)]
+    if not by:
+        return part.groupby('Kennzahl', sort=False)[value].sum().reindex(metrics, fill_value=0)
+    if part.empty:
+        columns = {col: part[col] for col in by}
+        columns.update({metric: part[value] for metric in metrics})
+        return pd.DataFrame(columns).reset_index(drop=True)
+    table = part.groupby(by + ['Kennzahl'], sort=True, observed=True)[value].sum().unstack('Kennzahl')
+    table = table.reindex(columns=metrics).fillna(0).reset_index()
+    table.columns.name = None
+    return table
+
+
+# Anteil der Maßnahmen mit Angabe in Prozent (je Ausprägung von by bzw. gesamt)
+def coverage(cube, by=(), metrics=METRICS):
+    stated = slice_cube(cube, by, metrics, value='Angaben')
+    total = slice_cube(cube, by, metrics, value='Anzahl')
+    if isinstance(stated, pd.Series):
+        return (100 * stated / total.where(total > 0)).fillna(0)
+    stated[metrics] = (100 * stated[metrics] / total[metrics].where(total[metrics] > 0)).fillna(0)
+    return stated
+
+
+# Ersetzt die Zeilen der angegebenen VNB durch einen neu berechneten Teilwürfel
+# Leere Teile entfallen vor dem Zusammenfügen, die Wertespalten behalten die Datentypen des Würfels
+def patch_cube(previous, new, vnbs):
+    keep = previous[~vnb_keys(previous).isin(vnbs)]
+    parts = [part for part in (keep, new) if not part.empty]
+    if not parts:
+        return empty_cube()
+    cube = pd.concat(parts, ignore_index=True)[CUBE_COLUMNS]
+    return cube.astype(VALUE_DTYPES)
+
+
+# Liefert den Würfel einer Tabelle; er wird neben der Tabelle gespeichert (<name>.cube.parquet) und neu
+# gebildet, sobald die Tabelle (Excel oder Parquet-Kopie) jünger ist
+def load_or_build_cube(source_path, cube_path=None):
+    cube_path = cube_path or table_path(source_path, ".cube.parquet")
+    sources = [p for p in (source_path, table_path(source_path)) if os.path.exists(p)]
+    if os.path.exists(cube_path) and all(os.path.getmtime(cube_path) >= os.path.getmtime(p) for p in sources):
+        return read_table(cube_path)
+    cube = build_cube(read_table(source_path))
+    write_table(cube, cube_path)
+    return cube
@@ -0,0 +1,163 @@
+# Inhaltsadressierter Cache für PDF-Extraktionen (Tabellen und OCR-Text je Seite)
+# Schlüssel: SHA-256 des PDF-Inhalts und der Extraktionseinstellungen; ein umbenannter Ordner oder eine
+# kopierte Datei trifft also denselben Eintrag, eine geänderte PDF oder Einstellung einen neuen.
+import hashlib
+import json
+import os
+import shutil
+
+import camelot
+import pandas as pd
+
+from .ocrtable import WORD_COLUMNS, WORD_DTYPES
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# Verzeichnis je Eintrag: <directory>/<2 Zeichen>/<pdf-hash>-<einstellungs-hash>/ mit meta.json (Seitenzahl),
+# je Seite p0001.tables.json (Spalten je Tabelle) mit p0001.tables.0.parquet, ... (eine Datei je Tabelle) bzw.
+# p0001.ocr.json (Wortboxen). Kein pickle: ein Eintrag wird nur als Daten gelesen, nie als Python-Objekt.
+class ExtractionCache:
+    def __init__(self, directory="extraction_cache", max_bytes=2 * 1024 ** 3):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def key(self, pdf_path, settings):
+        settings = dict(settings._asdict(), camelot=getattr(camelot, '__version__', ''))
+        settings_hash = hashlib.sha256(json.dumps(settings, sort_keys=True).encode('utf-8')).hexdigest()
+        return f"{file_sha256(pdf_path)}-{settings_hash[:16]}"
+
+    def _entry(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    @staticmethod
+    def _page_file(method, page):
+        return f"p{page:04d}.{method}.json"
+
+    @staticmethod
+    def _table_file(page, index):
+        return f"p{page:04d}.tables.{index}.parquet"
+
+    # Schreibt atomar, damit ein abgebrochener Lauf keine halben Dateien hinterlässt
+    def _write(self, key, name, write):
+        entry = self._entry(key)
+        os.makedirs(entry, exist_ok=True)
+        path = os.path.join(entry, name)
+        tmp_path = f"{path}.tmp"
+        write(tmp_path)
+        os.replace(tmp_path, path)
+
+    def get_page_count(self, key):
+        try:
+            with open(os.path.join(self._entry(key), 'meta.json'), encoding='utf-8') as f:
+                return json.load(f)['pages']
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def set_page_count(self, key, pages):
+        def write(path):
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({'pages': pages}, f)
+        self._write(key, 'meta.json', write)
+
+    # Liefert (gefunden, Ergebnis) einer Seite; ein Treffer markiert den Eintrag als zuletzt benutzt
+    # Ein unlesbarer Eintrag (abgebrochen, andere Version) zählt als Fehlschlag und wird gelöscht
+    def get(self, key, method, page):
+        entry = self._entry(key)
+        path = os.path.join(entry, self._page_file(method, page))
+        if not os.path.exists(path):
+            self.misses += 1
+            return False, None
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+            if method == 'tables':
+                value = [self._read_table(entry, page, index, columns) for index, columns in enumerate(data)]
+            else:
+                value = pd.DataFrame(data, columns=WORD_COLUMNS).astype(WORD_DTYPES)
+        except Exception:
+            self._remove_page(entry, method, page)
+            self.misses += 1
+            return False, None
+        os.utime(entry)
+        self.hits += 1
+        return True, value
+
+    def _read_table(self, entry, page, index, columns):
+        table = pd.read_parquet(os.path.join(entry, self._table_file(page, index)))
+        if len(table.columns) != len(columns):
+            raise ValueError(f"Spaltenzahl von Tabelle {index} passt nicht")
+        table.columns = columns
+        return table
+
+    def _remove_page(self, entry, method, page):
+        prefix = f"p{page:04d}.{method}."
+        for file in os.listdir(entry):
+            if file.startswith(prefix):
+                os.remove(os.path.join(entry, file))
+
+    # OCR-Fehler (None) werden nicht gespeichert, damit die Seite beim nächsten Lauf erneut versucht wird
+    # Die JSON-Datei der Seite wird zuletzt geschrieben, damit ein Eintrag erst mit allen Tabellen gilt
+    def set(self, key, method, page, value):
+        if value is None:
+            return
+        if method == 'tables':
+            for index, table in enumerate(value):
+                self._write(key, self._table_file(page, index), self._table_writer(table))
+            data = [list(table.columns) for table in value]
+        else:
+            data = value[WORD_COLUMNS].to_dict('list')
+
+        def write(path):
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+        self._write(key, self._page_file(method, page), write)
+
+    # Parquet verlangt Spaltennamen als Text; die ursprünglichen Namen stehen in der JSON-Datei der Seite
+    @staticmethod
+    def _table_writer(table):
+        def write(path):
+            table.set_axis([str(col) for col in table.columns], axis=1).to_parquet(path, index=False)
+        return write
+
+    # Entfernt die am längsten unbenutzten Einträge, bis der Cache höchstens max_bytes groß ist
+    def evict(self):
+        if not self.max_bytes:
+            return
+        entries = []
+        for bucket in os.scandir(self.directory):
+            if not bucket.is_dir():
+                continue
+            for entry in os.scandir(bucket.path):
+                if entry.is_dir():
+                    size = sum(f.stat().st_size for f in os.scandir(entry.path) if f.is_file())
+                    entries.append((entry.stat().st_mtime, size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            try:
+                os.rmdir(os.path.dirname(path))
+            except OSError:
+                pass
+
+    def close(self):
+        self.evict()
+
@@ -0,0 +1,232 @@
+# Parallele PDF-Extraktion: Tabellen (camelot) und OCR-Rückfall (tesseract) seitenweise im Prozesspool
+import os
+from collections import deque, namedtuple
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+
+import camelot
+import pandas as pd
+import pytesseract
+from pdf2image import convert_from_path, pdfinfo_from_path
+
+from .ocrtable import page_words
+
+TESSDATA_DIR = '/usr/local/share/tessdata'  # typischer Ort nach brew install tesseract-lang
+
+# Einstellungen, die das Extraktionsergebnis bestimmen
+ExtractionSettings = namedtuple(
+    'ExtractionSettings', ['flavor', 'lang', 'tessdata_dir', 'psm', 'dpi'],
+    defaults=('lattice', 'deu', TESSDATA_DIR, 6, 200)
+)
+DEFAULT_SETTINGS = ExtractionSettings()
+
+# Ergebnis je PDF mit Tabellen (camelot, in Seitenreihenfolge) oder Fehler; cached: alle Seiten aus dem Cache
+ExtractionResult = namedtuple('ExtractionResult', ['pdf_path', 'method', 'tables', 'error', 'cached'],
+                              defaults=(False,))
+
+# OCR-Ergebnisse werden seitenweise und in Seitenreihenfolge geliefert (words: Wortboxen, None bei OCR-Fehler)
+# cached gilt für die letzte Seite (page == pages) für die gesamte PDF
+OcrPage = namedtuple('OcrPage', ['pdf_path', 'page', 'pages', 'words', 'cached'])
+
+
+def check_tessdata(settings=DEFAULT_SETTINGS):
+    lang_path = os.path.join(settings.tessdata_dir, f"{settings.lang}.traineddata")
+    if not os.path.exists(lang_path):
+        raise FileNotFoundError(
+            f"❌ Sprachdatei '{settings.lang}.traineddata' nicht gefunden unter {settings.tessdata_dir}.\n"
+            f"👉 Lade sie herunter von https://github.com/tesseract-ocr/tessdata und speichere sie dort."
+        )
+
+
+def page_count(pdf_path):
+    return int(pdfinfo_from_path(pdf_path)['Pages'])
+
+
+# Tabellen einer einzelnen Seite
+def extract_tables_page(pdf_path, page, settings=DEFAULT_SETTINGS):
+    tables = camelot.read_pdf(pdf_path, pages=str(page), flavor=settings.flavor)
+    return [table.df for table in tables]
+
+
+# Rastert nur die angefragte Seite (first_page/last_page) und liefert die erkannten Wortboxen; None bei OCR-Fehlern
+def ocr_page(pdf_path, page, settings=DEFAULT_SETTINGS):
+    images = convert_from_path(pdf_path, dpi=settings.dpi, first_page=page, last_page=page)
+    if not images:
+        return None
+    try:
+        config = f"--tessdata-dir {settings.tessdata_dir} --psm {settings.psm}"
+        return page_words(images[0], lang=settings.lang, config=config)
+    except pytesseract.TesseractError as ocr_err:
+        print(f"❌ OCR-Fehler auf Seite {page} ({os.path.basename(pdf_path)}): {ocr_err}")
+        return None
+    finally:
+        for image in images:
+            image.close()
+
+
+# Arbeitseinheit im Prozesspool: eine Seite einer PDF
+def run_unit(method, pdf_path, page, settings):
+    if method == 'tables':
+        return extract_tables_page(pdf_path, page, settings)
+    return ocr_page(pdf_path, page, settings)
+
+
+# Verteilt die Seiten aller PDFs auf einen Prozesspool. Eine große PDF blockiert so nicht den Lauf,
+# ihre Seiten werden auf alle Prozesse verteilt. Findet camelot in einer PDF keine Tabelle, werden
+# deren Seiten für die OCR vorgezogen eingeplant. Tabellen werden je PDF in Seitenreihenfolge zusammengesetzt
+# und geliefert, sobald eine PDF vollständig ist (nicht zwingend in Eingabereihenfolge); OCR-Seiten werden
+# einzeln in Seitenreihenfolge geliefert, sodass nur vorzeitig fertige Seiten zwischengespeichert werden.
+# Mit einem ExtractionCache werden bereits bekannte Seiten nicht erneut verarbeitet.
+class PageExtractor:
+    def __init__(self, settings=DEFAULT_SETTINGS, max_workers=None, max_pending=None, cache=None):
+        self.settings = settings
+        self.max_workers = max_workers or os.cpu_count() or 1
+        # Begrenzt die eingeplanten Seiten, damit fertige PDFs früh geliefert werden
+        self.max_pending = max_pending or 4 * self.max_workers
+        self.cache = cache
+
+    def _submit(self, executor, unit):
+        if executor is not None:
+            return executor.submit(run_unit, *unit)
+        # Ohne Pool (max_workers=1) direkt im eigenen Prozess ausführen
+        future = Future()
+        try:
+            future.set_result(run_unit(*unit))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def run(self, pdf_paths):
+        executor = ProcessPoolExecutor(max_workers=self.max_workers) if self.max_workers > 1 else None
+        try:
+            yield from self._run(executor, deque(pdf_paths))
+        finally:
+            if executor:
+                executor.shutdown(cancel_futures=True)
+
+    # Legt den Auftrag einer PDF an; die Seitenzahl kommt nach Möglichkeit aus dem Cache
+    def _start(self, pdf_path):
+        key = self.cache.key(pdf_path, self.settings) if self.cache is not None else None
+        n_pages = self.cache.get_page_count(key) if key else None
+        if n_pages is None:
+            n_pages = page_count(pdf_path)
+            if key:
+                self.cache.set_page_count(key, n_pages)
+        return {'method': 'tables', 'pages': n_pages, 'open': n_pages, 'results': {}, 'error': None,
+                'key': key, 'cached': True}
+
+    def _run(self, executor, files):
+        jobs = {}
+        urgent = deque()  # OCR-Seiten bereits begonnener PDFs
+        pages = deque()
+        running = {}
+        while True:
+            while len(running) < self.max_pending:
+                if urgent:
+                    unit = urgent.popleft()
+                elif pages:
+                    unit = pages.popleft()
+                elif files:
+                    pdf_path = files.popleft()
+                    try:
+                        job = self._start(pdf_path)
+                    except Exception as e:
+                        yield ExtractionResult(pdf_path, 'tables', [], e)
+                        continue
+                    if job['pages'] == 0:
+                        yield ExtractionResult(pdf_path, 'tables', [], None, job['cached'])
+                        continue
+                    jobs[pdf_path] = job
+                    pages.extend(('tables', pdf_path, page, self.settings) for page in range(1, job['pages'] + 1))
+                    continue
+                else:
+                    break
+                method, pdf_path, page, _ = unit
+                job = jobs[pdf_path]
+                if job['key']:
+                    found, value = self.cache.get(job['key'], method, page)
+                    if found:
+                        events, finished = self._record(pdf_path, job, page, value, None, urgent)
+                        if finished:
+                            del jobs[pdf_path]
+                        yield from events
+                        continue
+                job['cached'] = False
+                running[self._submit(executor, unit)] = unit
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                method, pdf_path, page, _ = running.pop(future)
+                job = jobs[pdf_path]
+                value, error = None, None
+                try:
+                    value = future.result()
+                    if job['key']:
+                        self.cache.set(job['key'], method, page, value)
+                except Exception as e:
+                    error = e
+                events, finished = self._record(pdf_path, job, page, value, error, urgent)
+                if finished:
+                    del jobs[pdf_path]
+                yield from events
+
+    # Speichert das Ergebnis einer Seite; liefert (Ergebnisse, PDF abgeschlossen)
+    def _record(self, pdf_path, job, page, value, error, urgent):
+        if job['method'] == 'ocr':
+            return self._record_ocr(pdf_path, job, page, value, error)
+        if error is not None:
+            job['error'] = job['error'] or error
+        else:
+            job['results'][page] = value
+        job['open'] -= 1
+        if job['open']:
+            return [], False
+        result = self._complete(pdf_path, job, urgent)
+        return ([result], True) if result is not None else ([], False)
+
+    # Gibt alle OCR-Seiten frei, die lückenlos an die zuletzt gelieferte Seite anschließen
+    def _record_ocr(self, pdf_path, job, page, value, error):
+        if error is not None:
+            print(f"❌ OCR-Fehler auf Seite {page} ({os.path.basename(pdf_path)}): {error}")
+        job['results'][page] = value if error is None else None
+        events = []
+        while job['next'] in job['results']:
+            events.append(OcrPage(pdf_path, job['next'], job['pages'], job['results'].pop(job['next']),
+                                  job['cached']))
+            job['next'] += 1
+        return events, job['next'] > job['pages']
+
+    # Setzt die Tabellen einer PDF zusammen oder plant die OCR ein (Rückgabe None)
+    def _complete(self, pdf_path, job, urgent):
+        if job['error'] is not None:
+            return ExtractionResult(pdf_path, 'tables', [], job['error'])
+        ordered = [job['results'][page] for page in sorted(job['results'])]
+        tables = [table for page_tables in ordered for table in page_tables]
+        if tables:
+            return ExtractionResult(pdf_path, 'tables', tables, None, job['cached'])
+        print(f"⚠️  Keine Tabellen gefunden. Versuche OCR für {os.path.basename(pdf_path)} …")
+        try:
+            check_tessdata(self.settings)
+        except FileNotFoundError as e:
+            return ExtractionResult(pdf_path, 'ocr', [], e)
+        job.update(method='ocr', results={}, next=1)
+        urgent.extend(('ocr', pdf_path, page, self.settings) for page in range(1, job['pages'] + 1))
+        return None
+
+
+# Führt die camelot-Tabellen einer PDF zusammen, behebt Kodierungsprobleme und sortiert nach VNB
+def tables_to_frame(tables):
+    combined_df = pd.concat(tables, ignore_index=True)
+
+    # Kodierungsprobleme beheben
+    for col in combined_df.columns:
+        combined_df[col] = combined_df[col].apply(
+            lambda x: x.encode('utf-8', errors='replace').decode('utf-8', errors='replace') if isinstance(x, str) else x
+        )
+
+    # Sortierung nach 'VNB-Name' und zweiter Spalte, falls vorhanden
+    if 'VNB-Name' in combined_df.columns and len(combined_df.columns) > 1:
+        zweite_spalte = combined_df.columns[1]
+        combined_df = combined_df.sort_values(by=['VNB-Name', zweite_spalte], kind='stable')
+    return combined_df
+
@@ -0,0 +1,181 @@
+# Persistenter Geokodierungs-Cache (SQLite) mit TTL und Verdrängung
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Normalisiert eine Suchanfrage, damit gleiche Orte denselben Schlüssel erhalten
+def normalize_query(query):
+    return " ".join(str(query).split()).casefold()
+
+
+# namespace trennt Ergebnisse verschiedener Geokodierer (z.B. offline vs. Nominatim) im selben Cache
+# Nicht gefundene Orte (address = None) gelten nur negative_ttl_days, damit sie bald erneut angefragt werden
+class GeocodeCache:
+    def __init__(self, path="geocode_cache.sqlite", ttl_days=180, max_entries=200_000, namespace="",
+                 negative_ttl_days=7):
+        self.path = path
+        self.namespace = namespace
+        self.ttl_seconds = ttl_days * 86400 if ttl_days else None
+        self.negative_ttl_seconds = negative_ttl_days * 86400 if negative_ttl_days else self.ttl_seconds
+        self.max_entries = max_entries
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS geocode (
+                key TEXT PRIMARY KEY,
+                query TEXT,
+                address TEXT,
+                latitude REAL,
+                longitude REAL,
+                created REAL,
+                last_used REAL
+            )
+            """
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_geocode_last_used ON geocode(last_used)")
+        self.conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, query):
+        key = normalize_query(query)
+        return f"{self.namespace}|{key}" if self.namespace else key
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # Liefert (address, latitude, longitude) für alle bekannten Anfragen; fehlende Anfragen fehlen im Ergebnis.
+    # Auch erfolglose Geokodierungen werden gespeichert (address = None), damit sie bis zum Ablauf von
+    # negative_ttl_days nicht erneut angefragt werden.
+    def get_many(self, queries):
+        # Mehrere Schreibweisen können auf denselben Schlüssel fallen; sie erhalten alle das gespeicherte Ergebnis
+        keys = {}
+        for q in queries:
+            keys.setdefault(self._key(q), []).append(q)
+        now = time.time()
+        found = {}
+        found_keys = []
+        key_list = list(keys)
+        for start in range(0, len(key_list), 500):
+            chunk = key_list[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT key, address, latitude, longitude, created FROM geocode WHERE key IN ({placeholders})",
+                chunk
+            ).fetchall()
+            for key, address, lat, lon, created in rows:
+                ttl_seconds = self.ttl_seconds if address is not None else self.negative_ttl_seconds
+                if ttl_seconds and now - created > ttl_seconds:
+                    continue
+                found_keys.append(key)
+                for q in keys[key]:
+                    found[q] = (address, lat, lon)
+        if found_keys:
+            self.conn.executemany(
+                "UPDATE geocode SET last_used = ? WHERE key = ?",
+                [(now, key) for key in found_keys]
+            )
+            self.conn.commit()
+        self.hits += len(found_keys)
+        self.misses += len(keys) - len(found_keys)
+        return found
+
+    def set_many(self, results):
+        now = time.time()
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO geocode VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (self._key(q), q, address, lat, lon, now, now)
+                for q, (address, lat, lon) in results.items()
+            ]
+        )
+        self.conn.commit()
+
+    # Entfernt abgelaufene Einträge und die am längsten unbenutzten Einträge oberhalb von max_entries
+    def evict(self):
+        now = time.time()
+        if self.ttl_seconds:
+            self.conn.execute("DELETE FROM geocode WHERE created < ?", (now - self.ttl_seconds,))
+        if self.negative_ttl_seconds:
+            self.conn.execute("DELETE FROM geocode WHERE address IS NULL AND created < ?",
+                              (now - self.negative_ttl_seconds,))
+        if self.max_entries:
+            self.conn.execute(
+                """
+                DELETE FROM geocode WHERE key IN (
+                    SELECT key FROM geocode ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,)
+            )
+        self.conn.commit()
+
+    def close(self):
+        self.evict()
+        self.conn.close()
+
+
+# Wandelt ein Geokodierungsergebnis (z.B. geopy Location) in (address, latitude, longitude) um
+def location_to_tuple(location):
+    if location is None:
+        return (None, None, None)
+    return (str(location.address), float(location.latitude), float(location.longitude))
+
+
+# Geokodiert eine Anfrage; liefert (Ergebnis, None) oder bei einem Fehler des Geokodierers (None, Fehler)
+def try_geocode(geocode, query):
+    try:
+        return geocode(query), None
+    except Exception as e:
+        return None, e
+
+
+# Geokodiert jede eindeutige Anfrage genau einmal, bevorzugt aus dem Cache
+# Anfragen mit demselben normalisierten Schlüssel (normalize_query) werden nur einmal geschickt und teilen das Ergebnis
+# Mit max_workers > 1 laufen die Anfragen parallel; das Ratenlimit des Geokodierers gilt dabei weiterhin
+# Anfragen, bei denen der Geokodierer einen Fehler meldet (z.B. Zeitüberschreitung), bleiben in diesem Lauf ohne
+# Ergebnis und werden nicht gespeichert, damit der nächste Lauf sie erneut versucht
+def resolve_queries(queries, geocode, cache=None, max_workers=1):
+    unique_queries = list(dict.fromkeys(queries))
+    representatives = {}
+    for q in unique_queries:
+        representatives.setdefault(normalize_query(q), q)
+    distinct = list(representatives.values())
+    results = cache.get_many(distinct) if cache is not None else {}
+    missing = [q for q in distinct if q not in results]
+    if missing:
+        print(f"🌍 Geokodiere {len(missing)} neue Orte ({len(distinct) - len(missing)} aus dem Cache) …")
+    executor = ThreadPoolExecutor(max_workers=max_workers) if max_workers > 1 else None
+    errors = {}
+    try:
+        # Zwischenstände blockweise sichern, damit ein Abbruch keine Anfragen kostet
+        batch_size = max(50, 10 * max_workers)
+        for start in range(0, len(missing), batch_size):
+            batch = missing[start:start + batch_size]
+            mapper = executor.map if executor else map
+            outcomes = mapper(try_geocode, [geocode] * len(batch), batch)
+            new_results = {}
+            for query, (location, error) in zip(batch, outcomes):
+                if error is not None:
+                    errors[query] = error
+                else:
+                    new_results[query] = location_to_tuple(location)
+            if cache is not None:
+                cache.set_many(new_results)
+            results.update(new_results)
+    finally:
+        if executor:
+            executor.shutdown()
+    if errors:
+        query, error = next(iter(errors.items()))
+        print(f"⚠️  {len(errors)} Orte wegen Fehlern des Geokodierers nicht geokodiert, z.B. '{query}': {error}")
+        results.update((query, location_to_tuple(None)) for query in errors)
+    return {q: results[representatives[normalize_query(q)]] for q in unique_queries}
@@ -0,0 +1,165 @@
+# Geokodierungs-Anbieter: Nominatim (öffentlich oder selbst gehostet) und ein lokales Offline-Ortsverzeichnis
+import difflib
+import json
+import os
+import re
+from collections import namedtuple
+
+import pandas as pd
+from geopy.extra.rate_limiter import RateLimiter
+from geopy.geocoders import Nominatim
+from shapely.geometry import shape
+
+# Einheitliches Ergebnis mit denselben Attributen wie geopy.Location
+GeoResult = namedtuple('GeoResult', ['address', 'latitude', 'longitude'])
+
+# Präfixe, die in "Ort / Trasse" häufig vor dem eigentlichen Ortsnamen stehen (z.B. "UW Hattingen")
+ORT_PREFIXES = ('us ', 'uw ', 'umspannwerk ', 'umspannstation ', 'station ', 'trasse ', 'ortsnetz ')
+
+
+# Normalisiert Ortsnamen für den Verzeichnis-Index
+def normalize_name(name):
+    name = str(name).replace('\xa0', ' ').strip().casefold()
+    name = re.sub(r'\s+', ' ', name)
+    return name
+
+
+# Erzeugt einen Nominatim-Geokodierer mit eigenem Ratenlimit (min_delay_seconds=0 für selbst gehostete Instanzen)
+# Fehler (Zeitüberschreitung, HTTP 429, keine Verbindung) werden nach den Wiederholungen weitergereicht, damit
+# resolve_queries sie von "nicht gefunden" unterscheiden kann und nicht im Cache speichert
+def nominatim_geocoder(user_agent="geo_map_app", domain=None, scheme="https", timeout=60,
+                       min_delay_seconds=1, max_retries=3):
+    kwargs = {'user_agent': user_agent, 'timeout': timeout, 'scheme': scheme}
+    if domain:
+        kwargs['domain'] = domain
+    geolocator = Nominatim(**kwargs)
+    return RateLimiter(geolocator.geocode, min_delay_seconds=min_delay_seconds, max_retries=max_retries,
+                       swallow_exceptions=False)
+
+
+# Offline-Ortsverzeichnis deutscher Gemeinden und Ortsteile mit exakter und unscharfer Suche
+# Erwartet eine CSV-Datei mit den Spalten name, bundesland, latitude, longitude (Trennzeichen ; oder ,)
+class Gazetteer:
+    def __init__(self, path=None, bundesland_geojson=None, fuzzy_cutoff=0.88):
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self.index = {}
+        if path:
+            self.index.update(self._load_index(path))
+        if bundesland_geojson:
+            self.add_bundeslaender(bundesland_geojson)
+        self._rebuild_buckets()
+
+    # Lädt den Index aus einer zwischengespeicherten JSON-Datei, solange die CSV unverändert ist (Größe und
+    # Änderungszeit stehen im Index); JSON statt Pickle, damit eine fremde Datei neben der CSV keinen Code ausführt
+    @staticmethod
+    def _load_index(path):
+        index_path = f"{path}.idx.json"
+        stat = os.stat(path)
+        source = {'size': stat.st_size, 'mtime': stat.st_mtime}
+        if os.path.exists(index_path):
+            try:
+                with open(index_path, encoding='utf-8') as f:
+                    cached = json.load(f)
+                if cached.get('source') == source:
+                    return {name: GeoResult(*entry) for name, entry in cached['index'].items()}
+            except (OSError, ValueError, KeyError, TypeError, AttributeError):
+                pass
+        df = pd.read_csv(path, sep=None, engine='python', encoding='utf-8')
+        df.columns = [str(c).strip().lower() for c in df.columns]
+        missing = {'name', 'latitude', 'longitude'} - set(df.columns)
+        if missing:
+            raise ValueError(f"❌ Spalten fehlen im Ortsverzeichnis {path}: {', '.join(sorted(missing))}")
+        if 'bundesland' not in df.columns:
+            df['bundesland'] = ''
+        df = df.dropna(subset=['name', 'latitude', 'longitude'])
+        index = {}
+        for name, bundesland, lat, lon in zip(df['name'], df['bundesland'].fillna(''), df['latitude'],
+                                              df['longitude']):
+            address = f"{name}, {bundesland}, Deutschland" if bundesland else f"{name}, Deutschland"
+            # Bei gleichnamigen Orten bleibt der erste Eintrag der Datei maßgeblich
+            index.setdefault(normalize_name(name), GeoResult(address, float(lat), float(lon)))
+        try:
+            tmp_path = f"{index_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'source': source, 'index': index}, f, ensure_ascii=False)
+            os.replace(tmp_path, index_path)
+        except OSError:
+            pass
+        return index
+
+    # Ergänzt die Bundesländer (repräsentativer Punkt der Polygone) als Rückfallebene
+    def add_bundeslaender(self, bundesland_geojson):
+        with open(bundesland_geojson, encoding='utf-8') as f:
+            geojson_data = json.load(f)
+        for feature in geojson_data['features']:
+            name = feature['properties']['name']
+            point = shape(feature['geometry']).representative_point()
+            self.index[normalize_name(name)] = GeoResult(f"{name}, Deutschland", point.y, point.x)
+        self._rebuild_buckets()
+
+    # Gruppiert die Schlüssel nach Anfangsbuchstaben, damit die unscharfe Suche nur wenige Kandidaten prüft
+    def _rebuild_buckets(self):
+        self.buckets = {}
+        for key in self.index:
+            self.buckets.setdefault(key[:1], []).append(key)
+
+    # Liefert die Suchbegriffe einer Anfrage in absteigender Genauigkeit
+    @staticmethod
+    def _candidates(query):
+        parts = [normalize_name(p) for p in str(query).split(',')]
+        parts = [p for p in parts if p and p != 'deutschland']
+        candidates = []
+        if len(parts) > 1:
+            candidates.append(', '.join(parts))
+        for part in parts:
+            candidates.append(part)
+            for prefix in ORT_PREFIXES:
+                if part.startswith(prefix):
+                    candidates.append(part[len(prefix):])
+        return list(dict.fromkeys(candidates))
+
+    def lookup(self, query, fuzzy=True):
+        candidates = self._candidates(query)
+        for candidate in candidates:
+            if candidate in self.index:
+                return self.index[candidate]
+        if fuzzy:
+            for candidate in candidates:
+                matches = difflib.get_close_matches(
+                    candidate, self.buckets.get(candidate[:1], []), n=1, cutoff=self.fuzzy_cutoff
+                )
+                if matches:
+                    return self.index[matches[0]]
+        return None
+
+    def __call__(self, query):
+        return self.lookup(query)
+
+
+# Fragt mehrere Geokodierer nacheinander an, bis einer ein Ergebnis liefert (z.B. offline, dann Nominatim)
+class FallbackGeocoder:
+    def __init__(self, *geocoders):
+        self.geocoders = [g for g in geocoders if g is not None]
+
+    def __call__(self, query):
+        for geocode in self.geocoders:
+            location = geocode(query)
+            if location is not None:
+                return location
+        return None
+
+
+# Stellt den Geokodierer aus Offline-Verzeichnis und/oder Nominatim zusammen
+def build_geocoder(gazetteer=None, bundesland_geojson=None, offline=False, nominatim_domain=None,
+                   nominatim_scheme="https", min_delay_seconds=1):
+    offline_geocoder = None
+    if gazetteer or offline:
+        offline_geocoder = Gazetteer(gazetteer, bundesland_geojson=bundesland_geojson)
+    if offline:
+        return offline_geocoder
+    online_geocoder = nominatim_geocoder(
+        domain=nominatim_domain, scheme=nominatim_scheme, min_delay_seconds=min_delay_seconds
+    )
+    if offline_geocoder is None:
+        return online_geocoder
+    return FallbackGeocoder(offline_geocoder, online_geocoder)
@@ -0,0 +1,76 @@
+# Inkrementeller Lauf: Fingerabdrücke je VNB gegen das Manifest des vorherigen Laufs vergleichen
+import hashlib
+import json
+import os
+from collections import namedtuple
+
+import pandas as pd
+
+from .store import group_ranges
+
+# changed: neue oder geänderte VNB, removed: nicht mehr enthaltene VNB, previous: Manifest-Einträge des Vorlaufs
+UpdatePlan = namedtuple('UpdatePlan', ['changed', 'removed', 'previous'])
+
+
+# Schlüssel je Zeile für die Gruppierung (fehlender VNB-Name wird zu ""); Kategorien bleiben Kategorien
+def vnb_keys(df):
+    keys = df['VNB-Name']
+    if isinstance(keys.dtype, pd.CategoricalDtype):
+        if '' not in keys.cat.categories:
+            keys = keys.cat.add_categories([''])
+        return keys.fillna('')
+    return keys.fillna('').astype(str)
+
+
+# Berechnet je VNB einen Fingerabdruck über alle Eingabezeilen (Spaltennamen, Werte und Reihenfolge)
+def fingerprint_vnbs(df):
+    row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    header = "|".join(map(str, df.columns)).encode('utf-8')
+    fingerprints = {}
+    groups = group_ranges(vnb_keys(df))
+    for vnb, start, stop in zip(groups.names, groups.starts, groups.stops):
+        digest = hashlib.sha1(header)
+        digest.update(row_hashes[groups.order[start:stop]].tobytes())
+        fingerprints[vnb] = digest.hexdigest()
+    return fingerprints
+
+
+# Fingerabdruck der Einstellungen, die das Ergebnis beeinflussen; bei Änderung wird alles neu berechnet
+def fingerprint_settings(**settings):
+    return hashlib.sha1(json.dumps(settings, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def load_manifest(manifest_path):
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_manifest(manifest_path, manifest):
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, manifest_path)
+
+
+# Ermittelt geänderte und entfernte VNB; None bedeutet, dass ein vollständiger Lauf nötig ist
+def plan_update(manifest_path, fingerprints, settings, required_outputs):
+    manifest = load_manifest(manifest_path)
+    if manifest is None or manifest.get('settings') != settings:
+        return None
+    if not all(os.path.exists(path) for path in required_outputs):
+        return None
+    previous = manifest.get('vnb', {})
+    changed = {vnb for vnb, fp in fingerprints.items() if previous.get(vnb, {}).get('fingerprint') != fp}
+    removed = set(previous) - set(fingerprints)
+    return UpdatePlan(changed, removed, previous)
+
+
+# Übernimmt die Zeilen unveränderter VNB aus einer Ausgabe des Vorlaufs und ergänzt die neu berechneten Zeilen
+# Die Reihenfolge der VNB folgt der aktuellen Eingabe
+def merge_previous(previous_df, new_df, plan, vnb_order):
+    keep = previous_df[~vnb_keys(previous_df).isin(plan.changed | plan.removed)]
+    merged = pd.concat([keep, new_df], ignore_index=True)
+    position = vnb_keys(merged).map({vnb: i for i, vnb in enumerate(vnb_order)}).astype('float64')
+    return merged.iloc[position.argsort(kind='stable')].reset_index(drop=True)
@@ -0,0 +1,260 @@
+# Einlesen vieler Eingabetabellen (z.B. eine Arbeitsmappe je VNB) parallel im Prozesspool
+# Spaltennamen und Datentypen werden über SCHEMA vereinheitlicht, wiederkehrende Textspalten werden als
+# Kategorien zusammengeführt (einmaliges concat). Dateien mit abweichendem Schema landen im Ablehnungsbericht,
+# statt den ganzen Lauf abzubrechen.
+import glob
+import os
+import re
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from .cleaning import strip_text
+from .store import CATEGORY_COLUMNS, COLUMNAR_EXTENSIONS, EXCEL_EXTENSIONS, normalize_table
+
+# Spalten der Eingabetabellen und ihr Typ: 'category' (wiederkehrende Texte, store.CATEGORY_COLUMNS), 'text',
+# 'number' (Kennzahlen und Koordinaten, bereinigt über normalize_table)
+SCHEMA = {
+    'VNB-Name': 'category',
+    'Teilnetzgebiet': 'category',
+    'Bundesland': 'category',
+    'Ort / Trasse': 'text',
+    'Netzebene': 'category',
+    'Art der Maßnahme': 'text',
+    'Leitungslänge in km': 'number',
+    'Übertragungskapazität in MVA': 'number',
+    'Netzkomponenten (z.B. UW,Trafo ;Anzahl/Typ)': 'text',
+    'Projektstatus': 'category',
+    'Zeithorizont': 'category',
+    'Kosten in Mio.€': 'number',
+    'location': 'category',
+    'latitude': 'number',
+    'longitude': 'number',
+}
+REQUIRED_COLUMNS = ['VNB-Name', 'Bundesland', 'Ort / Trasse']
+
+# Abweichende Schreibweisen der Spaltennamen (nach normalize_column) -> Spalte im Schema
+COLUMN_ALIASES = {
+    'vnb': 'VNB-Name',
+    'vnb name': 'VNB-Name',
+    'netzbetreiber': 'VNB-Name',
+    'verteilnetzbetreiber': 'VNB-Name',
+    'teilnetz': 'Teilnetzgebiet',
+    'land': 'Bundesland',
+    'ort': 'Ort / Trasse',
+    'trasse': 'Ort / Trasse',
+    'ort trasse': 'Ort / Trasse',
+    'spannungsebene': 'Netzebene',
+    'art': 'Art der Maßnahme',
+    'maßnahme': 'Art der Maßnahme',
+    'leitungslänge': 'Leitungslänge in km',
+    'leitungslänge km': 'Leitungslänge in km',
+    'übertragungskapazität': 'Übertragungskapazität in MVA',
+    'übertragungskapazität mva': 'Übertragungskapazität in MVA',
+    'netzkomponenten': 'Netzkomponenten (z.B. UW,Trafo ;Anzahl/Typ)',
+    'status': 'Projektstatus',
+    'fertigstellung': 'Zeithorizont',
+    'kosten': 'Kosten in Mio.€',
+    'kosten mio €': 'Kosten in Mio.€',
+    'kosten mio eur': 'Kosten in Mio.€',
+    'lat': 'latitude',
+    'breitengrad': 'latitude',
+    'lon': 'longitude',
+    'lng': 'longitude',
+    'längengrad': 'longitude',
+}
+
+INPUT_EXTENSIONS = EXCEL_EXTENSIONS + COLUMNAR_EXTENSIONS + ('.csv',)
+
+# frame: vereinheitlichte Tabelle oder None (abgelehnt); ignored: nicht im Schema enthaltene Spalten
+IngestResult = namedtuple('IngestResult', ['path', 'frame', 'reason', 'ignored'])
+REPORT_COLUMNS = ['Datei', 'Status', 'Grund', 'Spalten']
+REPORT_FILE = "eingabe_bericht.csv"
+
+
+# Vergleichsform eines Spaltennamens: Kleinschreibung, Umbrüche/geschützte Leerzeichen/Satzzeichen als Leerzeichen
+def normalize_column(name):
+    name = str(name).replace('\xa0', ' ').casefold()
+    name = re.sub(r'[\s\-_/().,;:]+', ' ', name)
+    return name.replace(' in ', ' ').strip()
+
+
+_COLUMN_LOOKUP = {normalize_column(col): col for col in SCHEMA}
+_COLUMN_LOOKUP.update({normalize_column(alias): col for alias, col in COLUMN_ALIASES.items()})
+
+
+# Ganzzahlige Werte ohne Nachkommastellen als Text (2026.0 -> "2026"), fehlende Werte bleiben erhalten
+def as_text(series):
+    def convert(value):
+        if pd.isna(value):
+            return value
+        if isinstance(value, float) and value.is_integer():
+            return str(int(value))
+        return str(value)
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    texts = pd.Series([convert(v) for v in uniques], dtype=object)
+    return pd.Series(texts.to_numpy()[codes], index=series.index).where(codes >= 0)
+
+
+def read_raw(path, sheet_name=0):
+    extension = os.path.splitext(path)[1].lower()
+    if extension in EXCEL_EXTENSIONS:
+        return pd.read_excel(path, sheet_name=sheet_name)
+    if extension == '.csv':
+        return pd.read_csv(path)
+    if extension == '.parquet':
+        return pd.read_parquet(path)
+    if extension in ('.arrow', '.feather'):
+        return pd.read_feather(path)
+    raise ValueError(f"Unbekanntes Tabellenformat: {extension}")
+
+
+# Benennt die Spalten nach dem Schema um und vereinheitlicht die Datentypen
+# Liefert (Tabelle oder None, Ablehnungsgrund, ignorierte Spalten)
+def harmonize(raw):
+    renames, ignored, targets = {}, [], {}
+    for col in raw.columns:
+        target = _COLUMN_LOOKUP.get(normalize_column(col))
+        if target is None:
+            # Leere Excel-Spalten ("Unnamed: 12") nicht als Abweichung melden
+            if not (str(col).startswith('Unnamed:') and raw[col].isna().all()):
+                ignored.append(str(col))
+            continue
+        if target in targets:
+            return None, f"Spalte '{target}' mehrfach ({targets[target]!r}, {col!r})", ignored
+        targets[target] = col
+        renames[col] = target
+    missing = [col for col in REQUIRED_COLUMNS if col not in targets]
+    if missing:
+        return None, f"Pflichtspalten fehlen: {', '.join(missing)}", ignored
+
+    df = raw[list(renames)].rename(columns=renames)
+    df = df[[col for col in SCHEMA if col in df.columns]]
+    # Zeilen ohne jeden Eintrag (z.B. Leerzeilen am Ende der Arbeitsmappe) entfernen
+    df = df.dropna(how='all').reset_index(drop=True)
+    df = normalize_table(df)
+    for col in df.columns:
+        kind = SCHEMA[col]
+        if kind == 'text':
+            df[col] = as_text(df[col])
+        elif kind == 'category':
+            df[col] = strip_text(as_text(df[col])).astype('category')
+    return df, None, ignored
+
+
+# Arbeitseinheit im Prozesspool: eine Datei lesen und vereinheitlichen (Fehler werden zum Ablehnungsgrund)
+def read_workbook(path, sheet_name=0):
+    try:
+        raw = read_raw(path, sheet_name)
+    except Exception as e:
+        return IngestResult(path, None, f"nicht lesbar: {e}", [])
+    try:
+        df, reason, ignored = harmonize(raw)
+    except Exception as e:
+        return IngestResult(path, None, f"nicht auswertbar: {e}", [])
+    if df is not None and df.empty:
+        return IngestResult(path, None, "keine Zeilen", ignored)
+    return IngestResult(path, df, reason, ignored)
+
+
+# Verzeichnis oder Glob-Muster statt einer einzelnen Datei
+def is_collection(source):
+    return os.path.isdir(source) or glob.has_magic(source)
+
+
+# Eingabedateien aus Verzeichnissen (alle Tabellen darin), Glob-Mustern oder einzelnen Pfaden, sortiert
+def collect_paths(sources):
+    if isinstance(sources, str):
+        sources = [sources]
+    paths = []
+    for source in sources:
+        if not is_collection(source):
+            paths.append(source)
+            continue
+        if os.path.isdir(source):
+            candidates = [os.path.join(source, f) for f in os.listdir(source)]
+        else:
+            candidates = glob.glob(source, recursive=True)
+        candidates = [
+            p for p in candidates
+            if os.path.isfile(p) and p.lower().endswith(INPUT_EXTENSIONS)
+            # Excel-Sperrdateien auslassen
+            and not os.path.basename(p).startswith('~$')
+        ]
+        # Spaltenorientierte Kopien (store.write_table) neben einer Excel-/CSV-Datei nicht doppelt einlesen
+        source_stems = {os.path.splitext(p)[0] for p in candidates if not p.lower().endswith(COLUMNAR_EXTENSIONS)}
+        paths.extend(sorted(
+            p for p in candidates
+            if not (p.lower().endswith(COLUMNAR_EXTENSIONS) and os.path.splitext(p)[0] in source_stems)
+        ))
+    return list(dict.fromkeys(paths))
+
+
+# Führt die Tabellen einmalig zusammen; die Kategorien jeder Spalte werden vorher vereinigt, damit das Ergebnis
+# kategorisch bleibt
+def concat_frames(frames):
+    frames = list(frames)
+    for col in CATEGORY_COLUMNS:
+        present = [frame[col] for frame in frames if col in frame.columns]
+        if not present:
+            continue
+        categories = union_categoricals([s.array for s in present], sort_categories=True, ignore_order=True).categories
+        dtype = pd.CategoricalDtype(categories)
+        frames = [
+            frame.assign(**{col: frame[col].cat.set_categories(categories) if col in frame.columns
+                            else pd.Series(pd.Categorical([None] * len(frame), dtype=dtype), index=frame.index)})
+            for frame in frames
+        ]
+    df = pd.concat(frames, ignore_index=True)
+    return df[[col for col in SCHEMA if col in df.columns]]
+
+
+# Liest die Dateien parallel im Prozesspool (max_workers=None: alle Kerne); liefert je Datei ein IngestResult
+def read_workbooks(paths, max_workers=None, sheet_name=0):
+    max_workers = min(max_workers or os.cpu_count() or 1, len(paths))
+    if max_workers > 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(read_workbook, paths, [sheet_name] * len(paths),
+                                     chunksize=max(1, len(paths) // (4 * max_workers))))
+    return [read_workbook(path, sheet_name) for path in paths]
+
+
+# Führt die eingelesenen Dateien zusammen; liefert (Tabelle, Bericht mit abgelehnten Dateien und ignorierten Spalten)
+def combine_results(results):
+    report = []
+    for result in results:
+        if result.frame is None:
+            print(f"⚠️  Abgelehnt: {result.path} ({result.reason})")
+            report.append((result.path, 'abgelehnt', result.reason, ", ".join(result.ignored)))
+        elif result.ignored:
+            report.append((result.path, 'übernommen', 'Spalten nicht im Schema ignoriert', ", ".join(result.ignored)))
+    frames = [result.frame for result in results if result.frame is not None]
+    if not frames:
+        raise ValueError(f"❌ Alle {len(results)} Eingabetabellen wurden abgelehnt")
+    df = concat_frames(frames)
+    print(f"📥 {len(frames)} von {len(results)} Tabellen eingelesen ({len(df)} Zeilen)")
+    return df, pd.DataFrame(report, columns=REPORT_COLUMNS)
+
+
+# Liest alle Eingabetabellen parallel (max_workers=None: alle Kerne) und führt sie zusammen
+# sources: Verzeichnis, Glob-Muster (z.B. "vnb/*.xlsx") oder Liste von Pfaden; sheet_name: Blatt je Arbeitsmappe
+# Liefert (Tabelle, Bericht mit abgelehnten Dateien und ignorierten Spalten)
+def ingest(sources, max_workers=None, sheet_name=0):
+    paths = collect_paths(sources)
+    if not paths:
+        raise ValueError(f"❌ Keine Eingabetabellen gefunden: {sources}")
+    return combine_results(read_workbooks(paths, max_workers, sheet_name))
+
+
+# Schreibt den Bericht der abgelehnten Dateien (nur wenn es Einträge gibt) und liefert den Pfad oder None
+def write_report(report, path):
+    if report.empty:
+        return None
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    report.to_csv(path, index=False, sep=';', encoding='utf-8-sig')
+    print(f"📝 Bericht der Eingabetabellen: {path}")
+    return path
@@ -0,0 +1,147 @@
+# Tabellenerkennung aus OCR-Wortboxen (pytesseract.image_to_data), Seite für Seite als Datenstrom
+# Die Spaltengrenzen werden je Tabelle aus den x-Koordinaten der ersten Zeilen bestimmt und erst neu bestimmt,
+# wenn die Zeilen einer Seite deutlich nicht mehr dazu passen; jede Seite wird direkt in ausgerichtete Zeilen
+# übersetzt, ohne das Dokument im Speicher zu halten.
+import numpy as np
+import pandas as pd
+import pytesseract
+
+WORD_COLUMNS = ['left', 'top', 'width', 'height', 'text']
+WORD_DTYPES = {'left': 'int32', 'top': 'int32', 'width': 'int32', 'height': 'int32'}
+
+
+# Erkannte Wörter einer Seite mit Position (leere Boxen und Boxen ohne Konfidenz werden verworfen)
+def page_words(image, lang='deu', config=''):
+    data = pytesseract.image_to_data(image, lang=lang, config=config, output_type=pytesseract.Output.DICT)
+    words = pd.DataFrame({col: data[col] for col in WORD_COLUMNS})
+    words['text'] = words['text'].astype(str).str.strip()
+    conf = pd.to_numeric(pd.Series(data['conf']), errors='coerce')
+    words = words[(conf >= 0).to_numpy() & (words['text'] != '').to_numpy()]
+    return words.astype(WORD_DTYPES).reset_index(drop=True)
+
+
+# Fasst die Wörter einer Seite zu Zeilen und innerhalb der Zeilen zu Zellen (left, right, text) zusammen
+# Neue Zeile, wenn die Wortmitte mehr als eine halbe Zeilenhöhe tiefer liegt; neue Zelle bei einer Lücke
+# von mehr als gap_factor Zeilenhöhen
+def page_lines(words, gap_factor=0.8):
+    if words is None or words.empty:
+        return [], None
+    height = float(words['height'].median()) or 1.0
+    words = words.assign(center=words['top'] + words['height'] / 2).sort_values(['center', 'left'], kind='stable')
+    line_id = np.concatenate([[0], np.cumsum(np.diff(words['center'].to_numpy()) > height / 2)])
+    lines = []
+    for _, line in words.assign(line=line_id).groupby('line', sort=True):
+        cells = []
+        for left, width, text in zip(*(line.sort_values('left', kind='stable')[c] for c in ('left', 'width', 'text'))):
+            right = left + width
+            if cells and left - cells[-1][1] <= gap_factor * height:
+                cells[-1] = (cells[-1][0], max(cells[-1][1], right), f"{cells[-1][2]} {text}")
+            else:
+                cells.append((left, right, text))
+        lines.append(cells)
+    return lines, height
+
+
+# Zeilen ohne Spalteninformation: eine einzige Zelle über mindestens wide_fraction der Gesamtbreite (Überschriften,
+# Fließtext). Sie würden sonst jede Spaltenlücke überdecken und werden vor der Bestimmung der Grenzen verworfen.
+def table_lines(lines, wide_fraction=0.5):
+    cells = [cell for line in lines for cell in line]
+    if not cells:
+        return []
+    extent = max(c[1] for c in cells) - min(c[0] for c in cells)
+    return [line for line in lines if len(line) > 1 or line[0][1] - line[0][0] < wide_fraction * extent]
+
+
+# Spaltengrenzen: Mitten der senkrechten Streifen, die (bis auf noise Anteil der Zeilen) von keiner Zelle
+# überdeckt werden und mindestens min_gap Pixel breit sind
+def infer_boundaries(lines, min_gap, noise=0.05):
+    lines = table_lines(lines)
+    cells = [cell for line in lines for cell in line]
+    if not cells:
+        return np.array([])
+    lefts = np.array([c[0] for c in cells], dtype=np.int64)
+    rights = np.array([c[1] for c in cells], dtype=np.int64)
+    width = int(rights.max()) + 1
+    delta = np.zeros(width + 1, dtype=np.int64)
+    np.add.at(delta, lefts, 1)
+    np.add.at(delta, rights, -1)
+    coverage = np.cumsum(delta)[:width]
+    free = np.concatenate([[0], (coverage <= noise * len(lines)).astype(np.int8), [0]])
+    edges = np.diff(free)
+    starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    # Freie Streifen vor der ersten und nach der letzten Zelle sind keine Spaltengrenzen
+    inner = (starts > lefts.min()) & (ends < rights.max()) & (ends - starts >= min_gap)
+    return (starts[inner] + ends[inner]) / 2
+
+
+# Anteil der Tabellenzeilen, die nicht zu den Spaltengrenzen passen: eine Zelle überdeckt eine Grenze oder
+# mehrere Zellen fallen in dieselbe Spalte
+def misfit_share(lines, boundaries):
+    lines = table_lines(lines)
+    if not lines:
+        return 0.0
+    misfits = 0
+    for cells in lines:
+        lefts = np.array([c[0] for c in cells])
+        rights = np.array([c[1] for c in cells])
+        crosses = np.searchsorted(boundaries, lefts) != np.searchsorted(boundaries, rights)
+        columns = np.searchsorted(boundaries, (lefts + rights) / 2)
+        if crosses.any() or len(np.unique(columns)) < len(cells):
+            misfits += 1
+    return misfits / len(lines)
+
+
+# Ordnet die Zellen jeder Zeile anhand ihrer Mitte den Spalten zu
+def assign_columns(lines, boundaries):
+    n_columns = len(boundaries) + 1
+    rows = []
+    for cells in lines:
+        row = [''] * n_columns
+        for left, right, text in cells:
+            col = int(np.searchsorted(boundaries, (left + right) / 2))
+            row[col] = f"{row[col]} {text}" if row[col] else text
+        rows.append(row)
+    return rows
+
+
+# Zustandsbehafteter Parser für eine Tabelle: feed() nimmt die Wörter einer Seite und liefert die
+# ausgerichteten Zeilen, sobald die Spalten bekannt sind (nach min_lines Zeilen); flush() am Ende
+# Passt mehr als refit Anteil der Zeilen einer Seite nicht zu den Spalten (neue Tabelle mit anderem Aufbau),
+# werden die Grenzen aus dieser Seite neu bestimmt, sofern sie mindestens min_lines Tabellenzeilen hat.
+class OcrTableParser:
+    def __init__(self, min_lines=8, gap_factor=0.8, refit=0.5):
+        self.min_lines = min_lines
+        self.gap_factor = gap_factor
+        self.refit = refit
+        self.boundaries = None
+        self.pending = []
+        self.heights = []
+
+    @property
+    def n_columns(self):
+        return None if self.boundaries is None else len(self.boundaries) + 1
+
+    def _infer(self):
+        min_gap = self.gap_factor * float(np.median(self.heights)) if self.heights else 1.0
+        self.boundaries = infer_boundaries(self.pending, min_gap)
+        lines, self.pending, self.heights = self.pending, [], []
+        return assign_columns(lines, self.boundaries)
+
+    def feed(self, words):
+        lines, height = page_lines(words, self.gap_factor)
+        if self.boundaries is not None:
+            if (len(table_lines(lines)) < self.min_lines
+                    or misfit_share(lines, self.boundaries) <= self.refit):
+                return assign_columns(lines, self.boundaries)
+            self.boundaries = None
+        self.pending.extend(lines)
+        if height is not None:
+            self.heights.append(height)
+        if len(table_lines(self.pending)) < self.min_lines:
+            return []
+        return self._infer()
+
+    def flush(self):
+        if self.boundaries is None and self.pending:
+            return self._infer()
+        return []
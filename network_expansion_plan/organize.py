@@ -0,0 +1,13 @@
+# Sortierschritt der Pipeline (organize); bewusst ohne Karten- und Diagramm-Bibliotheken, damit
+# Tabulator-Organizer.py nur pandas braucht
+from .cleaning import strip_text
+
+
+# Sortiert nach 'VNB-Name' und der zweiten Spalte (z.B. 'Teilnetzgebiet'), deren Werte vorher bereinigt werden
+# Werte der zweiten Spalte werden Text ohne Leerzeichen am Rand; fehlende Werte bleiben fehlend und stehen je VNB
+# am Ende. Früher (astype(str) mit pandas < 3) wurden sie zum Text 'nan' und zwischen die Texte einsortiert.
+def organize_table(df):
+    zweite_spalte = df.columns[1]
+    df = df.copy()
+    df[zweite_spalte] = strip_text(df[zweite_spalte])
+    return df.sort_values(by=['VNB-Name', zweite_spalte], kind='stable')
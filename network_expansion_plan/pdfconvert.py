@@ -0,0 +1,177 @@
+# PDF-Extraktion eines Ordners: Tabellen je PDF als Parquet/Excel, OCR-Seiten als ausgerichtete CSV-Dateien
+import csv
+import os
+
+from .extractcache import ExtractionCache
+from .extraction import DEFAULT_SETTINGS, OcrPage, PageExtractor, tables_to_frame
+from .ocrtable import OcrTableParser
+from .profiling import profiled
+from .store import write_table
+
+
+# Extrahiert alle PDFs eines Ordners; die Seiten werden parallel verarbeitet (max_workers=None: alle Kerne)
+# Ergebnisse je Seite landen im Extraktions-Cache (cache_dir=None schaltet ihn ab), sodass ein erneuter Lauf
+# nur neue oder geänderte PDFs verarbeitet und unveränderte Ausgaben nicht neu schreibt
+# Laufbericht wie bei geocode_and_map über profiler bzw. run_report, profile und trace_memory (profiling.py)
+@profiled("convert_pdfs")
+def convert_pdfs(input_dir, output_dir="output", temp_dir="temp", max_workers=None, settings=DEFAULT_SETTINGS,
+                 cache_dir="extraction_cache", cache_max_bytes=2 * 1024 ** 3, profiler=None):
+    os.makedirs(output_dir, exist_ok=True)
+    os.makedirs(temp_dir, exist_ok=True)
+
+    pdf_files = sorted(f for f in os.listdir(input_dir) if f.endswith(".pdf"))
+
+    if not pdf_files:
+        print("⚠️  Keine PDF-Dateien im Eingabeordner gefunden.")
+        return
+
+    for file in pdf_files:
+        print(f"📄 Verarbeite: {file}")
+
+    cache = ExtractionCache(cache_dir, max_bytes=cache_max_bytes) if cache_dir else None
+    ocr_writers = {}
+    try:
+        with profiler.stage('extract', pdfs=len(pdf_files)):
+            extractor = PageExtractor(settings=settings, max_workers=max_workers, cache=cache)
+            for result in extractor.run([os.path.join(input_dir, f) for f in pdf_files]):
+                if isinstance(result, OcrPage):
+                    profiler.count('ocr_pages')
+                    profiler.count('pdfs', result.page == result.pages)
+                    profiler.add_bytes(*write_ocr_page(result, ocr_writers, temp_dir))
+                else:
+                    profiler.count('pdfs')
+                    profiler.count('tables', len(result.tables or ()))
+                    profiler.count('failures', result.error is not None)
+                    profiler.add_bytes(*write_result(result, output_dir))
+    finally:
+        # Unvollständige OCR-Ausgaben (Abbruch) werden verworfen
+        for writer in ocr_writers.values():
+            writer.close(keep=False)
+        if cache is not None:
+            print(f"🗄️  Extraktions-Cache: {cache.hits} Seiten wiederverwendet, {cache.misses} neu verarbeitet")
+            profiler.count('cache_hits', cache.hits)
+            profiler.count('cache_misses', cache.misses)
+            cache.close()
+
+
+# Liefert die geschriebenen Dateien (leer, wenn nichts geschrieben wurde)
+def write_result(result, output_dir):
+    file = os.path.basename(result.pdf_path)
+    name = os.path.splitext(file)[0]
+    if result.error is not None:
+        print(f"❌ Fehler beim Verarbeiten von {file}: {result.error}")
+        return []
+
+    output_path = os.path.join(output_dir, f"{name}.xlsx")
+    columnar_path = os.path.join(output_dir, f"{name}.parquet")
+    if result.cached and os.path.exists(output_path) and os.path.exists(columnar_path):
+        print(f"⏭️  {file} unverändert (aus dem Cache), Ausgabe vorhanden.")
+        return []
+
+    try:
+        if result.tables:
+            print(f"➡️  {len(result.tables)} Tabellen gefunden ({file}). Zusammenführen und Exportieren nach Excel …")
+            combined_df = tables_to_frame(result.tables)
+
+            # Typisierter Zwischenstand für die weiteren Schritte, Excel nur als Export
+            write_table(combined_df, columnar_path, export_excel=output_path)
+            print(f"✅ Fertig: {output_path} ({columnar_path})\n")
+            return [output_path, columnar_path]
+        print(f"⚠️  {file} enthält keine Seiten.")
+    except Exception as e:
+        print(f"❌ Fehler beim Verarbeiten von {file}: {e}")
+    return []
+
+
+# Schreibt die ausgerichteten OCR-Zeilen einer PDF fortlaufend in CSV-Dateien (zunächst als .tmp)
+# Eine Datei je Tabellenaufbau: bestimmt der Parser neue Spaltengrenzen mit anderer Spaltenzahl, beginnt eine
+# neue Datei (<name>_ocr.csv, <name>_ocr_2.csv, ...), sodass jede Datei gleich breite Zeilen mit Kopfzeile hat
+class OcrCsvWriter:
+    def __init__(self, path):
+        self.path = path
+        self.parser = OcrTableParser()
+        self.paths = []
+        self.file = None
+        self.writer = None
+        self.n_columns = None
+        self.rows = 0
+
+    def table_path(self, index):
+        if index == 0:
+            return self.path
+        base, extension = os.path.splitext(self.path)
+        return f"{base}_{index + 1}{extension}"
+
+    def _start_table(self, n_columns):
+        if self.file is not None:
+            self.file.close()
+        path = self.table_path(len(self.paths))
+        self.paths.append(path)
+        self.file = open(f"{path}.tmp", 'w', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(range(n_columns))
+        self.n_columns = n_columns
+
+    def write(self, rows):
+        if not rows:
+            return
+        if len(rows[0]) != self.n_columns:
+            self._start_table(len(rows[0]))
+        self.writer.writerows(rows)
+        self.rows += len(rows)
+
+    def feed(self, words):
+        self.write(self.parser.feed(words))
+
+    # Liefert die geschriebenen Dateien; Dateien eines früheren Laufs mit mehr Tabellen werden entfernt
+    def close(self, keep=True):
+        try:
+            if keep:
+                self.write(self.parser.flush())
+        finally:
+            if self.file is not None:
+                self.file.close()
+        for path in self.paths:
+            if keep:
+                os.replace(f"{path}.tmp", path)
+            else:
+                os.remove(f"{path}.tmp")
+        if not keep:
+            return []
+        if not self.paths:
+            open(self.path, 'w', encoding='utf-8').close()
+            self.paths.append(self.path)
+        index = len(self.paths)
+        while os.path.exists(self.table_path(index)):
+            os.remove(self.table_path(index))
+            index += 1
+        return self.paths
+
+
+# Liefert die CSV-Dateien, sobald sie nach der letzten Seite geschrieben wurden, sonst eine leere Liste
+def write_ocr_page(page, ocr_writers, temp_dir):
+    file = os.path.basename(page.pdf_path)
+    csv_file_path = os.path.join(temp_dir, f"{os.path.splitext(file)[0]}_ocr.csv")
+    cached_output = page.cached and os.path.exists(csv_file_path)
+    writer = ocr_writers.get(page.pdf_path)
+    if writer is None:
+        writer = ocr_writers[page.pdf_path] = OcrCsvWriter(csv_file_path)
+    try:
+        writer.feed(page.words)
+    except Exception as e:
+        print(f"❌ Fehler beim Schreiben der OCR-CSV-Datei für {file} (Seite {page.page}): {e}")
+    if page.page < page.pages:
+        return []
+
+    del ocr_writers[page.pdf_path]
+    if cached_output:
+        writer.close(keep=False)
+        print(f"⏭️  {file} unverändert (aus dem Cache), Ausgabe vorhanden.")
+        return []
+    try:
+        paths = writer.close()
+        print(f"✅ OCR abgeschlossen ({writer.rows} Zeilen). CSV-Datei gespeichert unter: {', '.join(paths)}")
+        return paths
+    except Exception as e:
+        print(f"❌ Fehler beim Schreiben der OCR-CSV-Datei für {file}: {e}")
+        return []
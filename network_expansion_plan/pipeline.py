@@ -0,0 +1,188 @@
+# Bibliotheks-API der Pipeline: Die Schritte reichen DataFrames im Speicher weiter; Dateien entstehen nur für
+# die Ergebnisse (Tabellen, Würfel, Karten, Diagramme) im angegebenen Ausgabeordner.
+# Die Kommandozeile (cli.py, python -m network_expansion_plan) ruft diese Funktionen auf.
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from .cube import METRICS, build_cube, slice_cube
+from .Foliumwebapp import geocode_table, validate_table, write_maps
+from .FWA_Plots import render_cube_plots
+from .ingest import REPORT_FILE, ingest, is_collection, write_report
+from .organize import organize_table
+from .profiling import profiled
+from .store import read_table, table_path, write_table
+from .validation import load_bundeslaender
+from .vnb_site import build_site
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+BUNDESLAND_GEOJSON = os.path.join(PACKAGE_DIR, "2_deutschland.geo.json")
+
+# Reihenfolge der Schritte; die PDF-Extraktion (pdfconvert.py) liefert Rohtabellen und steht davor
+STEPS = ['organize', 'geocode', 'validate', 'map', 'plots']
+
+# Dateinamen der Ergebnisse im Ausgabeordner (Excel-Export, daneben der Parquet-Zwischenstand)
+ORGANIZED_TABLE = "geokodiert_sortiert.xlsx"
+GEOCODED_TABLE = "geokodiert.xlsx"
+VALID_TABLE = "output_geokodiert.xlsx"
+FAILURE_TABLE = "output_failure.xlsx"
+CUBE_TABLE = "output_cube.parquet"
+PLOTS_DIR = "plots"
+
+# Einstellungen der Geokodierung und Bundesland-Prüfung (siehe geocode_table / validate_table)
+# ingest_workers: Prozesse zum Einlesen mehrerer Eingabetabellen (siehe ingest.py, None: alle Kerne)
+# site_dir: Ordner der statischen Kartenseite mit nachgeladenen VNB-Layern (vnb_site.py), die der Schritt map
+# zusätzlich erzeugt (None: keine)
+PipelineSettings = namedtuple(
+    'PipelineSettings',
+    ['bundesland_geojson', 'geocode_cache', 'gazetteer', 'offline', 'nominatim_domain', 'min_delay_seconds',
+     'max_workers', 'simplify_tolerance', 'marker_mode', 'plot_workers', 'ingest_workers', 'site_dir'],
+    defaults=[BUNDESLAND_GEOJSON, "geocode_cache.sqlite", None, False, None, 1, 1, 0.01, "circle", None, None, None]
+)
+DEFAULT_SETTINGS = PipelineSettings()
+
+
+# Schreibt eine Ergebnistabelle als Excel-Export mit Parquet-Zwischenstand und liefert beide Pfade
+def save_table(df, output_dir, name):
+    path = os.path.join(output_dir, name)
+    write_table(df, table_path(path), export_excel=path)
+    return [path, table_path(path)]
+
+
+# Lädt eine oder mehrere Eingabetabellen (Excel, CSV oder Parquet) als eine Tabelle
+# Mehrere Dateien, Ordner und Glob-Muster werden parallel eingelesen und über das Schema in ingest.py
+# vereinheitlicht. Liefert (Tabelle, Bericht der abgelehnten Dateien oder None bei einer einzelnen Datei).
+def load_inputs(input_paths, max_workers=None):
+    if isinstance(input_paths, str):
+        input_paths = [input_paths]
+    if len(input_paths) == 1 and not is_collection(input_paths[0]):
+        return read_table(input_paths[0]), None
+    return ingest(input_paths, max_workers)
+
+
+# Prüft die Schritte und bringt sie in die Reihenfolge von STEPS
+def ordered_steps(steps):
+    unknown = set(steps) - set(STEPS)
+    if unknown:
+        raise ValueError(f"❌ Unbekannte Schritte: {', '.join(sorted(unknown))}")
+    return [step for step in STEPS if step in steps]
+
+
+# Lädt die Eingabetabellen und führt die gewählten Schritte (Reihenfolge wie STEPS) im Speicher aus
+# Die Eingabe entspricht dem ersten Schritt: Rohtabelle (organize/geocode), geokodierte Tabelle (validate) oder
+# geprüfte Tabelle (map/plots). Geschrieben werden die Prüfergebnisse und der Würfel (validate), Karten und
+# CSV-Dateien (map), die Diagramme (plots) sowie das Ergebnis von organize/geocode, wenn es der letzte Schritt ist.
+# Liefert die geschriebenen Dateien.
+@profiled("pipeline")
+def run_pipeline(input_paths, output_dir, steps=STEPS, settings=DEFAULT_SETTINGS, profiler=None):
+    steps = ordered_steps(steps)
+    os.makedirs(output_dir, exist_ok=True)
+    written = []
+
+    with profiler.stage('load'):
+        df, report = load_inputs(input_paths, settings.ingest_workers)
+        profiler.count('rows_loaded', len(df))
+        if report is not None:
+            profiler.count('inputs_rejected', int((report['Status'] == 'abgelehnt').sum()))
+            report_path = write_report(report, os.path.join(output_dir, REPORT_FILE))
+            written += [report_path] if report_path else []
+    return written + run_steps(df, output_dir, steps, settings, profiler=profiler)
+
+
+# Führt die gewählten Schritte auf einer bereits geladenen Tabelle aus (siehe run_pipeline)
+# state: optionales Dict des Dienstmodus (watch.py); nimmt die Zwischenstände nach organize, geocode und validate
+# (geprüfte Tabelle) auf und liefert unter 'geocoder' einen wiederverwendbaren Geokodierer
+@profiled("pipeline")
+def run_steps(df, output_dir, steps=STEPS, settings=DEFAULT_SETTINGS, state=None, profiler=None):
+    steps = ordered_steps(steps)
+    os.makedirs(output_dir, exist_ok=True)
+    state = {} if state is None else state
+    written = []
+
+    if 'organize' in steps:
+        with profiler.stage('organize'):
+            df = organize_table(df)
+        state['organize'] = df
+        if steps[-1] == 'organize':
+            written += save_table(df, output_dir, ORGANIZED_TABLE)
+
+    if 'geocode' in steps:
+        df = geocode_table(
+            df, settings.bundesland_geojson, settings.geocode_cache, settings.gazetteer, settings.offline,
+            settings.nominatim_domain, settings.min_delay_seconds, settings.max_workers,
+            geocode=state.get('geocoder'), profiler=profiler
+        )
+        state['geocode'] = df
+        if steps[-1] == 'geocode':
+            written += save_table(df, output_dir, GEOCODED_TABLE)
+
+    bundeslaender_gdf = None
+    if 'validate' in steps or 'map' in steps:
+        bundeslaender_gdf = load_bundeslaender(settings.bundesland_geojson, cache_dir=output_dir)
+    df_valid = df
+    if 'validate' in steps:
+        df_valid, df_invalid = validate_table(df, bundeslaender_gdf, settings.simplify_tolerance, profiler=profiler)
+        state['validate'] = df_valid
+        with profiler.stage('write_tables'):
+            written += save_table(df_valid, output_dir, VALID_TABLE)
+            written += save_table(df_invalid, output_dir, FAILURE_TABLE)
+            profiler.add_bytes(*written)
+
+    if not {'validate', 'map', 'plots'} & set(steps):
+        return written
+    with profiler.stage('cube'):
+        cube = build_cube(df_valid)
+        if 'validate' in steps:
+            cube_path = os.path.join(output_dir, CUBE_TABLE)
+            write_table(cube, cube_path)
+            written.append(cube_path)
+
+    if 'map' in steps:
+        df_bundesland = slice_cube(cube, 'Bundesland', METRICS)
+        written += write_maps(df_valid, bundeslaender_gdf, df_bundesland, output_dir,
+                              marker_mode=settings.marker_mode, profiler=profiler)
+        if settings.site_dir:
+            with profiler.stage('site'):
+                site = build_site(df_valid, bundeslaender_gdf, df_bundesland, settings.site_dir)
+                profiler.add_bytes(*site)
+            written += site
+
+    if 'plots' in steps:
+        with profiler.stage('plots'):
+            plots = render_cube_plots(cube, os.path.join(output_dir, PLOTS_DIR), max_workers=settings.plot_workers)
+            profiler.add_bytes(*plots)
+        written += plots
+    return written
+
+
+# Arbeitseinheit im Prozesspool: eine Region (Eingabedatei) mit eigenem Ausgabe-Unterordner und Laufbericht
+def run_region(input_path, output_dir, steps, settings, run_report=None):
+    return run_pipeline(input_path, output_dir, steps, settings, run_report=run_report)
+
+
+# Verarbeitet mehrere Regionen (je eine Eingabedatei oder ein Ordner) parallel in einem Prozesspool; die Ergebnisse landen in
+# output_dir/<Dateiname ohne Endung>. Die öffentliche Nominatim-Instanz erlaubt nur eine Anfrage pro Sekunde,
+# daher werden die Regionen ohne offline bzw. eigene Instanz nacheinander geokodiert (max_workers=1).
+# run_report: Dateiname des Laufberichts im Ordner jeder Region
+def run_regions(input_paths, output_dir, steps=STEPS, settings=DEFAULT_SETTINGS, max_workers=None, run_report=None):
+    if 'geocode' in steps and not (settings.offline or settings.nominatim_domain):
+        max_workers = 1
+    # Diagramme und Einlesen im Prozesspool der Regionen nicht noch einmal parallelisieren
+    settings = settings._replace(plot_workers=1, ingest_workers=1)
+    jobs = []
+    regions = [os.path.splitext(os.path.basename(os.path.normpath(path)))[0] for path in input_paths]
+    if len(set(regions)) < len(regions):
+        raise ValueError("❌ Die Eingabedateien der Regionen brauchen unterschiedliche Dateinamen")
+    for input_path, region in zip(input_paths, regions):
+        region_dir = os.path.join(output_dir, region)
+        report = os.path.join(region_dir, run_report) if run_report else None
+        # Jede Region erhält eine eigene Kartenseite (site_dir/<Dateiname>)
+        region_settings = settings
+        if settings.site_dir:
+            region_settings = settings._replace(site_dir=os.path.join(settings.site_dir, region))
+        jobs.append((input_path, region_dir, steps, region_settings, report))
+    max_workers = min(max_workers or os.cpu_count() or 1, len(jobs)) or 1
+    if max_workers == 1:
+        return {job[0]: run_region(*job) for job in jobs}
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return dict(zip(input_paths, executor.map(run_region, *zip(*jobs))))
@@ -0,0 +1,69 @@
+# Popup-Texte der Maßnahmen spaltenweise in einem Durchlauf: html.escape läuft je eindeutigem Wert einer Spalte
+# statt je Zeile. Die escapten Werte ergeben fertige Popups (marker_mode "circle"), Tabellenzellen ("clustered")
+# oder kompakte Feature-Eigenschaften, aus denen eine gemeinsame Vorlage im Browser die Popups bildet ("geojson",
+# vnb_site.py).
+import html
+import json
+
+import numpy as np
+import pandas as pd
+
+# Reihenfolge der Spalten in den Marker-Popups
+POPUP_ORDER = [
+    'Bundesland', 'Ort / Trasse', 'Netzebene', 'Art der Maßnahme', 'Netzkomponente',
+    'Projektstatus', 'Zeithorizont', 'Leitungslänge in km',
+    'Übertragungskapazität in MVA', 'Kosten in Mio.€', 'VNB-Name', 'latitude', 'longitude'
+]
+
+# Gemeinsame Browser-Vorlage für Popups und Tooltips der GeoJSON-Features; die Eigenschaft 'popup' enthält die
+# bereits escapten Werte in der Reihenfolge von POPUP_ORDER (null für fehlende oder ungültige Einträge)
+POPUP_TEMPLATE_SCRIPT = """
+<script>
+var vnbPopups = {
+    labels: %s,
+    tooltip: %d,
+    bind: function(feature, layer) {
+        var values = feature.properties.popup;
+        var rows = [];
+        values.forEach(function(value, i) {
+            if (value !== null) {
+                rows.push('<b>' + vnbPopups.labels[i] + ':</b> ' + value);
+            }
+        });
+        layer.bindPopup(rows.join('<br>'), {maxWidth: 400});
+        layer.bindTooltip(values[vnbPopups.tooltip]);
+    }
+};
+</script>
+""" % (json.dumps([html.escape(col) for col in POPUP_ORDER], ensure_ascii=False), POPUP_ORDER.index('Ort / Trasse'))
+
+
+# Escapte Texte einer Spalte (ein html.escape je eindeutigem Wert); ungültige Einträge werden None
+def escape_column(series, invalid):
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    # Code -1 (fehlender Wert) zeigt auf das angehängte None
+    texts = np.array([html.escape(str(value)) for value in uniques] + [None], dtype=object)
+    values = texts[codes]
+    values[invalid] = None
+    return values
+
+
+# Matrix (Zeilen × columns) der escapten Popup-Werte; fehlende Spalten und ungültige Einträge sind None
+# invalid: Ungültig-Masken der Popup-Spalten (siehe split_vnbs)
+def popup_values(rows, invalid, columns=POPUP_ORDER):
+    values = np.full((len(rows), len(columns)), None, dtype=object)
+    for i, col in enumerate(columns):
+        if col in rows.columns and col in invalid.columns:
+            values[:, i] = escape_column(rows[col], invalid[col].to_numpy())
+    return values
+
+
+# Setzt die Popups aller Zeilen spaltenweise zusammen: "<b>Spalte:</b> Wert" je gültigem Eintrag, getrennt durch <br>
+def render_popups(values, columns):
+    popups = np.full(len(values), "", dtype=object)
+    for i, col in enumerate(columns):
+        valid = np.not_equal(values[:, i], None)
+        current = popups[valid]
+        separator = np.where(current == "", "", "<br>")
+        popups[valid] = current + separator + f"<b>{html.escape(col)}:</b> " + values[valid, i]
+    return popups
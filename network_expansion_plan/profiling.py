@@ -0,0 +1,178 @@
+# Laufzeitmessung der Verarbeitungsschritte: Zeit und Zähler je Schritt (Zeilen, Cache-Treffer, Geokodierer-
+# Aufrufe, Fehler, geschriebene Bytes), optional cProfile und tracemalloc, und ein maschinenlesbarer Laufbericht
+# (JSON), mit dem sich Läufe über die Zeit vergleichen lassen.
+import cProfile
+import datetime
+import functools
+import json
+import os
+import platform
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+# Spitzenwert des Arbeitsspeichers des Prozesses in Bytes (ru_maxrss: Linux in KiB, macOS in Bytes)
+def max_rss_bytes():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if platform.system() == "Darwin" else rss * 1024
+
+
+# Sammelt die Messwerte eines Laufs; als Kontextmanager wird der Bericht am Ende (auch nach Fehlern) abgeschlossen
+# report_path: Bericht als JSON schreiben (Endung .jsonl: als Zeile anhängen, z.B. für eine Laufhistorie)
+# profile: cProfile über den ganzen Lauf (<report_path>.prof und die teuersten Funktionen im Bericht)
+# trace_memory: Speicherspitze je Schritt über tracemalloc (verlangsamt den Lauf spürbar)
+class RunProfiler:
+    def __init__(self, name, report_path=None, profile=False, trace_memory=False, top=25):
+        self.name = name
+        self.report_path = report_path
+        self.top = top
+        self.trace_memory = trace_memory
+        self.profiler = cProfile.Profile() if profile else None
+        self.stages = []
+        self.counters = {}
+        self.report = None
+        self._stack = []
+        self._lock = threading.Lock()
+        self._started = datetime.datetime.now().astimezone()
+        self._start = time.perf_counter()
+        self._start_cpu = time.process_time()
+        # Nur selbst gestartetes Tracing wird in finish() wieder beendet (z.B. nicht das eines äußeren Profilers)
+        self._started_tracing = trace_memory and not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+        if self.profiler is not None:
+            self.profiler.enable()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.finish(error=None if exc is None else repr(exc))
+
+    # Misst einen Schritt; Zähler innerhalb des Schritts werden ihm und den Gesamtzählern zugerechnet
+    # info: zusätzliche Angaben im Bericht (z.B. die geschriebene Karte)
+    @contextmanager
+    def stage(self, name, **info):
+        record = {'name': name, 'info': info, 'counters': {}}
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        start, start_cpu = time.perf_counter(), time.process_time()
+        with self._lock:
+            self._stack.append(record)
+        try:
+            yield record
+        finally:
+            record['seconds'] = round(time.perf_counter() - start, 4)
+            record['cpu_seconds'] = round(time.process_time() - start_cpu, 4)
+            if self.trace_memory:
+                record['memory_peak_bytes'] = tracemalloc.get_traced_memory()[1]
+            with self._lock:
+                self._stack.remove(record)
+                self.stages.append(record)
+
+    # Erhöht einen Zähler (threadsicher, z.B. aus dem Thread-Pool der Geokodierung)
+    def count(self, name, n=1):
+        if not n:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+            if self._stack:
+                counters = self._stack[-1]['counters']
+                counters[name] = counters.get(name, 0) + n
+
+    # Zählt die Größe geschriebener Dateien (nicht vorhandene Pfade werden übersprungen)
+    def add_bytes(self, *paths):
+        self.count('bytes_written', sum(os.path.getsize(p) for p in paths if p and os.path.isfile(p)))
+        self.count('files_written', sum(1 for p in paths if p and os.path.isfile(p)))
+
+    # Umhüllt eine Funktion so, dass jeder Aufruf gezählt wird (z.B. Anfragen an den Geokodierer)
+    def counted(self, name, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            self.count(name)
+            return func(*args, **kwargs)
+        return wrapper
+
+    def _profile_summary(self):
+        stats = pstats.Stats(self.profiler)
+        rows = []
+        for (filename, line, function), (_, calls, own, cumulative, _) in stats.stats.items():
+            rows.append({
+                'function': f"{os.path.basename(filename)}:{line}({function})",
+                'calls': calls,
+                'own_seconds': round(own, 4),
+                'cumulative_seconds': round(cumulative, 4),
+            })
+        rows.sort(key=lambda row: row['cumulative_seconds'], reverse=True)
+        return rows[:self.top]
+
+    # Schließt den Lauf ab, gibt eine Übersicht aus und schreibt den Bericht (nur beim ersten Aufruf)
+    def finish(self, error=None):
+        if self.report is not None:
+            return self.report
+        if self.profiler is not None:
+            self.profiler.disable()
+        report = {
+            'run': self.name,
+            'started': self._started.isoformat(timespec='seconds'),
+            'seconds': round(time.perf_counter() - self._start, 4),
+            'cpu_seconds': round(time.process_time() - self._start_cpu, 4),
+            'max_rss_bytes': max_rss_bytes(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'error': error,
+            'stages': self.stages,
+            'counters': self.counters,
+        }
+        if self.trace_memory:
+            report['memory_peak_bytes'] = max((s['memory_peak_bytes'] for s in self.stages), default=0)
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        if self.profiler is not None:
+            report['profile'] = self._profile_summary()
+        self.report = report
+
+        for stage in self.stages:
+            details = ", ".join(f"{key}={value}" for key, value in stage['info'].items())
+            label = f"{stage['name']} ({details})" if details else stage['name']
+            print(f"⏱️  {label}: {stage['seconds']:.2f} s")
+        if self.report_path:
+            directory = os.path.dirname(self.report_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            if self.report_path.endswith('.jsonl'):
+                with open(self.report_path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(report, ensure_ascii=False) + "\n")
+            else:
+                with open(self.report_path, 'w', encoding='utf-8') as f:
+                    json.dump(report, f, ensure_ascii=False, indent=2)
+            if self.profiler is not None:
+                self.profiler.dump_stats(f"{os.path.splitext(self.report_path)[0]}.prof")
+            print(f"📊 Laufbericht: {self.report_path}")
+        return report
+
+
+# Decorator für Einstiegsfunktionen mit einem Parameter profiler: ohne übergebenen RunProfiler (z.B. von einer
+# Pipeline über mehrere Schritte) wird für den Aufruf ein eigener angelegt, gesteuert über die zusätzlichen
+# Schlüsselwortargumente run_report, profile und trace_memory
+def profiled(name):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, profiler=None, run_report=None, profile=False, trace_memory=False, **kwargs):
+            if profiler is not None:
+                return func(*args, profiler=profiler, **kwargs)
+            with RunProfiler(name, run_report, profile, trace_memory) as own_profiler:
+                return func(*args, profiler=own_profiler, **kwargs)
+        return wrapper
+    return decorator
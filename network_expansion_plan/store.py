@@ -0,0 +1,116 @@
+# Spaltenorientierter Zwischenspeicher (Parquet / Arrow IPC) zwischen den Verarbeitungsschritten
+# Excel bleibt nur Import- und Exportformat; Zwischenstände werden typisiert und per Memory-Map gelesen.
+import os
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from .cleaning import clean_numeric_columns
+
+NUMERIC_COLUMNS = ['Leitungslänge in km', 'Übertragungskapazität in MVA', 'Kosten in Mio.€']
+COORDINATE_COLUMNS = ['latitude', 'longitude']
+# Textspalten mit wenigen, oft wiederholten Werten; im Speicher und im Parquet-Zwischenstand als Kategorien
+CATEGORY_COLUMNS = ['VNB-Name', 'Teilnetzgebiet', 'Bundesland', 'Netzebene', 'Projektstatus', 'Zeithorizont', 'location']
+# Ergebnisse von pd.api.types.infer_dtype für object-Spalten, die nur Zahlen enthalten
+NUMBER_KINDS = ('integer', 'floating', 'mixed-integer-float', 'decimal')
+COLUMNAR_EXTENSIONS = ('.parquet', '.arrow', '.feather')
+EXCEL_EXTENSIONS = ('.xlsx', '.xls')
+# Zeilen je Gruppe als zusammenhängende Bereiche: order sortiert die Zeilenpositionen stabil nach Gruppe, die
+# Zeilen der Gruppe names[i] stehen in order[starts[i]:stops[i]] (Gruppen in der Reihenfolge ihres Auftretens)
+GroupRanges = namedtuple('GroupRanges', ['names', 'order', 'starts', 'stops'])
+
+
+# Liefert den Pfad mit anderer Dateiendung (z.B. output.xlsx -> output.parquet)
+def table_path(path, extension=".parquet"):
+    return f"{os.path.splitext(path)[0]}{extension}"
+
+
+# Speichert die Textspalten aus CATEGORY_COLUMNS als Kategorien (Codes statt eines Python-Strings je Zeile)
+def compact_table(df):
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns and (df[col].dtype == object or pd.api.types.is_string_dtype(df[col].dtype)):
+            df[col] = df[col].astype('category')
+    return df
+
+
+# Gruppiert die Zeilen nach keys über einen stabilen Sortierindex statt über Masken je Gruppe; bei einer nach
+# VNB sortierten, kompakten Tabelle (organize, compact_table) sind die Bereiche bereits zusammenhängend
+# Fehlende Schlüssel (NaN) gehören zu keiner Gruppe, wie bei groupby
+def group_ranges(keys):
+    codes, names = pd.factorize(keys, use_na_sentinel=True)
+    order = np.argsort(codes, kind='stable')
+    order = order[np.count_nonzero(codes < 0):]
+    counts = np.bincount(codes[codes >= 0], minlength=len(names))
+    stops = np.cumsum(counts)
+    starts = stops - counts
+    return GroupRanges(list(names), order, starts, stops)
+
+
+# Vereinheitlicht Spaltennamen und Datentypen: Kennzahlen als float (vektorisiert bereinigt), Koordinaten als
+# float, object-Spalten nur mit Zahlen (z.B. nach concat mit einer leeren Tabelle) wieder als Zahlen, Spalten mit
+# Texten und anderen Werten (z.B. Zeithorizont: 2026 und "2030+") als Text und wiederkehrende Texte als
+# Kategorien (compact_table).
+# Der Bericht der umgewandelten Kennzahl-Werte steht anschließend als Liste in df.attrs['bereinigung'].
+def normalize_table(df):
+    df = df.copy()
+    df.columns = [str(c) for c in df.columns]
+    df, report = clean_numeric_columns(df, NUMERIC_COLUMNS)
+    for col in COORDINATE_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype('float64')
+    for col in df.columns:
+        if df[col].dtype != object:
+            continue
+        values = df[col].dropna()
+        is_text = values.map(lambda v: isinstance(v, str))
+        if is_text.any() and not is_text.all():
+            df[col] = df[col].map(lambda v: v if pd.isna(v) else str(v))
+        elif pd.api.types.infer_dtype(values, skipna=True) in NUMBER_KINDS:
+            df[col] = pd.to_numeric(df[col])
+    df = compact_table(df)
+    df.attrs['bereinigung'] = report.to_dict('records')
+    return df
+
+
+# Liest eine Tabelle; bei Excel/CSV wird eine aktuellere spaltenorientierte Kopie bevorzugt
+def read_table(path, prefer_columnar=True, **kwargs):
+    extension = os.path.splitext(path)[1].lower()
+    if prefer_columnar and extension not in COLUMNAR_EXTENSIONS:
+        columnar = table_path(path)
+        if os.path.exists(columnar) and (
+                not os.path.exists(path) or os.path.getmtime(columnar) >= os.path.getmtime(path)):
+            return read_table(columnar, **kwargs)
+    if extension == '.parquet':
+        return pd.read_parquet(path, memory_map=True, **kwargs)
+    if extension in ('.arrow', '.feather'):
+        from pyarrow import feather
+        return feather.read_table(path, memory_map=True, **kwargs).to_pandas()
+    if extension in EXCEL_EXTENSIONS:
+        return normalize_table(pd.read_excel(path, **kwargs))
+    if extension == '.csv':
+        return normalize_table(pd.read_csv(path, **kwargs))
+    raise ValueError(f"❌ Unbekanntes Tabellenformat: {path}")
+
+
+# Schreibt eine Tabelle im durch die Endung bestimmten Format
+# Mit export_excel wird zusätzlich eine Excel-Datei für die Weitergabe erzeugt
+def write_table(df, path, export_excel=None):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # Excel zuerst schreiben, damit der spaltenorientierte Stand beim Lesen als aktueller gilt
+    if export_excel:
+        df.to_excel(export_excel, index=False)
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.parquet':
+        normalize_table(df).to_parquet(path, index=False)
+    elif extension in ('.arrow', '.feather'):
+        normalize_table(df).reset_index(drop=True).to_feather(path)
+    elif extension in EXCEL_EXTENSIONS:
+        df.to_excel(path, index=False)
+    elif extension == '.csv':
+        df.to_csv(path, index=False)
+    else:
+        raise ValueError(f"❌ Unbekanntes Tabellenformat: {path}")
+    return path
@@ -0,0 +1,108 @@
+# Prüfung, ob geokodierte Punkte im angegebenen Bundesland liegen (vektorisiert, mit räumlichem Index)
+import os
+
+import geopandas as gpd
+import numpy as np
+import shapely
+from shapely.strtree import STRtree
+
+# Im Prozess bereits geladene Grenzen, damit wiederholte Aufrufe die Dateien nicht erneut lesen
+_BOUNDARY_CACHE = {}
+# Zuletzt gebauter räumlicher Index je Toleranz (siehe bundesland_index)
+_INDEX_CACHE = {}
+
+
+# Lädt die Bundesland-Polygone; mit cache_dir nach dem ersten Lauf aus einer binären GeoParquet-Kopie in diesem
+# Ordner (Cache- bzw. Ausgabeordner) statt aus dem GeoJSON. Die Kopie entsteht als temporäre Datei und wird erst
+# vollständig an ihren Platz verschoben, damit parallele Läufe keine halb geschriebene Datei lesen.
+def load_bundeslaender(bundesland_geojson, cache_dir=None):
+    mtime = os.path.getmtime(bundesland_geojson)
+    memo = _BOUNDARY_CACHE.get(bundesland_geojson)
+    if memo is not None and memo[0] == mtime:
+        return memo[1]
+    cache_path = os.path.join(cache_dir, f"{os.path.basename(bundesland_geojson)}.parquet") if cache_dir else None
+    gdf = None
+    if cache_path and os.path.exists(cache_path) and os.path.getmtime(cache_path) >= mtime:
+        try:
+            gdf = gpd.read_parquet(cache_path)
+        except (ImportError, ValueError, OSError):
+            gdf = None
+    if gdf is None:
+        gdf = gpd.read_file(bundesland_geojson, encoding='utf-8')[['name', 'geometry']]
+        if cache_path:
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                gdf.to_parquet(tmp_path, index=False)
+                os.replace(tmp_path, cache_path)
+            except (ImportError, OSError):
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+    _BOUNDARY_CACHE[bundesland_geojson] = (mtime, gdf)
+    return gdf
+
+
+# Räumlicher Index (STRtree) über die vorbereiteten Bundesland-Polygone
+# Mit simplify_tolerance werden zusätzlich vereinfachte Kernflächen (um die Toleranz nach innen versetzt)
+# gebildet: Ein Punkt in der Kernfläche liegt sicher im Original-Polygon, nur die übrigen Punkte
+# (nahe der Grenze) werden gegen die exakte Geometrie geprüft.
+class BundeslandIndex:
+    def __init__(self, bundeslaender_gdf, simplify_tolerance=0.01):
+        self.names = bundeslaender_gdf['name'].to_numpy(dtype=object)
+        self.polygons = np.asarray(bundeslaender_gdf.geometry.values, dtype=object)
+        shapely.prepare(self.polygons)
+        self.tree = STRtree(self.polygons)
+        self.cores = None
+        if simplify_tolerance:
+            cores = shapely.buffer(shapely.simplify(self.polygons, simplify_tolerance), -simplify_tolerance)
+            shapely.prepare(cores)
+            self.cores = cores
+
+    # Liefert für jeden Punkt den Namen des Bundeslands oder None (außerhalb bzw. ohne Koordinaten)
+    def locate(self, longitude, latitude):
+        longitude = np.asarray(longitude, dtype=float)
+        latitude = np.asarray(latitude, dtype=float)
+        result = np.full(len(longitude), None, dtype=object)
+        valid = np.flatnonzero(np.isfinite(longitude) & np.isfinite(latitude))
+        if len(valid) == 0:
+            return result
+        points = np.asarray(gpd.points_from_xy(longitude[valid], latitude[valid]), dtype=object)
+        # Kandidatenpaare (Punkt, Polygon) über die Bounding-Boxen im STRtree
+        point_idx, polygon_idx = self.tree.query(points)
+        x, y = longitude[valid][point_idx], latitude[valid][point_idx]
+        found = np.full(len(points), -1, dtype=np.int64)
+        if self.cores is not None and len(point_idx):
+            inside = shapely.contains_xy(self.cores[polygon_idx], x, y)
+            self._assign(found, point_idx[inside], polygon_idx[inside])
+            rest = found[point_idx] < 0
+            point_idx, polygon_idx, x, y = point_idx[rest], polygon_idx[rest], x[rest], y[rest]
+        if len(point_idx):
+            inside = shapely.contains_xy(self.polygons[polygon_idx], x, y)
+            self._assign(found, point_idx[inside], polygon_idx[inside])
+        hit = found >= 0
+        result[valid[hit]] = self.names[found[hit]]
+        return result
+
+    # Bei Überschneidungen gilt das erste passende Polygon
+    @staticmethod
+    def _assign(found, point_idx, polygon_idx):
+        order = np.lexsort((-polygon_idx, point_idx))
+        found[point_idx[order]] = polygon_idx[order]
+
+
+# Räumlicher Index zu den Grenzen; solange load_bundeslaender dieselben Grenzen liefert (Datei unverändert), wird
+# der Index wiederverwendet statt bei jeder Prüfung neu gebaut (z.B. im Dienstmodus, watch.py)
+def bundesland_index(bundeslaender_gdf, simplify_tolerance=0.01):
+    memo = _INDEX_CACHE.get(simplify_tolerance)
+    if memo is None or memo[0] is not bundeslaender_gdf:
+        memo = (bundeslaender_gdf, BundeslandIndex(bundeslaender_gdf, simplify_tolerance))
+        _INDEX_CACHE[simplify_tolerance] = memo
+    return memo[1]
+
+
+# Ergänzt die Spalten 'name' (gefundenes Bundesland) und 'passt' (stimmt mit der Angabe überein)
+def validate_bundesland(df, index):
+    df = df.copy()
+    df['name'] = index.locate(df['longitude'], df['latitude'])
+    df['passt'] = df['name'] == df['Bundesland']
+    return df
@@ -0,0 +1,154 @@
+# Statische Kartenseite mit nachgeladenen VNB-Layern
+# Die Karten (create_map) enthalten nur Choropleth, Bundesland-Umrisse und leere Layer je VNB. Die Maßnahmen
+# eines VNB liegen als eigene GeoJSON-Datei neben den CSV-Exporten und werden erst beim Einblenden geladen.
+# Hinweis: Browser laden die Dateien nur über HTTP (z.B. GitHub Pages oder python -m http.server), nicht über file://
+import json
+import os
+import time
+
+from folium.plugins import MarkerCluster
+from folium.template import Template
+
+from .cube import METRICS, slice_cube
+from .Foliumwebapp import (MAP_SPECS, PreRenderedLayer, build_bundesland_popups,
+                          build_download_overlay, create_map, export_vnb_csvs, safe_filename, split_vnbs,
+                          vnb_feature_collection)
+from .popups import POPUP_TEMPLATE_SCRIPT
+from .store import read_table, table_path
+from .validation import load_bundeslaender
+
+BUNDESLAND_GEOJSON = os.path.join(os.path.dirname(os.path.abspath(__file__)), "2_deutschland.geo.json")
+
+# Lädt die GeoJSON-Datei eines VNB beim ersten Einblenden in dessen MarkerCluster
+# Popups und Tooltips kommen aus der gemeinsamen Vorlage (popups.POPUP_TEMPLATE_SCRIPT)
+VNB_LOADER_SCRIPT = """
+<script>
+var vnbSite = {
+    map: null,
+    layers: {},
+    manifest: null,
+    generation: 0,
+    register: function(name, layer, url, color, map) {
+        vnbSite.map = map;
+        vnbSite.layers[name] = layer;
+        layer.once('add', function() {
+            layer.vnbLoaded = vnbSite.load(layer, url, color);
+        });
+    },
+    load: function(layer, url, color) {
+        return fetch(url).then(function(response) {
+            return response.json();
+        }).then(function(data) {
+            layer.addLayer(L.geoJson(data, {
+                pointToLayer: function(feature, latlng) {
+                    return L.circleMarker(latlng, {
+                        radius: 7, color: color, fill: true, fillColor: color, fillOpacity: 0.8
+                    });
+                },
+                onEachFeature: vnbPopups.bind
+            }));
+        }).catch(function(error) {
+            console.error('VNB-Daten konnten nicht geladen werden: ' + url, error);
+        });
+    }
+};
+</script>
+"""
+
+
+# Leerer MarkerCluster je VNB, der sich beim Seitenaufbau nur mit Name, Datei-URL und Farbe registriert
+class LazyVnbLayer(MarkerCluster):
+    _template = Template(
+        """
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = L.markerClusterGroup(
+                {{ this.options|tojavascript }}
+            );
+            vnbSite.register({{ this.vnb|tojson }}, {{ this.get_name() }}, {{ this.url|tojson }},
+                {{ this.color|tojson }}, {{ this._parent.get_name() }});
+        {% endmacro %}
+        """
+    )
+
+    def __init__(self, vnb, url, color):
+        super().__init__(
+            name=f"VNB: {vnb}",
+            show=False,
+            maxClusterRadius=120,
+            disableClusteringAtZoom=12,
+            spiderfyOnMaxZoom=True,
+            showCoverageOnHover=True,
+            zoomToBoundsOnClick=True
+        )
+        self.vnb = vnb
+        self.url = url
+        self.color = color
+
+
+# Ausdehnung der Maßnahmen als [[Süd, West], [Nord, Ost]] (Leaflet-Format); None ohne Maßnahmen
+def collection_bounds(collection):
+    coordinates = [feature['geometry']['coordinates'] for feature in collection['features']]
+    if not coordinates:
+        return None
+    longitudes, latitudes = zip(*coordinates)
+    return [[min(latitudes), min(longitudes)], [max(latitudes), max(longitudes)]]
+
+
+# Schreibt die Kartenseite: je Kennzahl eine Karte (MAP_SPECS), je VNB eine GeoJSON-Datei in data_dir,
+# die CSV-Exporte in csv_dir und ein Manifest (data_dir/manifest.json) mit Datei, Farbe, Anzahl und Bounds je VNB
+# export_vnbs: nur für diese VNB Daten- und CSV-Dateien schreiben (None = alle)
+def build_site(df_valid, bundeslaender_gdf, df_bundesland, output_dir="site", csv_dir="vnb_csv",
+               data_dir="vnb_data", export_vnbs=None):
+    os.makedirs(os.path.join(output_dir, data_dir), exist_ok=True)
+    df_valid, groups = split_vnbs(df_valid)
+    manifest = {'vnb': []}
+    layers = []
+    for vnb, vnb_rows, vnb_invalid, color in groups:
+        collection = vnb_feature_collection(vnb_rows, vnb_invalid)
+        url = f"{data_dir}/{safe_filename(vnb)}.geojson"
+        if export_vnbs is None or vnb in export_vnbs:
+            with open(os.path.join(output_dir, url), 'w', encoding='utf-8') as f:
+                json.dump(collection, f, ensure_ascii=False, separators=(',', ':'))
+        manifest['vnb'].append({
+            'name': vnb,
+            'file': url,
+            'color': color,
+            'count': len(collection['features']),
+            'bounds': collection_bounds(collection),
+        })
+        layers.append(LazyVnbLayer(vnb, url, color))
+    manifest_url = f"{data_dir}/manifest.json"
+    with open(os.path.join(output_dir, manifest_url), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+
+    download_links = export_vnb_csvs(df_valid, groups, os.path.join(output_dir, csv_dir), export_vnbs, href_dir=csv_dir)
+    shared_layers = {
+        'bundesland_popups': [PreRenderedLayer(layer) for layer in build_bundesland_popups(bundeslaender_gdf, df_bundesland)],
+        'vnb_layers': [PreRenderedLayer(layer) for layer in layers],
+        'download_html': build_download_overlay(download_links),
+        'elements': [POPUP_TEMPLATE_SCRIPT, VNB_LOADER_SCRIPT],
+        'manifest_url': manifest_url,
+    }
+    written = []
+    for choropleth_col, fill_color, map_file in MAP_SPECS:
+        output_map = os.path.join(output_dir, map_file)
+        create_map(choropleth_col, fill_color, output_map, bundeslaender_gdf, df_bundesland, shared_layers,
+                   prefer_canvas=True)
+        written.append(output_map)
+    return written
+
+
+# Erstellt die Kartenseite aus den Ergebnissen von geocode_and_map (geokodierte Tabelle und Aggregationswürfel)
+# Kommandozeile: python -m network_expansion_plan map|all ... --site DIR
+def build_site_from_outputs(output_excel="output_geokodiert.xlsx", output_cube="output_cube.parquet",
+                            bundesland_geojson=BUNDESLAND_GEOJSON, output_dir="site"):
+    df_valid = read_table(output_excel)
+    df_bundesland = slice_cube(read_table(table_path(output_cube)), 'Bundesland', METRICS)
+    return build_site(df_valid, load_bundeslaender(bundesland_geojson), df_bundesland, output_dir)
+
+
+if __name__ == "__main__":
+    start = time.time()
+    for path in build_site_from_outputs():
+        print(f"✔️ Interaktive Karte: {path}")
+    print(f"⏱️ Laufzeit: {time.time() - start:.1f} Sekunden")
@@ -0,0 +1,236 @@
+# Dienstmodus: python -m network_expansion_plan watch <Eingaben> -o <Ausgabeordner> [--pdf-dir <PDF-Ordner>]
+# Der Prozess läuft weiter, sodass die Bibliotheken (geopandas, folium, matplotlib, plotly, camelot), der
+# Geokodierer mit SQLite-Cache, die Bundesland-Grenzen mit räumlichem Index sowie die eingelesenen Tabellen je
+# Datei und die Zwischenstände der Schritte zwischen den Läufen im Speicher bleiben. Die Eingaben werden per Polling
+# beobachtet (ohne zusätzliche Abhängigkeit); Änderungen werden gesammelt, bis eine Weile Ruhe ist (z.B. beim
+# Hochladen vieler Dateien), danach laufen nur die Schritte, die laut STAGE_DEPENDENCIES davon abhängen.
+import os
+import time
+
+from .geocoders import build_geocoder
+from .ingest import REPORT_FILE, collect_paths, combine_results, read_workbooks, write_report
+from .pipeline import DEFAULT_SETTINGS, STEPS, run_steps
+
+# Schritte des Dienstmodus; extract (PDF-Extraktion, pdfconvert.py) liefert die Rohtabellen für organize
+WATCH_STAGES = ['extract'] + STEPS
+# Vorgänger je Schritt: Muss ein Schritt neu laufen, laufen alle Nachfolger mit
+STAGE_DEPENDENCIES = {
+    'extract': [],
+    'organize': ['extract'],
+    'geocode': ['organize'],
+    'validate': ['geocode'],
+    'map': ['validate'],
+    'plots': ['validate'],
+}
+# Unterordner des Ausgabeordners für die extrahierten Rohtabellen und die OCR-Ausgaben
+EXTRACTED_DIR = "extrahiert"
+OCR_TEMP_DIR = "temp"
+
+
+# Die Schritte samt aller (auch mittelbaren) Nachfolger in der Reihenfolge von WATCH_STAGES
+def downstream(stages):
+    affected = set(stages)
+    for stage in WATCH_STAGES:
+        if affected & set(STAGE_DEPENDENCIES[stage]):
+            affected.add(stage)
+    return [stage for stage in WATCH_STAGES if stage in affected]
+
+
+# Dateistand {Pfad: (Änderungszeit in ns, Größe)}; nicht (mehr) vorhandene Dateien fehlen
+def snapshot(paths):
+    files = {}
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        files[path] = (stat.st_mtime_ns, stat.st_size)
+    return files
+
+
+# Neue, geänderte und gelöschte Dateien zwischen zwei Dateiständen
+def changed_paths(before, after):
+    return sorted(path for path in before.keys() | after.keys() if before.get(path) != after.get(path))
+
+
+# Sammelt Änderungen ({Pfad: erster betroffener Schritt}), bis debounce_seconds lang keine weitere kam; spätestens
+# max_delay_seconds nach der ersten Änderung ist die Warteschlange bereit, damit ein Dauerstrom an Uploads den
+# Lauf nicht endlos verschiebt
+class ChangeQueue:
+    def __init__(self, debounce_seconds=5.0, max_delay_seconds=60.0):
+        self.debounce_seconds = debounce_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.pending = {}
+        self.first_change = None
+        self.last_change = None
+
+    def add(self, changes, now):
+        if not changes:
+            return
+        self.pending.update(changes)
+        if self.first_change is None:
+            self.first_change = now
+        self.last_change = now
+
+    def ready(self, now):
+        return bool(self.pending) and (now - self.last_change >= self.debounce_seconds
+                                       or now - self.first_change >= self.max_delay_seconds)
+
+    def drain(self):
+        changes, self.pending = self.pending, {}
+        self.first_change = self.last_change = None
+        return changes
+
+
+# Zustand des Dienstes zwischen den Läufen: Dateistand, eingelesene Tabellen je Datei, Zwischenstände der Schritte
+# und Geokodierer (state, siehe pipeline.run_steps) sowie die noch ausstehenden Schritte
+# inputs: Eingabetabellen, Ordner oder Glob-Muster (wie bei run_pipeline); pdf_dir: PDFs für den Schritt extract
+class WatchSession:
+    def __init__(self, inputs, output_dir, pdf_dir=None, settings=DEFAULT_SETTINGS, extract_workers=None,
+                 extraction_cache="extraction_cache", report_options=None):
+        self.inputs = list(inputs)
+        self.output_dir = output_dir
+        self.pdf_dir = pdf_dir
+        self.settings = settings
+        self.extract_workers = extract_workers
+        self.extraction_cache = extraction_cache
+        self.report_options = report_options or {}
+        self.extract_dir = os.path.join(output_dir, EXTRACTED_DIR)
+        if any(os.path.isdir(source) and os.path.abspath(source) == os.path.abspath(output_dir) for source in inputs):
+            raise ValueError("❌ Der Ausgabeordner darf nicht zugleich Eingabeordner sein")
+        if pdf_dir:
+            if not os.path.isdir(pdf_dir):
+                raise ValueError(f"❌ PDF-Ordner nicht gefunden: {pdf_dir}")
+            # camelot, pdf2image und pytesseract werden einmal beim Start geladen
+            from .pdfconvert import convert_pdfs
+            self.convert_pdfs = convert_pdfs
+            os.makedirs(self.extract_dir, exist_ok=True)
+            self.inputs.append(self.extract_dir)
+        if not self.inputs:
+            raise ValueError("❌ Keine Eingaben angegeben (Eingabetabellen oder PDF-Ordner)")
+        self.files = {}
+        self.stages = {}
+        self.frames = {}
+        self.state = {}
+        self.dirty = set(WATCH_STAGES if pdf_dir else STEPS)
+
+    # Beobachtete Dateien und der erste Schritt, den ihre Änderung auslöst
+    def watched(self):
+        stages = {path: 'organize' for path in collect_paths(self.inputs)}
+        if self.pdf_dir:
+            stages.update({
+                os.path.join(self.pdf_dir, f): 'extract' for f in os.listdir(self.pdf_dir) if f.endswith(".pdf")
+            })
+        # Die Grenzen dienen offline bzw. mit Ortsverzeichnis auch dem Geokodierer als Rückfallebene
+        geocoder_uses_boundaries = self.settings.offline or self.settings.gazetteer
+        if self.settings.bundesland_geojson:
+            stages[self.settings.bundesland_geojson] = 'geocode' if geocoder_uses_boundaries else 'validate'
+        if self.settings.gazetteer:
+            stages[self.settings.gazetteer] = 'geocode'
+        return stages
+
+    # Vergleicht den Dateistand mit dem letzten Aufruf; liefert {geänderte Datei: erster betroffener Schritt}
+    def scan(self):
+        watched = self.watched()
+        files = snapshot(watched)
+        stages = {**self.stages, **watched}
+        changes = {path: stages.get(path, 'organize') for path in changed_paths(self.files, files)}
+        self.files, self.stages = files, watched
+        return changes
+
+    # Merkt die von den Änderungen betroffenen Schritte vor
+    def mark(self, changes):
+        paths = list(changes)
+        print(f"📝 {len(paths)} Datei(en) geändert: {', '.join(paths[:5])}{' …' if len(paths) > 5 else ''}")
+        if {self.settings.gazetteer, self.settings.bundesland_geojson} & set(paths):
+            # Ortsverzeichnis bzw. Grenzen neu laden
+            self.state.pop('geocoder', None)
+        self.dirty.update(changes.values())
+
+    # Extrahiert die PDFs (unveränderte Seiten kommen aus dem Extraktions-Cache) und entfernt die Rohtabellen
+    # gelöschter PDFs
+    def extract(self):
+        names = {os.path.splitext(f)[0] for f in os.listdir(self.pdf_dir) if f.endswith(".pdf")}
+        self.convert_pdfs(self.pdf_dir, self.extract_dir, os.path.join(self.output_dir, OCR_TEMP_DIR),
+                          max_workers=self.extract_workers, cache_dir=self.extraction_cache)
+        for file in os.listdir(self.extract_dir):
+            name, extension = os.path.splitext(file)
+            if extension in ('.xlsx', '.parquet') and name not in names:
+                os.remove(os.path.join(self.extract_dir, file))
+        # Selbst geschriebene Rohtabellen nicht als neue Änderung erkennen
+        extracted = collect_paths(self.extract_dir)
+        self.files = {path: stat for path, stat in self.files.items() if os.path.dirname(path) != self.extract_dir}
+        self.files.update(snapshot(extracted))
+
+    # Liest nur neue oder geänderte Tabellen ein und führt alle zusammen (Bericht wie bei run_pipeline)
+    def load(self):
+        paths = collect_paths(self.inputs)
+        if not paths:
+            raise ValueError(f"❌ Keine Eingabetabellen gefunden: {self.inputs}")
+        changed = [path for path in paths if path not in self.frames or self.frames[path][0] != self.files.get(path)]
+        if changed:
+            for path, result in zip(changed, read_workbooks(changed, self.settings.ingest_workers)):
+                self.frames[path] = (self.files.get(path), result)
+        self.frames = {path: self.frames[path] for path in paths}
+        print(f"📥 {len(changed)} von {len(paths)} Tabellen neu eingelesen")
+        df, report = combine_results([self.frames[path][1] for path in paths])
+        report_path = os.path.join(self.output_dir, REPORT_FILE)
+        # Ein veralteter Bericht verschwindet, sobald keine Datei mehr abgelehnt wird
+        if write_report(report, report_path) is None and os.path.exists(report_path):
+            os.remove(report_path)
+        return df
+
+    # Führt die vorgemerkten Schritte samt Nachfolgern aus; nach einem Fehler bleiben sie vorgemerkt und laufen
+    # bei der nächsten Änderung erneut. Liefert die geschriebenen Dateien.
+    def run(self):
+        stages = downstream(self.dirty)
+        start = time.time()
+        print(f"🔁 Schritte: {', '.join(stages)}")
+        written = []
+        try:
+            if 'extract' in stages:
+                self.extract()
+            steps = [step for step in STEPS if step in stages]
+            if steps:
+                if 'geocode' in steps and self.state.get('geocoder') is None:
+                    self.state['geocoder'] = build_geocoder(
+                        gazetteer=self.settings.gazetteer,
+                        bundesland_geojson=self.settings.bundesland_geojson,
+                        offline=self.settings.offline,
+                        nominatim_domain=self.settings.nominatim_domain,
+                        min_delay_seconds=self.settings.min_delay_seconds
+                    )
+                # Eingabe des ersten Schritts: frisch eingelesene Tabellen oder der Zwischenstand des Vorgängers
+                df = self.load() if steps[0] == 'organize' else self.state[STAGE_DEPENDENCIES[steps[0]][0]]
+                written = run_steps(df, self.output_dir, steps, self.settings, state=self.state, **self.report_options)
+        except Exception as e:
+            print(f"⚠️  Lauf abgebrochen, die Schritte bleiben vorgemerkt: {e}")
+            self.dirty = set(stages)
+            return []
+        self.dirty = set()
+        print(f"✅ {len(written)} Dateien in {time.time() - start:.1f} s aktualisiert")
+        return written
+
+
+# Startet den Dienst: baut einmal alle Ergebnisse, prüft danach alle interval_seconds die Eingaben und führt die
+# betroffenen Schritte aus, sobald die Änderungen debounce_seconds lang ruhen; Strg+C beendet den Dienst
+# run_report, profile, trace_memory: Laufbericht je Lauf (siehe profiling.py, Endung .jsonl hängt an)
+def watch(inputs, output_dir, pdf_dir=None, settings=DEFAULT_SETTINGS, interval_seconds=2.0, debounce_seconds=5.0,
+          max_delay_seconds=60.0, extract_workers=None, extraction_cache="extraction_cache", run_report=None,
+          profile=False, trace_memory=False):
+    session = WatchSession(inputs, output_dir, pdf_dir, settings, extract_workers, extraction_cache,
+                           {'run_report': run_report, 'profile': profile, 'trace_memory': trace_memory})
+    queue = ChangeQueue(debounce_seconds, max_delay_seconds)
+    session.scan()
+    session.run()
+    print(f"👀 Beobachte {len(session.files)} Dateien (Strg+C beendet)")
+    try:
+        while True:
+            time.sleep(interval_seconds)
+            now = time.monotonic()
+            queue.add(session.scan(), now)
+            if queue.ready(now):
+                session.mark(queue.drain())
+                session.run()
+    except KeyboardInterrupt:
+        print("👋 Dienst beendet")
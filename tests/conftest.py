@@ -0,0 +1,21 @@
+import os
+
+import pytest
+
+from network_expansion_plan.store import read_table
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_TABLE = os.path.join(ROOT_DIR, "data", "geokodiert_zugestimmt.xlsx")
+BUNDESLAND_GEOJSON = os.path.join(ROOT_DIR, "network_expansion_plan", "2_deutschland.geo.json")
+
+
+# Die mitgelieferte, bereits geokodierte Beispieltabelle (einmal je Testlauf eingelesen)
+@pytest.fixture(scope='session')
+def sample_table():
+    return read_table(SAMPLE_TABLE, prefer_columnar=False)
+
+
+# Kopie der Beispieltabelle, die ein Test verändern darf
+@pytest.fixture
+def sample(sample_table):
+    return sample_table.copy()
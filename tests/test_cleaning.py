@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from network_expansion_plan.cleaning import (clean_numeric_columns, invalid_frame, invalid_mask, is_invalid,
+                                             strip_text, to_number, to_numeric_de)
+from network_expansion_plan.store import NUMERIC_COLUMNS
+
+from .conftest import SAMPLE_TABLE
+
+# Platzhalter, Zahlen mit Dezimalkomma oder -punkt, unlesbare Texte und fehlende Werte wie in den Eingabetabellen
+RAW_VALUES = ['k.A.', ' K.A ', 'ka', 'None', '', '  ', 'nan', 'NaN', None, np.nan, pd.NA, 1, 2.5, -4, '2,5',
+              ' 3,75 ', '\xa01,5', '1.234,5', '1e3', '1,5e2', '+7', '-4', 'inf', 'abc', '0x10', '12 km']
+
+
+@pytest.mark.parametrize('values', [
+    RAW_VALUES,
+    [1, 2.5, np.nan],
+    [1, 2, 3],
+    ['k.A.', 'k.A.', None],
+])
+def test_to_numeric_de_matches_scalar_functions(values):
+    series = pd.Series(values, dtype=object if any(isinstance(v, str) for v in values) else None)
+    numbers, invalid, unparsable = to_numeric_de(series)
+    assert numbers.tolist() == [to_number(v) for v in values]
+    assert invalid.tolist() == [is_invalid(v) for v in values]
+    assert invalid_mask(series).tolist() == [is_invalid(v) for v in values]
+    expected_unparsable = [not is_invalid(v) and to_number(v) == 0 and str(v).strip() not in ('0', '0.0')
+                           for v in values]
+    assert unparsable.tolist() == expected_unparsable
+
+
+def test_to_numeric_de_keeps_index_and_fill_value():
+    series = pd.Series(['1,5', 'k.A.', 'x'], index=[10, 20, 30])
+    numbers, invalid, unparsable = to_numeric_de(series, fill_value=np.nan)
+    assert numbers.index.tolist() == [10, 20, 30]
+    assert numbers.iloc[0] == 1.5 and numbers.iloc[1:].isna().all()
+    assert invalid.tolist() == [False, True, False]
+    assert unparsable.tolist() == [False, False, True]
+
+
+def test_categorical_and_string_columns():
+    for dtype in ('category', 'string'):
+        series = pd.Series(['2,5', 'k.A.', None, '2,5'], dtype=dtype)
+        numbers, invalid, _ = to_numeric_de(series)
+        assert numbers.tolist() == [2.5, 0.0, 0.0, 2.5]
+        assert invalid.tolist() == [False, True, True, False]
+
+
+def test_sample_columns_match_scalar_functions():
+    raw = pd.read_excel(SAMPLE_TABLE)
+    for col in NUMERIC_COLUMNS + ['Ort / Trasse', 'Zeithorizont']:
+        numbers, invalid, _ = to_numeric_de(raw[col])
+        if col in NUMERIC_COLUMNS:
+            assert numbers.tolist() == raw[col].map(to_number).tolist()
+        assert invalid.tolist() == raw[col].map(is_invalid).tolist()
+
+
+def test_clean_numeric_columns_reports_coerced_values():
+    df = pd.DataFrame({'Kosten': ['1,5', 'k.A.', 'k.A.', 'unbekannt', None], 'Text': list('abcde')})
+    cleaned, report = clean_numeric_columns(df, ['Kosten', 'fehlt'])
+    assert cleaned['Kosten'].tolist() == [1.5, 0.0, 0.0, 0.0, 0.0]
+    assert cleaned['Text'].tolist() == list('abcde')
+    assert df['Kosten'].tolist()[0] == '1,5'
+    assert report.groupby('Grund')['Anzahl'].sum().to_dict() == {'nicht lesbar': 1, 'ungültig': 3}
+    rows = {(r.Wert, r.Grund): r.Anzahl for r in report.itertuples() if not pd.isna(r.Wert) and r.Wert != 'None'}
+    assert rows == {('k.A.', 'ungültig'): 2, ('unbekannt', 'nicht lesbar'): 1}
+
+
+def test_invalid_frame_treats_missing_columns_as_invalid():
+    df = pd.DataFrame({'a': ['x', 'k.A.']})
+    assert invalid_frame(df, ['a', 'b']).to_dict('list') == {'a': [False, True], 'b': [True, True]}
+
+
+def test_strip_text_keeps_missing_values():
+    stripped = strip_text(pd.Series(['\xa0Nord ', None, 'Süd']))
+    assert stripped.iloc[0] == 'Nord' and stripped.iloc[2] == 'Süd'
+    assert pd.isna(stripped.iloc[1])
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from network_expansion_plan.cleaning import invalid_frame
+from network_expansion_plan.clustering import (DISABLE_CLUSTERING_AT_ZOOM, PreClusteredMarkers, colocated_points,
+                                               zoom_levels)
+from network_expansion_plan.popups import POPUP_ORDER, popup_values, render_popups
+
+COLUMNS = ['Bundesland', 'Ort / Trasse', 'Projektstatus', 'Kosten in Mio.€', 'VNB-Name', 'latitude', 'longitude']
+
+
+@pytest.fixture
+def rows():
+    return pd.DataFrame({
+        'Bundesland': ['Berlin', 'Berlin', 'Berlin', 'Bayern', 'Berlin', 'Berlin'],
+        'Ort / Trasse': ['UW Mitte', 'UW Mitte', 'UW Mitte', 'UW Nord', 'k.A.', 'UW Ost'],
+        'Projektstatus': ['geplant', 'im Bau', 'k.A.', 'geplant', 'geplant', 'geplant'],
+        'Kosten in Mio.€': [1.5, 2.0, np.nan, 4.0, 1.0, 1.0],
+        'VNB-Name': ['Netz & Co'] * 6,
+        'latitude': [52.52, 52.52, 52.520004, 48.14, 52.0, np.nan],
+        'longitude': [13.40, 13.40, 13.400004, 11.58, 13.0, 13.5],
+    })
+
+
+def points_of(rows):
+    return colocated_points(rows, invalid_frame(rows, COLUMNS))
+
+
+def test_colocated_measures_become_one_point(rows):
+    points = points_of(rows)
+    # k.A. als Ort und fehlende Koordinaten entfallen
+    assert [point[2] for point in points] == [3, 1]
+    lat, lon, count, popup, tooltip = points[0]
+    assert lat == pytest.approx(52.52, abs=1e-5) and lon == pytest.approx(13.40, abs=1e-5)
+    assert tooltip == "UW Mitte (3 Maßnahmen)"
+    assert popup.startswith("<b>3 Maßnahmen</b><br><b>VNB-Name:</b> Netz &amp; Co<br><b>latitude:</b> 52.52")
+    # Eine Tabellenzeile je Maßnahme, ungültige Einträge als leere Zelle, keine Spalte für gemeinsame Angaben
+    assert popup.count("<tr>") == 4 and "<th>VNB-Name</th>" not in popup
+    assert "<td>im Bau</td>" in popup and "<td></td>" in popup
+
+    single = rows.iloc[[3]]
+    expected = render_popups(popup_values(single, invalid_frame(single, COLUMNS), COLUMNS), COLUMNS)[0]
+    assert points[1][2:] == [1, expected, "UW Nord"]
+
+
+def test_distinct_places_with_different_names_share_a_generic_tooltip(rows):
+    rows.loc[1, 'Ort / Trasse'] = 'UW Mitte 2'
+    assert points_of(rows)[0][4] == "3 Maßnahmen"
+
+
+def test_zoom_levels_cluster_far_points_only_when_zoomed_out(rows):
+    points = points_of(rows)
+    levels = zoom_levels(points)
+    assert sorted(levels) == list(range(DISABLE_CLUSTERING_AT_ZOOM))
+    # Weltweit wenige Rasterzellen: Berlin und München in einer Zelle, Anzahl und Schwerpunkt nach Maßnahmen gewichtet
+    cluster_lat, cluster_lon, count = levels[0]['clusters'][0]
+    assert levels[0]['points'] == [] and count == 4
+    assert cluster_lat == pytest.approx((3 * points[0][0] + points[1][0]) / 4, abs=1e-6)
+    assert cluster_lon == pytest.approx((3 * points[0][1] + points[1][1]) / 4, abs=1e-6)
+    assert levels[11] == {'clusters': [], 'points': [0, 1]}
+    first_split = min(zoom for zoom, level in levels.items() if not level['clusters'])
+    assert all(levels[zoom]['points'] == [0, 1] for zoom in range(first_split, DISABLE_CLUSTERING_AT_ZOOM))
+
+
+def test_zoom_levels_without_points():
+    assert zoom_levels([]) == {}
+
+
+def test_pre_clustered_markers_data(rows):
+    invalid = invalid_frame(rows, [col for col in POPUP_ORDER if col in rows.columns])
+    markers = PreClusteredMarkers(rows, invalid, '#123456')
+    assert [point[2] for point in markers.data['points']] == [3, 1]
+    assert markers.data['levels'] == zoom_levels(markers.data['points'])
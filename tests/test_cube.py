@@ -0,0 +1,92 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from network_expansion_plan.cube import (CUBE_COLUMNS, DIMENSIONS, METRICS, build_cube, coverage,
+                                         load_or_build_cube, patch_cube, slice_cube)
+from network_expansion_plan.store import write_table
+
+
+def sorted_cube(cube):
+    cube = cube.astype({col: object for col in DIMENSIONS})
+    return cube.sort_values(DIMENSIONS + ['Kennzahl'], kind='stable', na_position='last').reset_index(drop=True)
+
+
+@pytest.fixture(scope='module')
+def cube(sample_table):
+    return build_cube(sample_table)
+
+
+@pytest.mark.parametrize('by', ['VNB-Name', 'Bundesland', 'Zeithorizont', ['Bundesland', 'Netzebene']])
+def test_slices_match_groupby_on_rows(sample_table, cube, by):
+    keys = [by] if isinstance(by, str) else by
+    grouped = sample_table.groupby(keys, observed=True)
+    expected_sums = grouped[METRICS].sum().reset_index()
+    sums = slice_cube(cube, by, METRICS)
+    pd.testing.assert_frame_equal(sums.astype({k: object for k in keys}),
+                                  expected_sums.astype({k: object for k in keys}), check_dtype=False)
+
+    stated = slice_cube(cube, by, METRICS, value='Angaben')
+    expected_stated = grouped[METRICS].agg(lambda values: int((values != 0).sum())).reset_index()
+    assert stated[METRICS].to_numpy().tolist() == expected_stated[METRICS].to_numpy().tolist()
+
+
+def test_totals_and_coverage(sample_table, cube):
+    totals = slice_cube(cube)
+    assert totals.index.tolist() == METRICS
+    np.testing.assert_allclose(totals.to_numpy(), sample_table[METRICS].sum().to_numpy())
+    assert slice_cube(cube, value='Anzahl').tolist() == [len(sample_table)] * len(METRICS)
+    expected = 100 * (sample_table[METRICS] != 0).sum() / len(sample_table)
+    np.testing.assert_allclose(coverage(cube).to_numpy(), expected.to_numpy())
+
+
+def test_missing_dimensions_and_metrics():
+    df = pd.DataFrame({'VNB-Name': ['A', 'A', 'B'], 'Kosten in Mio.€': ['1,5', 'k.A.', 2]})
+    cube = build_cube(df)
+    assert list(cube.columns) == CUBE_COLUMNS
+    costs = slice_cube(cube, 'VNB-Name', ['Kosten in Mio.€'])
+    assert costs.to_dict('list') == {'VNB-Name': ['A', 'B'], 'Kosten in Mio.€': [1.5, 2.0]}
+    lengths = slice_cube(cube, 'VNB-Name', ['Leitungslänge in km'], value='Angaben')
+    assert lengths['Leitungslänge in km'].tolist() == [0, 0]
+    assert build_cube(df.iloc[:0]).empty
+
+
+def test_empty_cube_keeps_the_cube_dtypes(sample_table, cube):
+    for empty in (build_cube(sample_table.iloc[:0]), build_cube(pd.DataFrame())):
+        assert empty.empty and list(empty.columns) == CUBE_COLUMNS
+        assert all(isinstance(empty[dim].dtype, pd.CategoricalDtype) for dim in DIMENSIONS)
+        assert empty[['Summe', 'Anzahl', 'Angaben']].dtypes.tolist() == cube[['Summe', 'Anzahl', 'Angaben']].dtypes.tolist()
+        assert slice_cube(empty, 'Bundesland')[METRICS].dtypes.tolist() == ['float64'] * len(METRICS)
+        assert coverage(empty).tolist() == [0.0] * len(METRICS)
+
+
+def test_patch_cube_equals_rebuilt_cube(sample_table, cube):
+    changed_vnb, removed_vnb = 'Bonn-Netz GmbH', 'EWR Netz GmbH'
+    df = sample_table[sample_table['VNB-Name'] != removed_vnb].copy()
+    rows = df['VNB-Name'] == changed_vnb
+    df.loc[rows, 'Kosten in Mio.€'] = df.loc[rows, 'Kosten in Mio.€'] + 2
+    df.loc[rows, 'Projektstatus'] = 'abgeschlossen'
+
+    patched = patch_cube(cube, build_cube(df[rows]), {changed_vnb, removed_vnb})
+    pd.testing.assert_frame_equal(sorted_cube(patched), sorted_cube(build_cube(df)))
+
+
+def test_patch_cube_keeps_the_dtypes_with_an_empty_part(cube):
+    removed = patch_cube(cube, pd.DataFrame(columns=CUBE_COLUMNS), {'EWR Netz GmbH'})
+    assert removed[['Summe', 'Anzahl', 'Angaben']].dtypes.tolist() == ['float64', 'int64', 'int64']
+    assert len(removed) == len(cube) - (cube['VNB-Name'] == 'EWR Netz GmbH').sum()
+    assert patch_cube(cube.iloc[:0], cube.iloc[:0], set()).dtypes['Summe'] == 'float64'
+
+
+def test_load_or_build_cube_rebuilds_when_the_table_changes(tmp_path, sample_table):
+    table = str(tmp_path / "output_geokodiert.parquet")
+    write_table(sample_table.head(50), table)
+    first = load_or_build_cube(table)
+    assert os.path.exists(str(tmp_path / "output_geokodiert.cube.parquet"))
+    assert slice_cube(first, value='Anzahl').iloc[0] == 50
+
+    write_table(sample_table.head(80), table)
+    os.utime(table, (os.path.getmtime(table) + 10,) * 2)
+    assert slice_cube(load_or_build_cube(table), value='Anzahl').iloc[0] == 80
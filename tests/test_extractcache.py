@@ -0,0 +1,99 @@
+import os
+import time
+
+import pandas as pd
+
+from network_expansion_plan.cli import build_parser, extraction_cache_dir
+from network_expansion_plan.extractcache import ExtractionCache
+from network_expansion_plan.extraction import DEFAULT_SETTINGS
+from network_expansion_plan.ocrtable import WORD_COLUMNS
+
+
+def pdf(tmp_path, name, content):
+    path = tmp_path / name
+    path.write_bytes(content)
+    return str(path)
+
+
+def words():
+    return pd.DataFrame({'left': [10, 200], 'top': [5, 5], 'width': [40, 60], 'height': [12, 12],
+                         'text': ['Bonn-Netz', 'Ausbau & Ersatz']}).astype(
+        {'left': 'int32', 'top': 'int32', 'width': 'int32', 'height': 'int32'})[WORD_COLUMNS]
+
+
+def test_key_depends_on_content_and_settings(tmp_path):
+    cache = ExtractionCache(str(tmp_path / "cache"))
+    key = cache.key(pdf(tmp_path, "a.pdf", b"%PDF-1 a"), DEFAULT_SETTINGS)
+    assert cache.key(pdf(tmp_path, "kopie.pdf", b"%PDF-1 a"), DEFAULT_SETTINGS) == key
+    assert cache.key(pdf(tmp_path, "b.pdf", b"%PDF-1 b"), DEFAULT_SETTINGS) != key
+    assert cache.key(str(tmp_path / "a.pdf"), DEFAULT_SETTINGS._replace(flavor='stream')) != key
+
+
+def test_tables_and_words_round_trip_without_pickle(tmp_path):
+    cache = ExtractionCache(str(tmp_path / "cache"))
+    key = cache.key(pdf(tmp_path, "a.pdf", b"%PDF-1 a"), DEFAULT_SETTINGS)
+    tables = [pd.DataFrame({0: ['VNB-Name', 'Bonn-Netz GmbH'], 1: ['Ort', 'Bonn']}),
+              pd.DataFrame({0: ['Kosten'], 1: ['1,5'], 2: ['']})]
+    cache.set_page_count(key, 4)
+    cache.set(key, 'tables', 1, tables)
+    cache.set(key, 'tables', 2, [])
+    cache.set(key, 'ocr', 3, words())
+    cache.set(key, 'ocr', 4, None)
+
+    assert cache.get_page_count(key) == 4
+    found, value = cache.get(key, 'tables', 1)
+    assert found and len(value) == 2
+    for cached, table in zip(value, tables):
+        pd.testing.assert_frame_equal(cached, table)
+    assert cache.get(key, 'tables', 2) == (True, [])
+    found, value = cache.get(key, 'ocr', 3)
+    assert found
+    pd.testing.assert_frame_equal(value, words())
+    # OCR-Fehler werden nicht gespeichert
+    assert cache.get(key, 'ocr', 4) == (False, None)
+    assert (cache.hits, cache.misses) == (3, 1)
+    files = os.listdir(os.path.join(cache.directory, key[:2], key))
+    assert not any(file.endswith(('.pkl', '.pkl.gz', '.tmp')) for file in files)
+
+
+def test_unreadable_entries_are_misses_and_removed(tmp_path):
+    cache = ExtractionCache(str(tmp_path / "cache"))
+    key = cache.key(pdf(tmp_path, "a.pdf", b"%PDF-1 a"), DEFAULT_SETTINGS)
+    cache.set(key, 'tables', 1, [pd.DataFrame({0: ['a']})])
+    cache.set(key, 'ocr', 1, words())
+    entry = os.path.join(cache.directory, key[:2], key)
+    with open(os.path.join(entry, "p0001.tables.0.parquet"), 'wb') as f:
+        f.write(b"keine Parquet-Datei")
+    with open(os.path.join(entry, "p0001.ocr.json"), 'w', encoding='utf-8') as f:
+        f.write('{"left": [1]')
+
+    assert cache.get(key, 'tables', 1) == (False, None)
+    assert cache.get(key, 'ocr', 1) == (False, None)
+    assert cache.misses == 2
+    assert not [file for file in os.listdir(entry) if file.startswith('p0001.')]
+
+
+def test_evict_removes_least_recently_used_entries(tmp_path):
+    cache = ExtractionCache(str(tmp_path / "cache"), max_bytes=1)
+    keys = [cache.key(pdf(tmp_path, f"{name}.pdf", name.encode()), DEFAULT_SETTINGS) for name in 'abc']
+    now = time.time()
+    for age, key in zip((300, 100, 200), keys):
+        cache.set(key, 'ocr', 1, words())
+        entry = os.path.join(cache.directory, key[:2], key)
+        os.utime(entry, (now - age, now - age))
+    sizes = {key: sum(f.stat().st_size for f in os.scandir(os.path.join(cache.directory, key[:2], key)))
+             for key in keys}
+
+    # Ein Treffer macht den ältesten Eintrag zum zuletzt benutzten
+    assert cache.get(keys[0], 'ocr', 1)[0]
+    cache.max_bytes = sizes[keys[0]]
+    cache.close()
+    remaining = {key for key in keys if os.path.isdir(os.path.join(cache.directory, key[:2], key))}
+    assert remaining == {keys[0]}
+
+
+def test_cache_defaults_to_the_output_folder():
+    parse = build_parser().parse_args
+    assert extraction_cache_dir(parse(['extract', 'pdfs', '-o', 'aus'])) == os.path.join('aus', "extraction_cache")
+    assert extraction_cache_dir(parse(['extract', 'pdfs', '-o', 'aus', '--cache-dir', 'c'])) == 'c'
+    assert extraction_cache_dir(parse(['watch', '-o', 'aus', '--cache-dir', ''])) is None
@@ -0,0 +1,96 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+from network_expansion_plan import extraction
+from network_expansion_plan.extraction import ExtractionResult, OcrPage, PageExtractor
+
+PAGES = {'tabellen.pdf': 4, 'scan.pdf': 3, 'leer.pdf': 0}
+
+
+# Ersetzt camelot und tesseract: Tabellen nur in tabellen.pdf, OCR-Wörter für jede Seite; spätere Seiten werden
+# früher fertig, sodass die Ergebnisse in umgekehrter Reihenfolge eintreffen
+class StubUnits:
+    def __init__(self, failing=()):
+        self.calls = []
+        self.finished = []
+        self.failing = set(failing)
+        self.lock = threading.Lock()
+
+    def __call__(self, method, pdf_path, page, settings):
+        with self.lock:
+            self.calls.append((method, pdf_path, page))
+        time.sleep(0.02 * (PAGES[pdf_path] - page))
+        with self.lock:
+            self.finished.append(page)
+        if (method, pdf_path, page) in self.failing:
+            raise RuntimeError(f"Seite {page} kaputt")
+        if method == 'ocr':
+            return pd.DataFrame({'text': [f"{pdf_path} {page}"]})
+        if pdf_path == 'tabellen.pdf':
+            return [pd.DataFrame({'seite': [page, page]}), pd.DataFrame({'seite': [page]})]
+        return []
+
+
+@pytest.fixture
+def units(monkeypatch):
+    stub = StubUnits()
+    monkeypatch.setattr(extraction, 'run_unit', stub)
+    monkeypatch.setattr(extraction, 'page_count', lambda pdf_path: PAGES[pdf_path])
+    monkeypatch.setattr(extraction, 'check_tessdata', lambda settings: None)
+    # Threads statt Prozessen, damit der Ersatz für run_unit gilt
+    monkeypatch.setattr(extraction, 'ProcessPoolExecutor', ThreadPoolExecutor)
+    return stub
+
+
+def test_tables_are_reassembled_in_page_order(units):
+    (result,) = list(PageExtractor(max_workers=4).run(['tabellen.pdf']))
+    assert result.method == 'tables' and result.error is None
+    assert [int(table['seite'].iloc[0]) for table in result.tables] == [1, 1, 2, 2, 3, 3, 4, 4]
+    assert [len(table) for table in result.tables] == [2, 1] * 4
+    # Die Seiten wurden tatsächlich in anderer Reihenfolge fertig, als sie eingeplant wurden
+    assert sorted(units.calls) == [('tables', 'tabellen.pdf', page) for page in range(1, 5)]
+    assert units.finished != sorted(units.finished)
+
+
+def test_pdfs_without_tables_fall_back_to_ocr_page_by_page(units, capsys):
+    results = list(PageExtractor(max_workers=3).run(['scan.pdf', 'tabellen.pdf', 'leer.pdf']))
+    ocr = [result for result in results if isinstance(result, OcrPage)]
+    tables = [result for result in results if isinstance(result, ExtractionResult)]
+    assert [(page.page, page.pages) for page in ocr] == [(1, 3), (2, 3), (3, 3)]
+    assert [page.words['text'].iloc[0] for page in ocr] == ["scan.pdf 1", "scan.pdf 2", "scan.pdf 3"]
+    assert {result.pdf_path: len(result.tables) for result in tables} == {'tabellen.pdf': 8, 'leer.pdf': 0}
+    assert sorted(call for call in units.calls if call[0] == 'ocr') == [('ocr', 'scan.pdf', page) for page in (1, 2, 3)]
+    assert "Versuche OCR für scan.pdf" in capsys.readouterr().out
+
+
+def test_sequential_run_gives_the_same_results(units):
+    parallel = list(PageExtractor(max_workers=4).run(['scan.pdf', 'tabellen.pdf']))
+    sequential = list(PageExtractor(max_workers=1).run(['scan.pdf', 'tabellen.pdf']))
+
+    def summary(results):
+        return sorted((type(r).__name__, r.pdf_path, getattr(r, 'page', 0),
+                       len(r.tables) if isinstance(r, ExtractionResult) else r.words['text'].iloc[0])
+                      for r in results)
+    assert summary(parallel) == summary(sequential)
+
+
+def test_page_errors_fail_the_pdf_and_ocr_errors_only_the_page(units, capsys):
+    units.failing = {('tables', 'tabellen.pdf', 2), ('ocr', 'scan.pdf', 2)}
+    results = list(PageExtractor(max_workers=2).run(['tabellen.pdf', 'scan.pdf']))
+    (failed,) = [result for result in results if isinstance(result, ExtractionResult)]
+    assert failed.pdf_path == 'tabellen.pdf' and failed.tables == [] and "Seite 2" in str(failed.error)
+    ocr = [result for result in results if isinstance(result, OcrPage)]
+    assert [page.page for page in ocr] == [1, 2, 3] and ocr[1].words is None
+    assert "OCR-Fehler auf Seite 2 (scan.pdf)" in capsys.readouterr().out
+
+
+def test_missing_tessdata_is_reported_per_pdf(units, monkeypatch):
+    def missing(settings):
+        raise FileNotFoundError("deu.traineddata fehlt")
+    monkeypatch.setattr(extraction, 'check_tessdata', missing)
+    (result,) = list(PageExtractor(max_workers=2).run(['scan.pdf']))
+    assert result.method == 'ocr' and isinstance(result.error, FileNotFoundError)
@@ -0,0 +1,91 @@
+from network_expansion_plan.geocache import GeocodeCache, normalize_query, resolve_queries
+from network_expansion_plan.geocoders import GeoResult, nominatim_geocoder
+
+
+class CountingGeocoder:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, query):
+        self.calls.append(query)
+        return None if query.startswith("Nirgendwo") else GeoResult(query.strip(), 52.0, 13.0)
+
+
+def test_normalize_query():
+    assert normalize_query("  Berlin,\tDeutschland ") == normalize_query("berlin, DEUTSCHLAND")
+
+
+def test_each_normalized_query_is_geocoded_once(tmp_path):
+    geocode = CountingGeocoder()
+    queries = ["Berlin, Deutschland", "berlin,  Deutschland", "Berlin, Deutschland", "Hamburg, Deutschland"]
+    with GeocodeCache(str(tmp_path / "cache.sqlite")) as cache:
+        results = resolve_queries(queries, geocode, cache)
+    assert geocode.calls == ["Berlin, Deutschland", "Hamburg, Deutschland"]
+    assert set(results) == set(queries)
+    assert results["berlin,  Deutschland"] == results["Berlin, Deutschland"]
+
+
+def test_cached_results_are_reused_for_every_spelling(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    with GeocodeCache(path) as cache:
+        resolve_queries(["Berlin, Deutschland", "Nirgendwo, Deutschland"], CountingGeocoder(), cache)
+
+    geocode = CountingGeocoder()
+    with GeocodeCache(path) as cache:
+        results = resolve_queries(["BERLIN, Deutschland", "berlin, deutschland", "Nirgendwo, Deutschland"],
+                                  geocode, cache)
+        assert (cache.hits, cache.misses) == (2, 0)
+    assert geocode.calls == []
+    assert results["berlin, deutschland"] == ("Berlin, Deutschland", 52.0, 13.0)
+    # Erfolglose Anfragen werden ebenfalls gespeichert
+    assert results["Nirgendwo, Deutschland"] == (None, None, None)
+
+
+def test_namespaces_are_separate(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    with GeocodeCache(path, namespace="offline") as cache:
+        resolve_queries(["Berlin, Deutschland"], CountingGeocoder(), cache)
+    with GeocodeCache(path) as cache:
+        assert cache.get_many(["Berlin, Deutschland"]) == {}
+
+
+def test_parallel_lookups_match_sequential():
+    queries = [f"Ort {i}, Deutschland" for i in range(120)]
+    sequential = resolve_queries(queries, CountingGeocoder())
+    parallel = resolve_queries(queries, CountingGeocoder(), max_workers=4)
+    assert parallel == sequential
+
+
+def test_geocoder_errors_are_not_cached(tmp_path, capsys):
+    def flaky(query):
+        if query.startswith("Hamburg"):
+            raise TimeoutError("Zeitüberschreitung")
+        return GeoResult(query, 52.0, 13.0)
+
+    path = str(tmp_path / "cache.sqlite")
+    with GeocodeCache(path) as cache:
+        results = resolve_queries(["Berlin, Deutschland", "Hamburg, Deutschland"], flaky, cache)
+    assert results["Hamburg, Deutschland"] == (None, None, None)
+    assert "1 Orte wegen Fehlern" in capsys.readouterr().out
+
+    geocode = CountingGeocoder()
+    with GeocodeCache(path) as cache:
+        results = resolve_queries(["Berlin, Deutschland", "Hamburg, Deutschland"], geocode, cache)
+    assert geocode.calls == ["Hamburg, Deutschland"]
+    assert results["Hamburg, Deutschland"] == ("Hamburg, Deutschland", 52.0, 13.0)
+
+
+def test_not_found_places_expire_after_the_negative_ttl(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    with GeocodeCache(path) as cache:
+        resolve_queries(["Berlin, Deutschland", "Nirgendwo, Deutschland"], CountingGeocoder(), cache)
+        cache.conn.execute("UPDATE geocode SET created = created - 8 * 86400")
+        cache.conn.commit()
+        assert list(cache.get_many(["Berlin, Deutschland", "Nirgendwo, Deutschland"])) == ["Berlin, Deutschland"]
+    with GeocodeCache(path) as cache:
+        assert cache.conn.execute("SELECT COUNT(*) FROM geocode").fetchone() == (1,)
+
+
+def test_nominatim_passes_errors_on():
+    geocode = nominatim_geocoder(min_delay_seconds=0, max_retries=0)
+    assert geocode.swallow_exceptions is False
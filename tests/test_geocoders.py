@@ -0,0 +1,95 @@
+import json
+import os
+
+import pytest
+
+from network_expansion_plan.geocoders import FallbackGeocoder, Gazetteer, GeoResult
+
+from .conftest import BUNDESLAND_GEOJSON
+
+GAZETTEER_CSV = """name;bundesland;latitude;longitude
+Hattingen;Nordrhein-Westfalen;51.399;7.186
+Gevelsberg;Nordrhein-Westfalen;51.320;7.340
+Hattingen;Bayern;48.000;11.000
+Frankfurt (Oder);Brandenburg;52.342;14.550
+"""
+
+
+@pytest.fixture
+def gazetteer_csv(tmp_path):
+    path = tmp_path / "gemeinden.csv"
+    path.write_text(GAZETTEER_CSV, encoding='utf-8')
+    return str(path)
+
+
+def test_exact_lookup_ignores_case_whitespace_and_country(gazetteer_csv):
+    gazetteer = Gazetteer(gazetteer_csv)
+    result = gazetteer("  gevelsberg ,  Deutschland")
+    assert result == GeoResult("Gevelsberg, Nordrhein-Westfalen, Deutschland", 51.320, 7.340)
+
+
+def test_exact_lookup_strips_station_prefixes(gazetteer_csv):
+    assert Gazetteer(gazetteer_csv)("UW Hattingen, Deutschland").latitude == 51.399
+
+
+def test_first_entry_wins_for_duplicate_names(gazetteer_csv):
+    assert Gazetteer(gazetteer_csv)("Hattingen").address == "Hattingen, Nordrhein-Westfalen, Deutschland"
+
+
+def test_fuzzy_lookup(gazetteer_csv):
+    gazetteer = Gazetteer(gazetteer_csv)
+    assert gazetteer("Hatingen, Deutschland").address.startswith("Hattingen")
+    assert gazetteer.lookup("Hatingen, Deutschland", fuzzy=False) is None
+    assert gazetteer("Gelsenkirchen, Deutschland") is None
+
+
+def test_bundeslaender_as_fallback(gazetteer_csv):
+    gazetteer = Gazetteer(gazetteer_csv, bundesland_geojson=BUNDESLAND_GEOJSON)
+    result = gazetteer("Brandenburg, Deutschland")
+    assert result.address == "Brandenburg, Deutschland"
+    assert 51 < result.latitude < 54 and 11 < result.longitude < 15
+
+
+def test_missing_columns_are_rejected(tmp_path):
+    path = tmp_path / "kaputt.csv"
+    path.write_text("ort;lat\nHattingen;51.4\n", encoding='utf-8')
+    with pytest.raises(ValueError, match="Spalten fehlen"):
+        Gazetteer(str(path))
+
+
+def test_index_is_cached_as_json_and_refreshed_when_the_csv_changes(gazetteer_csv):
+    Gazetteer(gazetteer_csv)
+    index_path = f"{gazetteer_csv}.idx.json"
+    with open(index_path, encoding='utf-8') as f:
+        cached = json.load(f)
+    assert cached['index']['gevelsberg'] == ["Gevelsberg, Nordrhein-Westfalen, Deutschland", 51.32, 7.34]
+    assert Gazetteer(gazetteer_csv)("Gevelsberg").latitude == 51.320
+
+    with open(gazetteer_csv, 'a', encoding='utf-8') as f:
+        f.write("Sprockhövel;Nordrhein-Westfalen;51.366;7.249\n")
+    assert Gazetteer(gazetteer_csv)("Sprockhövel").latitude == 51.366
+
+
+def test_unreadable_index_is_rebuilt(gazetteer_csv):
+    Gazetteer(gazetteer_csv)
+    with open(f"{gazetteer_csv}.idx.json", 'w', encoding='utf-8') as f:
+        f.write("kein json")
+    assert Gazetteer(gazetteer_csv)("Gevelsberg").latitude == 51.320
+    assert not os.path.exists(f"{gazetteer_csv}.idx.json.tmp")
+
+
+def test_fallback_geocoder_uses_first_result():
+    calls = []
+
+    def offline(query):
+        calls.append(('offline', query))
+        return GeoResult("Hattingen", 1.0, 2.0) if query == "Hattingen" else None
+
+    def online(query):
+        calls.append(('online', query))
+        return GeoResult(query, 3.0, 4.0)
+
+    geocode = FallbackGeocoder(offline, None, online)
+    assert geocode("Hattingen").latitude == 1.0
+    assert geocode("Witten").latitude == 3.0
+    assert calls == [('offline', "Hattingen"), ('offline', "Witten"), ('online', "Witten")]
@@ -0,0 +1,120 @@
+import os
+
+import pandas as pd
+import pytest
+
+from network_expansion_plan.cube import DIMENSIONS
+from network_expansion_plan.Foliumwebapp import geocode_and_map, safe_filename
+from network_expansion_plan.incremental import fingerprint_vnbs, plan_update, save_manifest
+from network_expansion_plan.store import read_table, table_path, write_table
+
+from .conftest import BUNDESLAND_GEOJSON
+
+VNBS = ['Bonn-Netz GmbH', 'Stadtwerke Jena Netze GmbH', 'SWE Netz GmbH (Erfurt)', 'EWR Netz GmbH']
+
+
+# Kategorien als Text, damit Tabellen mit unterschiedlichen Kategorienmengen vergleichbar sind
+def plain(df):
+    df = df.reset_index(drop=True)
+    return df.astype({col: object for col in df.columns if isinstance(df[col].dtype, pd.CategoricalDtype)})
+
+
+def run(input_path, output_dir, incremental):
+    geocode_and_map(
+        input_path,
+        output_excel=os.path.join(output_dir, "output_geokodiert.xlsx"),
+        output_failure=os.path.join(output_dir, "output_failure.xlsx"),
+        output_map=os.path.join(output_dir, "interaktive_karte_kosten.html"),
+        output_cube=os.path.join(output_dir, "output_cube.parquet"),
+        manifest_path=os.path.join(output_dir, "run_manifest.json"),
+        bundesland_geojson=BUNDESLAND_GEOJSON,
+        geocode_cache=None,
+        offline=True,
+        incremental=incremental,
+    )
+    return {
+        'valid': plain(read_table(os.path.join(output_dir, "output_geokodiert.parquet"))),
+        'invalid': plain(read_table(os.path.join(output_dir, "output_failure.parquet"))),
+        'cube': plain(read_table(os.path.join(output_dir, "output_cube.parquet"))
+                      .sort_values(DIMENSIONS + ['Kennzahl'], kind='stable')),
+        'csv': sorted(os.listdir(os.path.join(output_dir, "vnb_csv"))),
+    }
+
+
+@pytest.fixture
+def subset(sample):
+    df = sample[sample['VNB-Name'].isin(VNBS)].copy()
+    df['VNB-Name'] = df['VNB-Name'].cat.remove_unused_categories()
+    return df.reset_index(drop=True)
+
+
+def test_incremental_run_equals_full_run(tmp_path, subset, capsys):
+    input_path = str(tmp_path / "eingabe.parquet")
+    write_table(subset, input_path)
+    first = run(input_path, str(tmp_path / "inkrementell"), incremental=True)
+
+    # Ein VNB mit geänderten Kosten und teils falschen Koordinaten, ein entfernter VNB
+    changed = subset[subset['VNB-Name'] != VNBS[2]].copy()
+    jena = changed['VNB-Name'] == VNBS[1]
+    changed.loc[jena, 'Kosten in Mio.€'] = changed.loc[jena, 'Kosten in Mio.€'] + 1.5
+    changed.loc[jena[jena].index[:2], 'latitude'] = 0.0
+    write_table(changed, input_path)
+
+    capsys.readouterr()
+    incremental = run(input_path, str(tmp_path / "inkrementell"), incremental=True)
+    assert "Inkrementeller Lauf: 1 geänderte, 1 entfernte VNB" in capsys.readouterr().out
+    full = run(input_path, str(tmp_path / "voll"), incremental=False)
+
+    pd.testing.assert_frame_equal(incremental['valid'], full['valid'])
+    pd.testing.assert_frame_equal(incremental['invalid'], full['invalid'])
+    assert len(full['invalid']) == 2
+    pd.testing.assert_frame_equal(incremental['cube'].reset_index(drop=True), full['cube'].reset_index(drop=True))
+    assert incremental['csv'] == full['csv']
+    removed_csv = f"{safe_filename(VNBS[2])}.csv"
+    assert removed_csv in first['csv'] and removed_csv not in incremental['csv']
+
+
+def test_removing_and_adding_back_a_vnb_keeps_the_cube_typed(tmp_path, subset, capsys):
+    input_path = str(tmp_path / "eingabe.parquet")
+    output_dir = str(tmp_path / "inkrementell")
+    subset = subset[subset['VNB-Name'] != VNBS[3]]
+    write_table(subset, input_path)
+    first = run(input_path, output_dir, incremental=True)
+
+    # Nur entfernen: der Teilwürfel des Laufs ist leer
+    write_table(subset[subset['VNB-Name'] != VNBS[2]], input_path)
+    capsys.readouterr()
+    removed = run(input_path, output_dir, incremental=True)
+    assert "Inkrementeller Lauf: 0 geänderte, 1 entfernte VNB" in capsys.readouterr().out
+    assert removed['cube'][['Summe', 'Anzahl', 'Angaben']].dtypes.tolist() == ['float64', 'int64', 'int64']
+
+    write_table(subset, input_path)
+    again = run(input_path, output_dir, incremental=True)
+    pd.testing.assert_frame_equal(again['cube'].reset_index(drop=True), first['cube'].reset_index(drop=True))
+    pd.testing.assert_frame_equal(again['valid'], first['valid'])
+    assert again['csv'] == first['csv']
+
+
+def test_fingerprints_only_change_for_the_changed_vnb(subset):
+    before = fingerprint_vnbs(subset)
+    changed = subset.copy()
+    changed.loc[changed['VNB-Name'] == VNBS[0], 'Kosten in Mio.€'] += 1
+    after = fingerprint_vnbs(changed)
+    assert set(before) == set(VNBS)
+    assert {vnb for vnb in VNBS if before[vnb] != after[vnb]} == {VNBS[0]}
+
+
+def test_plan_update(tmp_path):
+    manifest_path = str(tmp_path / "run_manifest.json")
+    output = tmp_path / "output.parquet"
+    output.write_bytes(b"")
+    fingerprints = {'A': '1', 'B': '2'}
+    assert plan_update(manifest_path, fingerprints, 's', [str(output)]) is None
+
+    save_manifest(manifest_path, {'settings': 's', 'vnb': {'A': {'fingerprint': '1'}, 'C': {'fingerprint': '3'}}})
+    plan = plan_update(manifest_path, fingerprints, 's', [str(output)])
+    assert plan.changed == {'B'}
+    assert plan.removed == {'C'}
+    # Geänderte Einstellungen oder fehlende Ausgaben erzwingen einen vollständigen Lauf
+    assert plan_update(manifest_path, fingerprints, 'andere', [str(output)]) is None
+    assert plan_update(manifest_path, fingerprints, 's', [str(tmp_path / "fehlt.parquet")]) is None
@@ -0,0 +1,124 @@
+import os
+
+import pandas as pd
+import pytest
+
+from network_expansion_plan.ingest import (REPORT_COLUMNS, collect_paths, harmonize, ingest, normalize_column,
+                                           read_workbook, write_report)
+from network_expansion_plan.store import write_table
+
+
+def workbook(vnb, bundesland='Berlin', n=3, **columns):
+    data = {
+        'VNB-Name': [vnb] * n,
+        'Bundesland': [bundesland] * n,
+        'Ort / Trasse': [f"Ort {i}" for i in range(n)],
+        'Kosten in Mio.€': ['1,5', 'k.A.', 2][:n],
+    }
+    data.update(columns)
+    return pd.DataFrame(data)
+
+
+def test_normalize_column():
+    assert normalize_column(" Kosten in\xa0Mio.€ ") == normalize_column("kosten_mio €")
+    assert normalize_column("Ort/Trasse") == "ort trasse"
+
+
+def test_harmonize_renames_aliases_and_unifies_dtypes():
+    raw = pd.DataFrame({
+        'Netzbetreiber': ['A', 'A '],
+        'Land': ['Berlin', 'Berlin'],
+        'Ort': ['UW Nord', None],
+        'Kosten': ['1,5', 'k.A.'],
+        'Fertigstellung': [2026, '2030+'],
+        'Status': [None, 'geplant'],
+        'Lat': ['52.5', None],
+        'Bemerkung': ['x', 'y'],
+        'Unnamed: 9': [None, None],
+    })
+    df, reason, ignored = harmonize(raw)
+    assert reason is None
+    assert ignored == ['Bemerkung']
+    assert list(df.columns) == ['VNB-Name', 'Bundesland', 'Ort / Trasse', 'Projektstatus', 'Zeithorizont',
+                                'Kosten in Mio.€', 'latitude']
+    assert isinstance(df['VNB-Name'].dtype, pd.CategoricalDtype)
+    assert df['VNB-Name'].tolist() == ['A', 'A']
+    assert df['Zeithorizont'].tolist() == ['2026', '2030+']
+    # Jahreszahlen aus einer Zahlenspalte mit Lücken (float) ohne Nachkommastellen
+    years, _, _ = harmonize(raw.assign(Fertigstellung=[2026.0, None]))
+    assert years['Zeithorizont'].iloc[0] == '2026' and pd.isna(years['Zeithorizont'].iloc[1])
+    assert df['Kosten in Mio.€'].tolist() == [1.5, 0.0]
+    assert df['latitude'].iloc[0] == 52.5 and pd.isna(df['latitude'].iloc[1])
+    assert df['Ort / Trasse'].iloc[0] == 'UW Nord' and pd.isna(df['Ort / Trasse'].iloc[1])
+
+
+def test_harmonize_rejects_missing_and_duplicate_columns():
+    df, reason, _ = harmonize(pd.DataFrame({'VNB-Name': ['A'], 'Ort / Trasse': ['x']}))
+    assert df is None and reason == "Pflichtspalten fehlen: Bundesland"
+    df, reason, _ = harmonize(pd.DataFrame({'VNB': ['A'], 'Netzbetreiber': ['A'], 'Land': ['Berlin'], 'Ort': ['x']}))
+    assert df is None and reason.startswith("Spalte 'VNB-Name' mehrfach")
+
+
+def test_read_workbook_reports_unreadable_and_empty_files(tmp_path):
+    broken = tmp_path / "kaputt.xlsx"
+    broken.write_bytes(b"keine Arbeitsmappe")
+    result = read_workbook(str(broken))
+    assert result.frame is None and result.reason.startswith("nicht lesbar")
+
+    empty = str(tmp_path / "leer.csv")
+    workbook('A').iloc[:0].to_csv(empty, index=False)
+    assert read_workbook(empty).reason == "keine Zeilen"
+
+
+def test_collect_paths_skips_columnar_copies_and_lock_files(tmp_path):
+    for name in ("a.xlsx", "b.csv", "c.parquet", "~$a.xlsx", "notiz.txt"):
+        (tmp_path / name).write_bytes(b"")
+    write_table(workbook('A'), str(tmp_path / "a.parquet"))
+    expected = [str(tmp_path / name) for name in ("a.xlsx", "b.csv", "c.parquet")]
+    assert collect_paths(str(tmp_path)) == expected
+    assert collect_paths(str(tmp_path / "*.csv")) == [str(tmp_path / "b.csv")]
+    assert collect_paths([str(tmp_path / "b.csv"), str(tmp_path)]) == [str(tmp_path / "b.csv")] + expected[::2]
+
+
+@pytest.fixture
+def inputs(tmp_path):
+    directory = tmp_path / "vnb"
+    directory.mkdir()
+    workbook('A', 'Berlin').to_excel(directory / "a.xlsx", index=False)
+    workbook('B', 'Hamburg', Status=['geplant'] * 3, Extra=[1, 2, 3]).to_csv(directory / "b.csv", index=False)
+    write_table(workbook('C', 'Bayern', n=2), str(directory / "c.parquet"))
+    workbook('D').drop(columns=['Bundesland']).to_csv(directory / "d.csv", index=False)
+    return str(directory)
+
+
+@pytest.mark.parametrize('max_workers', [1, 2])
+def test_ingest_combines_files_and_reports_rejections(inputs, max_workers):
+    df, report = ingest(inputs, max_workers=max_workers)
+    assert df['VNB-Name'].tolist() == ['A'] * 3 + ['B'] * 3 + ['C'] * 2
+    assert isinstance(df['Bundesland'].dtype, pd.CategoricalDtype)
+    assert sorted(df['Bundesland'].cat.categories) == ['Bayern', 'Berlin', 'Hamburg']
+    assert df['Projektstatus'].tolist()[3:6] == ['geplant'] * 3 and df['Projektstatus'].isna().sum() == 5
+    assert df['Kosten in Mio.€'].tolist() == [1.5, 0.0, 2.0] * 2 + [1.5, 0.0]
+
+    assert list(report.columns) == REPORT_COLUMNS
+    rows = {os.path.basename(path): (status, reason, columns) for path, status, reason, columns in report.values}
+    assert rows == {
+        'b.csv': ('übernommen', 'Spalten nicht im Schema ignoriert', 'Extra'),
+        'd.csv': ('abgelehnt', 'Pflichtspalten fehlen: Bundesland', ''),
+    }
+
+
+def test_ingest_fails_when_all_files_are_rejected(tmp_path):
+    workbook('A').drop(columns=['VNB-Name']).to_csv(tmp_path / "a.csv", index=False)
+    with pytest.raises(ValueError, match="abgelehnt"):
+        ingest(str(tmp_path))
+    with pytest.raises(ValueError, match="Keine Eingabetabellen"):
+        ingest(str(tmp_path / "*.xlsx"))
+
+
+def test_write_report_only_with_entries(tmp_path):
+    path = str(tmp_path / "bericht" / "eingabe_bericht.csv")
+    assert write_report(pd.DataFrame(columns=REPORT_COLUMNS), path) is None
+    report = pd.DataFrame([("a.csv", "abgelehnt", "nicht lesbar", "")], columns=REPORT_COLUMNS)
+    assert write_report(report, path) == path
+    assert pd.read_csv(path, sep=';', encoding='utf-8-sig').shape == (1, 4)
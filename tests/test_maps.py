@@ -0,0 +1,96 @@
+import html
+import re
+
+import folium
+import pytest
+
+from network_expansion_plan.cleaning import invalid_mask
+from network_expansion_plan.cube import METRICS, build_cube, slice_cube
+from network_expansion_plan.Foliumwebapp import MAP_SPECS, build_shared_layers, build_vnb_layers, create_map
+from network_expansion_plan.popups import POPUP_ORDER, POPUP_TEMPLATE_SCRIPT
+from network_expansion_plan.validation import load_bundeslaender
+
+from .conftest import BUNDESLAND_GEOJSON
+from .test_popups import template_popup
+
+VNBS = ['Stadtwerke Jena Netze GmbH', 'SWE Netz GmbH (Erfurt)', 'Energienetze Mittelrhein GmbH & Co. KG']
+MAP_NAME = "map_netzausbau"
+
+
+@pytest.fixture(scope='module')
+def bundeslaender():
+    return load_bundeslaender(BUNDESLAND_GEOJSON)
+
+
+@pytest.fixture(scope='module')
+def table(sample_table):
+    return sample_table[sample_table['VNB-Name'].isin(VNBS)].reset_index(drop=True)
+
+
+# Schreibt alle Karten aus MAP_SPECS mit denselben gemeinsamen Layern; liefert die Layer und die HTML-Texte
+def render_maps(table, bundeslaender, output_dir, marker_mode):
+    df_bundesland = slice_cube(build_cube(table), 'Bundesland', METRICS)
+    shared = build_shared_layers(table, bundeslaender, df_bundesland, str(output_dir / "vnb_csv"), marker_mode)
+    pages = []
+    for choropleth_col, fill_color, map_file in MAP_SPECS:
+        create_map(choropleth_col, fill_color, str(output_dir / map_file), bundeslaender, df_bundesland, shared)
+        pages.append((output_dir / map_file).read_text(encoding='utf-8'))
+    return shared, pages
+
+
+def marker_names(page):
+    return re.findall(r"var (circle_marker_[0-9a-f]+) = L\.circleMarker\(", page)
+
+
+def test_shared_layers_are_rendered_once_into_every_map(tmp_path, table, bundeslaender):
+    shared, pages = render_maps(table, bundeslaender, tmp_path, "circle")
+    # Nach der ersten Karte bleiben nur die Fragmente, die Marker-Objekte sind freigegeben
+    assert all(layer.layer is None and layer.fragments for layer in shared['vnb_layers'])
+    expected_markers = int((~invalid_mask(table['Ort / Trasse'])).sum())
+    first_markers = marker_names(pages[0])
+    assert len(first_markers) == expected_markers
+
+    for page in pages:
+        assert page.count(f"var {MAP_NAME} = L.map(") == 1
+        assert marker_names(page) == first_markers
+        for layer in shared['vnb_layers']:
+            name = layer.get_name()
+            assert page.count(f"var {name} = L.featureGroup(") == 1
+            assert page.count(f" : {name},") == 1  # Eintrag im LayerControl
+        for layer in shared['bundesland_popups']:
+            assert page.count(f"{layer.get_name()}.addTo({MAP_NAME});") == 1
+        # Alle Layer hängen an der Karte dieser Seite, keine an einer anderen Karte
+        assert set(re.findall(r"\.addTo\((map_[0-9a-z]+)\)", page)) == {MAP_NAME}
+
+
+# Kinder der MarkerCluster eines VNB-Layers
+def cluster_children(layer):
+    return [child for cluster in layer._children.values() for child in cluster._children.values()]
+
+
+def test_geojson_mode_has_one_feature_per_valid_row_with_the_circle_popups(tmp_path, table):
+    circle_layers, _ = build_vnb_layers(table, str(tmp_path / "csv"), "circle")
+    geojson_layers, _ = build_vnb_layers(table, str(tmp_path / "csv"), "geojson")
+    assert [layer.layer_name for layer in geojson_layers] == [layer.layer_name for layer in circle_layers]
+    features = 0
+    for circle_layer, geojson_layer in zip(circle_layers, geojson_layers):
+        markers = cluster_children(circle_layer)
+        (layer,) = cluster_children(geojson_layer)
+        assert isinstance(layer, folium.GeoJson)
+        assert len(layer.data['features']) == len(markers)
+        for feature, marker in zip(layer.data['features'], markers):
+            popup = next(child for child in marker._children.values() if isinstance(child, folium.Popup))
+            tooltip = next(child for child in marker._children.values() if isinstance(child, folium.Tooltip))
+            values = feature['properties']['popup']
+            assert feature['geometry']['coordinates'] == [marker.location[1], marker.location[0]]
+            assert template_popup(values) == next(iter(popup.html._children.values())).data
+            assert values[POPUP_ORDER.index('Ort / Trasse')] == html.escape(tooltip.text)
+        features += len(markers)
+    assert features == int((~invalid_mask(table['Ort / Trasse'])).sum())
+
+
+def test_geojson_maps_include_the_popup_template_once(tmp_path, table, bundeslaender):
+    shared, pages = render_maps(table, bundeslaender, tmp_path, "geojson")
+    for page in pages:
+        assert page.count("var vnbPopups = {") == 1 and POPUP_TEMPLATE_SCRIPT.strip() in page
+        assert page.count("vnbPopups.bind") == len(shared['vnb_layers'])
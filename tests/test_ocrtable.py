@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+
+from network_expansion_plan.ocrtable import (OcrTableParser, assign_columns, infer_boundaries, misfit_share,
+                                             page_lines, table_lines)
+
+HEIGHT = 20
+
+
+# Wortboxen wie page_words: je Zeile eine Liste (left, width, text), Zeilen im Abstand von 2 Zeilenhöhen
+def words(lines):
+    rows = [
+        (left, 2 * HEIGHT * i, width, HEIGHT, text)
+        for i, line in enumerate(lines) for left, width, text in line
+    ]
+    return pd.DataFrame(rows, columns=['left', 'top', 'width', 'height', 'text'])
+
+
+def three_columns(n, offset=0):
+    return [[(50, 100, f"Ort{offset + i}"), (220, 200, f"Maßnahme{offset + i}"), (520, 60, str(offset + i))]
+            for i in range(n)]
+
+
+def two_columns(n):
+    return [[(50, 300, f"Beschreibung{i}"), (450, 150, f"{i},5")] for i in range(n)]
+
+
+HEADING = [(50, 650, "Netzausbauplan")]
+
+
+def test_page_lines_splits_cells_at_gaps():
+    lines, height = page_lines(words([[(50, 40, "UW"), (95, 60, "Hattingen"), (300, 40, "2026")]]))
+    assert height == HEIGHT
+    assert lines == [[(50, 155, "UW Hattingen"), (300, 340, "2026")]]
+
+
+def test_heading_does_not_hide_column_gaps_on_short_pages():
+    lines, _ = page_lines(words([HEADING] + three_columns(7)))
+    boundaries = infer_boundaries(lines, min_gap=0.8 * HEIGHT)
+    assert len(boundaries) == 2
+    assert 150 < boundaries[0] < 220 and 420 < boundaries[1] < 520
+    assert infer_boundaries(page_lines(words([HEADING] + three_columns(19)))[0], 0.8 * HEIGHT).tolist() == \
+        boundaries.tolist()
+
+
+def test_table_lines_keeps_rows_and_short_single_cells():
+    lines = [[(50, 700, "Überschrift")], [(50, 100, "Fortsetzung")], [(50, 150, "a"), (220, 420, "b")]]
+    assert table_lines(lines) == lines[1:]
+
+
+def test_assign_columns_joins_cells_in_the_same_column():
+    rows = assign_columns([[(50, 100, "UW"), (110, 150, "Nord"), (520, 580, "3")]], np.array([200, 500]))
+    assert rows == [["UW Nord", "", "3"]]
+
+
+def test_misfit_share():
+    boundaries = np.array([200, 500])
+    assert misfit_share(page_lines(words(three_columns(5)))[0], boundaries) == 0
+    assert misfit_share(page_lines(words(two_columns(5)))[0], boundaries) == 1
+
+
+def test_parser_waits_for_enough_lines_and_keeps_boundaries_across_pages():
+    parser = OcrTableParser()
+    assert parser.feed(words([HEADING] + three_columns(5))) == []
+    rows = parser.feed(words(three_columns(5, offset=5)))
+    assert parser.n_columns == 3
+    assert rows[0] == ["", "Netzausbauplan", ""]
+    assert rows[1] == ["Ort0", "Maßnahme0", "0"]
+    assert len(rows) == 11
+    # Kurze Folgeseite mit derselben Tabelle
+    assert parser.feed(words(three_columns(2, offset=10))) == [["Ort10", "Maßnahme10", "10"],
+                                                                ["Ort11", "Maßnahme11", "11"]]
+    assert parser.flush() == []
+
+
+def test_parser_reinfers_when_a_page_does_not_fit():
+    parser = OcrTableParser()
+    parser.feed(words(three_columns(8)))
+    assert parser.n_columns == 3
+    rows = parser.feed(words(two_columns(8)))
+    assert parser.n_columns == 2
+    assert rows[0] == ["Beschreibung0", "0,5"]
+
+
+def test_flush_infers_from_few_lines():
+    parser = OcrTableParser()
+    assert parser.feed(words(three_columns(3))) == []
+    assert parser.flush() == [["Ort0", "Maßnahme0", "0"], ["Ort1", "Maßnahme1", "1"], ["Ort2", "Maßnahme2", "2"]]
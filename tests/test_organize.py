@@ -0,0 +1,41 @@
+import pandas as pd
+
+from network_expansion_plan.organize import organize_table
+
+from .test_package import run_python
+
+
+def test_organize_sorts_by_vnb_and_stripped_second_column():
+    df = pd.DataFrame({
+        'VNB-Name': ['B', 'A', 'B', 'A'],
+        'Teilnetzgebiet': [' Süd', 'Nord\xa0', 'Nord', None],
+        'Ort / Trasse': ['1', '2', '3', '4'],
+    })
+    organized = organize_table(df)
+    assert organized['Ort / Trasse'].tolist() == ['2', '4', '3', '1']
+    assert organized['Teilnetzgebiet'].tolist()[2:] == ['Nord', 'Süd']
+    assert df['Teilnetzgebiet'].iloc[0] == ' Süd'
+
+
+def test_missing_values_stay_missing_and_sort_last():
+    df = pd.DataFrame({
+        'VNB-Name': ['A', 'A', 'A', 'A'],
+        'Teilnetzgebiet': [None, 'ost', float('nan'), 5],
+        'Ort / Trasse': ['1', '2', '3', '4'],
+    })
+    organized = organize_table(df)
+    assert organized['Ort / Trasse'].tolist() == ['4', '2', '1', '3']
+    assert organized['Teilnetzgebiet'].tolist()[:2] == ['5', 'ost']
+    assert organized['Teilnetzgebiet'].isna().tolist() == [False, False, True, True]
+    assert 'nan' not in organized['Teilnetzgebiet'].tolist()
+
+
+# Tabulator-Organizer.py braucht nur pandas, keine Karten- und Diagramm-Bibliotheken
+def test_organize_does_not_import_map_or_plot_libraries():
+    output = run_python(
+        "import sys\n"
+        "from network_expansion_plan.organize import organize_table\n"
+        "from network_expansion_plan.store import read_table, write_table\n"
+        "print(sorted(m for m in ('folium', 'geopandas', 'matplotlib', 'plotly') if m in sys.modules))\n"
+    )
+    assert output.strip() == '[]'
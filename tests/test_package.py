@@ -0,0 +1,26 @@
+import subprocess
+import sys
+
+from .conftest import ROOT_DIR
+
+
+def run_python(code):
+    return subprocess.run([sys.executable, '-c', code], cwd=ROOT_DIR, capture_output=True, text=True, check=True).stdout
+
+
+# Die Module des Pakets sind nur als network_expansion_plan.<Modul> importierbar und werden nur einmal geladen
+def test_package_modules_are_not_top_level_modules():
+    output = run_python(
+        "import sys\n"
+        "import network_expansion_plan.pipeline, network_expansion_plan.watch\n"
+        "package_dir = network_expansion_plan.__path__[0]\n"
+        "print(package_dir in sys.path)\n"
+        "print(sorted(m for m in sys.modules if m in ('store', 'cli', 'watch', 'pipeline', 'cube', 'validation')))\n"
+    )
+    assert output.split('\n')[:2] == ['False', '[]']
+
+
+def test_command_line_entry_point():
+    output = subprocess.run([sys.executable, '-m', 'network_expansion_plan', '--help'], cwd=ROOT_DIR,
+                            capture_output=True, text=True, check=True).stdout
+    assert 'organize' in output and 'watch' in output
@@ -0,0 +1,46 @@
+import csv
+import os
+
+from network_expansion_plan.extraction import OcrPage
+from network_expansion_plan.pdfconvert import write_ocr_page
+
+from .test_ocrtable import three_columns, two_columns, words
+
+
+def read_rows(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.reader(f))
+
+
+def write_pages(pages, temp_dir, cached=False):
+    writers = {}
+    written = []
+    for page, lines in enumerate(pages, start=1):
+        written += write_ocr_page(OcrPage("plan.pdf", page, len(pages), words(lines), cached), writers, temp_dir)
+    assert not writers
+    return written
+
+
+def test_pages_with_different_layouts_go_to_separate_csv_files(tmp_path):
+    temp_dir = str(tmp_path)
+    written = write_pages([three_columns(10), two_columns(10)], temp_dir)
+    assert written == [os.path.join(temp_dir, "plan_ocr.csv"), os.path.join(temp_dir, "plan_ocr_2.csv")]
+
+    first, second = (read_rows(path) for path in written)
+    assert first[0] == ['0', '1', '2'] and {len(row) for row in first} == {3}
+    assert first[1] == ['Ort0', 'Maßnahme0', '0'] and len(first) == 11
+    assert second[0] == ['0', '1'] and {len(row) for row in second} == {2}
+    assert second[-1] == ['Beschreibung9', '9,5'] and len(second) == 11
+    assert not [file for file in os.listdir(temp_dir) if file.endswith('.tmp')]
+
+    # Ein späterer Lauf mit nur einem Tabellenaufbau entfernt die zweite Datei
+    assert write_pages([three_columns(10), three_columns(10, offset=10)], temp_dir) == written[:1]
+    assert len(read_rows(written[0])) == 21 and not os.path.exists(written[1])
+
+
+def test_cached_output_is_kept(tmp_path):
+    temp_dir = str(tmp_path)
+    written = write_pages([three_columns(10)], temp_dir)
+    assert write_pages([two_columns(10)], temp_dir, cached=True) == []
+    assert read_rows(written[0])[0] == ['0', '1', '2']
+    assert os.listdir(temp_dir) == ["plan_ocr.csv"]
@@ -0,0 +1,46 @@
+import os
+
+import pytest
+from plotly.offline import get_plotlyjs
+
+from network_expansion_plan.cube import build_cube
+from network_expansion_plan.FWA_Plots import PLOT_SPECS, PLOTLY_BUNDLE, render_cube_plots, write_plotly_bundle
+
+
+@pytest.fixture(scope='module')
+def cube(sample_table):
+    return build_cube(sample_table)
+
+
+def test_bundle_is_replaced_only_when_it_differs(tmp_path):
+    path = tmp_path / PLOTLY_BUNDLE
+    path.write_text("/* plotly.js v1.0.0 */", encoding='utf-8')
+    write_plotly_bundle(str(tmp_path))
+    assert path.read_text(encoding='utf-8') == get_plotlyjs()
+
+    os.utime(path, (1_000_000, 1_000_000))
+    write_plotly_bundle(str(tmp_path))
+    assert os.path.getmtime(path) == 1_000_000
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_render_cube_plots_writes_every_spec_and_the_dashboard(tmp_path, cube):
+    written = render_cube_plots(cube, str(tmp_path), max_workers=1)
+    names = [spec['name'] for spec in PLOT_SPECS]
+    assert written == [str(tmp_path / f"{name}.html") for name in names] + [str(tmp_path / "dashboard.html")]
+    assert (tmp_path / PLOTLY_BUNDLE).read_text(encoding='utf-8') == get_plotlyjs()
+
+    single = (tmp_path / "plot_kosten_je_vnb.html").read_text(encoding='utf-8')
+    assert f'src="{PLOTLY_BUNDLE}"' in single and "Summe angegebener Kosten* in Mio.€ je VNB" in single
+    assert "Angaben für" in single and "% der Maßnahmen" in single
+    dashboard = (tmp_path / "dashboard.html").read_text(encoding='utf-8')
+    assert dashboard.count('<script charset="utf-8" src="plotly.min.js"></script>') == 1
+    assert [name for name in names if f'<section id="{name}">' in dashboard] == names
+    assert dashboard.count('class="plotly-graph-div"') == len(names)
+
+
+def test_dashboard_only_with_cdn(tmp_path, cube):
+    written = render_cube_plots(cube, str(tmp_path), max_workers=1, plotlyjs="cdn", single_files=False)
+    assert written == [str(tmp_path / "dashboard.html")]
+    assert os.listdir(tmp_path) == ["dashboard.html"]
+    assert 'src="https://cdn.plot.ly/plotly-' in (tmp_path / "dashboard.html").read_text(encoding='utf-8')
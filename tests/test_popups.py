@@ -0,0 +1,73 @@
+import html
+import json
+import re
+
+import pandas as pd
+import pytest
+
+from network_expansion_plan.cleaning import is_invalid
+from network_expansion_plan.Foliumwebapp import split_vnbs, vnb_feature_collection
+from network_expansion_plan.popups import POPUP_ORDER, POPUP_TEMPLATE_SCRIPT, popup_values, render_popups
+
+
+# Popup je Zeile wie vor dem spaltenweisen Aufbau (add_circle_markers mit iterrows)
+def baseline_popup(row):
+    return "<br>".join(
+        f"<b>{html.escape(col)}:</b> {html.escape(str(row[col]))}"
+        for col in POPUP_ORDER if col in row and not is_invalid(row[col])
+    )
+
+
+# Vorlage der GeoJSON-Popups (POPUP_TEMPLATE_SCRIPT) in Python nachgebildet
+def template_popup(values):
+    labels = json.loads(re.search(r"labels: (\[.*\]),", POPUP_TEMPLATE_SCRIPT).group(1))
+    return "<br>".join(f"<b>{label}:</b> {value}" for label, value in zip(labels, values) if value is not None)
+
+
+@pytest.fixture(scope='module')
+def table(sample_table):
+    extra = sample_table.head(4).astype(object).copy()
+    extra['VNB-Name'] = ['A & B <Netz> GmbH', 'Stadtwerke "Nord"', "O'Brien Netze", 'A & B <Netz> GmbH']
+    extra['Ort / Trasse'] = ['UW <Süd> & Nord', 'k.A.', ' Trasse "A"', None]
+    extra['Kosten in Mio.€'] = ['1,5', 'k.A.', 3, None]
+    return pd.concat([sample_table.astype(object), extra], ignore_index=True)
+
+
+@pytest.mark.parametrize('typed', [False, True])
+def test_popups_match_the_per_row_baseline(table, sample_table, typed):
+    # typed: Tabelle mit Kategorien und float-Spalten wie aus dem Parquet-Zwischenstand
+    table = sample_table if typed else table
+    _, groups = split_vnbs(table)
+    compared = 0
+    for _, rows, invalid, _ in groups:
+        columns = list(invalid.columns)
+        popups = render_popups(popup_values(rows, invalid, columns), columns)
+        for (_, row), popup in zip(rows.iterrows(), popups):
+            if not is_invalid(row.get('Ort / Trasse')):
+                assert popup == baseline_popup(row)
+                compared += 1
+    assert compared == sum(not is_invalid(value) for value in table['Ort / Trasse'])
+
+
+def test_geojson_template_builds_the_same_popups(table):
+    _, groups = split_vnbs(table)
+    for _, rows, invalid, _ in groups:
+        features = vnb_feature_collection(rows, invalid)['features']
+        kept = [row for _, row in rows.iterrows() if not is_invalid(row.get('Ort / Trasse'))]
+        assert len(features) == len(kept)
+        for feature, row in zip(features, kept):
+            values = feature['properties']['popup']
+            assert template_popup(values) == baseline_popup(row)
+            assert values[POPUP_ORDER.index('Ort / Trasse')] == html.escape(str(row['Ort / Trasse']))
+
+
+def test_special_characters_are_escaped(table):
+    _, groups = split_vnbs(table)
+    popups = {vnb: render_popups(popup_values(rows, invalid, list(invalid.columns)), list(invalid.columns))
+              for vnb, rows, invalid, _ in groups}
+    assert "<b>VNB-Name:</b> A &amp; B &lt;Netz&gt; GmbH" in popups['A & B <Netz> GmbH'][0]
+    assert "<b>Ort / Trasse:</b> UW &lt;Süd&gt; &amp; Nord" in popups['A & B <Netz> GmbH'][0]
+    assert "<b>VNB-Name:</b> O&#x27;Brien Netze" in popups["O'Brien Netze"][0]
+    assert "Trasse &quot;A&quot;" in popups["O'Brien Netze"][0]
+    assert "Ort / Trasse" not in popups['Stadtwerke "Nord"'][0]
+    assert "Kosten" not in popups['Stadtwerke "Nord"'][0]
@@ -0,0 +1,76 @@
+import json
+import tracemalloc
+
+import pytest
+
+from network_expansion_plan.profiling import RunProfiler, profiled
+
+
+def test_stages_and_counters_are_recorded(tmp_path, capsys):
+    output = tmp_path / "ausgabe.txt"
+    output.write_text("abc", encoding='utf-8')
+    with RunProfiler("lauf", str(tmp_path / "bericht.json")) as profiler:
+        profiler.count('rows_loaded', 10)
+        with profiler.stage('geocode', rows=3):
+            profiler.count('cache_hits', 2)
+            profiler.count('errors', 0)
+        with profiler.stage('write'):
+            profiler.add_bytes(str(output), str(tmp_path / "fehlt.txt"), None)
+
+    with open(tmp_path / "bericht.json", encoding='utf-8') as f:
+        report = json.load(f)
+    assert report['run'] == "lauf" and report['error'] is None
+    assert [stage['name'] for stage in report['stages']] == ['geocode', 'write']
+    geocode, write = report['stages']
+    assert geocode['info'] == {'rows': 3} and geocode['counters'] == {'cache_hits': 2}
+    assert write['counters'] == {'bytes_written': 3, 'files_written': 1}
+    assert report['counters'] == {'rows_loaded': 10, 'cache_hits': 2, 'bytes_written': 3, 'files_written': 1}
+    assert all(stage['seconds'] >= 0 for stage in report['stages'])
+    assert "geocode (rows=3)" in capsys.readouterr().out
+
+
+def test_jsonl_reports_are_appended_and_errors_recorded(tmp_path):
+    path = str(tmp_path / "laufbericht.jsonl")
+    with RunProfiler("eins", path):
+        pass
+    with pytest.raises(ValueError):
+        with RunProfiler("zwei", path):
+            raise ValueError("kaputt")
+    with open(path, encoding='utf-8') as f:
+        reports = [json.loads(line) for line in f]
+    assert [report['run'] for report in reports] == ["eins", "zwei"]
+    assert "kaputt" in reports[1]['error']
+
+
+def test_memory_tracing_stops_after_the_run():
+    assert not tracemalloc.is_tracing()
+    with RunProfiler("lauf", trace_memory=True) as profiler:
+        with profiler.stage('daten'):
+            data = [bytes(1000) for _ in range(100)]
+        assert tracemalloc.is_tracing()
+    assert not tracemalloc.is_tracing()
+    assert profiler.report['stages'][0]['memory_peak_bytes'] >= 100 * 1000
+    assert profiler.report['memory_peak_bytes'] >= 100 * 1000
+    del data
+
+
+def test_memory_tracing_started_outside_is_kept():
+    tracemalloc.start()
+    try:
+        with RunProfiler("lauf", trace_memory=True):
+            pass
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+
+
+def test_profiled_creates_one_profiler_per_call():
+    @profiled("schritt")
+    def step(profiler=None):
+        profiler.count('rows')
+        return profiler
+
+    own = step(trace_memory=True)
+    assert own.report['counters'] == {'rows': 1} and not tracemalloc.is_tracing()
+    outer = RunProfiler("pipeline")
+    assert step(profiler=outer) is outer and outer.report is None
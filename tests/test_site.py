@@ -0,0 +1,65 @@
+import json
+import os
+
+from network_expansion_plan.cli import build_parser, settings_from_args
+from network_expansion_plan.cube import METRICS, build_cube, slice_cube
+from network_expansion_plan.Foliumwebapp import MAP_SPECS
+from network_expansion_plan.pipeline import DEFAULT_SETTINGS, run_steps
+from network_expansion_plan.validation import load_bundeslaender
+from network_expansion_plan.vnb_site import build_site
+
+from .conftest import BUNDESLAND_GEOJSON
+
+
+def test_site_has_the_maps_and_one_geojson_file_per_vnb(tmp_path, sample_table):
+    vnbs = sample_table['VNB-Name'].dropna().unique()[:2]
+    df = sample_table[sample_table['VNB-Name'].isin(vnbs)].reset_index(drop=True)
+    site_dir = str(tmp_path / "site")
+    df_bundesland = slice_cube(build_cube(df), 'Bundesland', METRICS)
+    written = build_site(df, load_bundeslaender(BUNDESLAND_GEOJSON), df_bundesland, site_dir)
+
+    assert written == [os.path.join(site_dir, map_file) for _, _, map_file in MAP_SPECS]
+    with open(os.path.join(site_dir, "vnb_data", "manifest.json"), encoding='utf-8') as f:
+        manifest = json.load(f)
+    assert sorted(entry['name'] for entry in manifest['vnb']) == sorted(vnbs)
+    for entry in manifest['vnb']:
+        with open(os.path.join(site_dir, entry['file']), encoding='utf-8') as f:
+            assert len(json.load(f)['features']) == entry['count']
+    assert sum(entry['count'] for entry in manifest['vnb']) <= len(df)
+    # Die Marker werden erst im Browser nachgeladen, die Karten enthalten keine Maßnahmen
+    for path in written:
+        with open(path, encoding='utf-8') as f:
+            page = f.read()
+        assert "var circle_marker_" not in page and "vnb_data/" in page
+
+
+def test_site_option_reaches_the_settings():
+    for command in (['map', 'in.xlsx', '-o', 'out'], ['all', 'in.xlsx', '-o', 'out']):
+        assert settings_from_args(build_parser().parse_args(command)).site_dir is None
+        args = build_parser().parse_args(command + ['--site', 'seite'])
+        assert settings_from_args(args).site_dir == 'seite'
+
+
+def test_map_step_builds_the_site(tmp_path, sample_table):
+    vnbs = sample_table['VNB-Name'].dropna().unique()[:2]
+    df = sample_table[sample_table['VNB-Name'].isin(vnbs)].reset_index(drop=True)
+    site_dir = str(tmp_path / "site")
+    settings = DEFAULT_SETTINGS._replace(bundesland_geojson=BUNDESLAND_GEOJSON, site_dir=site_dir)
+    written = run_steps(df, str(tmp_path / "out"), ['map'], settings)
+
+    site_files = [path for path in written if path.startswith(site_dir)]
+    assert site_files and all(path.endswith('.html') and os.path.getsize(path) for path in site_files)
+    with open(os.path.join(site_dir, "vnb_data", "manifest.json"), encoding='utf-8') as f:
+        manifest = json.load(f)
+    assert sorted(entry['name'] for entry in manifest['vnb']) == sorted(vnbs)
+    for entry in manifest['vnb']:
+        with open(os.path.join(site_dir, entry['file']), encoding='utf-8') as f:
+            assert len(json.load(f)['features']) == entry['count']
+    assert sum(entry['count'] for entry in manifest['vnb']) <= len(df)
+
+
+def test_map_step_without_site_writes_no_site(tmp_path, sample_table):
+    df = sample_table.head(30)
+    settings = DEFAULT_SETTINGS._replace(bundesland_geojson=BUNDESLAND_GEOJSON)
+    run_steps(df, str(tmp_path / "out"), ['map'], settings)
+    assert not any('manifest.json' in files for _, _, files in os.walk(tmp_path))
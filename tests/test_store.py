@@ -0,0 +1,52 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from network_expansion_plan.store import compact_table, group_ranges, read_table, table_path, write_table
+
+
+def test_group_ranges_match_groupby(sample_table):
+    keys = sample_table['VNB-Name']
+    ranges = group_ranges(keys)
+    expected = {name: list(rows) for name, rows in keys.groupby(keys, observed=True, sort=False).indices.items()}
+    assert ranges.names == list(expected)
+    for name, start, stop in zip(ranges.names, ranges.starts, ranges.stops):
+        assert ranges.order[start:stop].tolist() == expected[name]
+
+
+def test_group_ranges_skip_missing_keys_and_keep_order_of_appearance():
+    ranges = group_ranges(pd.Series(['b', None, 'a', 'b', np.nan, 'a']))
+    assert ranges.names == ['b', 'a']
+    assert ranges.order.tolist() == [0, 3, 2, 5]
+    assert ranges.starts.tolist() == [0, 2] and ranges.stops.tolist() == [2, 4]
+
+
+def test_compact_table_uses_categories_for_repeated_text():
+    df = compact_table(pd.DataFrame({'VNB-Name': ['A', 'A'], 'Ort / Trasse': ['x', 'y'], 'Kosten in Mio.€': [1, 2]}))
+    assert isinstance(df['VNB-Name'].dtype, pd.CategoricalDtype)
+    assert not isinstance(df['Ort / Trasse'].dtype, pd.CategoricalDtype)
+
+
+def test_columnar_copy_is_preferred_when_newer(tmp_path, sample_table):
+    excel = str(tmp_path / "tabelle.xlsx")
+    df = sample_table.head(20)
+    write_table(df, table_path(excel), export_excel=excel)
+    assert os.path.getmtime(table_path(excel)) >= os.path.getmtime(excel)
+    pd.testing.assert_frame_equal(read_table(excel), read_table(table_path(excel)))
+    assert read_table(excel)['Kosten in Mio.€'].tolist() == df['Kosten in Mio.€'].tolist()
+
+
+def test_normalize_table_keeps_numbers_and_converts_only_mixed_text(tmp_path):
+    df = pd.DataFrame({
+        'Anzahl': pd.Series([1, 2, None], dtype=object),
+        'Anteil': pd.Series([0.5, 2, None], dtype=object),
+        'Zeithorizont': pd.Series([2026, '2030+', None], dtype=object),
+        'Hinweis': pd.Series(['a', 'b', None], dtype=object),
+    })
+    path = write_table(df, str(tmp_path / "tabelle.parquet"))
+    result = read_table(path)
+    assert result['Anzahl'].tolist()[:2] == [1, 2] and pd.api.types.is_numeric_dtype(result['Anzahl'])
+    assert result['Anteil'].dtype == 'float64' and result['Anteil'].tolist()[:2] == [0.5, 2.0]
+    assert result['Zeithorizont'].astype(object).tolist()[:2] == ['2026', '2030+']
+    assert result['Hinweis'].astype(object).tolist()[:2] == ['a', 'b']
@@ -0,0 +1,70 @@
+import os
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pytest
+
+from network_expansion_plan import validation
+from network_expansion_plan.validation import BundeslandIndex, load_bundeslaender, validate_bundesland
+
+from .conftest import BUNDESLAND_GEOJSON
+
+
+@pytest.fixture(scope='module')
+def bundeslaender():
+    return load_bundeslaender(BUNDESLAND_GEOJSON)
+
+
+# Bisherige Zuordnung über gpd.sjoin(predicate='within'); bei Überschneidungen gilt das erste Polygon
+def sjoin_names(longitude, latitude, bundeslaender):
+    points = gpd.GeoDataFrame(geometry=gpd.points_from_xy(longitude, latitude), crs=bundeslaender.crs)
+    joined = gpd.sjoin(points, bundeslaender.reset_index(drop=True), how='left', predicate='within')
+    joined = joined.sort_values('index_right', kind='stable')
+    joined = joined[~joined.index.duplicated(keep='first')].sort_index()
+    return joined['name'].astype(object).where(joined['name'].notna(), None).to_numpy()
+
+
+def random_points(n, seed=0):
+    rng = np.random.default_rng(seed)
+    longitude = rng.uniform(5.5, 15.5, n)
+    latitude = rng.uniform(47.0, 55.3, n)
+    # Einige Punkte ohne Koordinaten
+    longitude[::97] = np.nan
+    return longitude, latitude
+
+
+@pytest.mark.parametrize('simplify_tolerance', [0, 0.01, 0.05])
+def test_index_matches_sjoin_on_random_points(bundeslaender, simplify_tolerance):
+    longitude, latitude = random_points(5000)
+    located = BundeslandIndex(bundeslaender, simplify_tolerance).locate(longitude, latitude)
+    expected = sjoin_names(longitude, latitude, bundeslaender)
+    assert list(located) == list(expected)
+    # Außerhalb Deutschlands und ohne Koordinaten: kein Bundesland
+    assert located[0] is None
+
+
+def test_validate_matches_sjoin_on_sample(bundeslaender, sample):
+    validated = validate_bundesland(sample, BundeslandIndex(bundeslaender))
+    expected = sjoin_names(sample['longitude'], sample['latitude'], bundeslaender)
+    assert list(validated['name']) == list(expected)
+    assert (validated['passt'] == (pd.Series(expected, index=sample.index) == sample['Bundesland'])).all()
+    # Die Beispieltabelle enthält fast nur passende Einträge (Spalte passt der Vorlage)
+    assert validated['passt'].mean() > 0.9
+
+
+def test_boundary_copy_is_written_atomically_to_the_cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(validation, '_BOUNDARY_CACHE', {})
+    gdf = load_bundeslaender(BUNDESLAND_GEOJSON, cache_dir=str(tmp_path))
+    assert os.listdir(tmp_path) == [f"{os.path.basename(BUNDESLAND_GEOJSON)}.parquet"]
+
+    monkeypatch.setattr(validation, '_BOUNDARY_CACHE', {})
+    monkeypatch.setattr(gpd, 'read_file', lambda *args, **kwargs: pytest.fail("GeoJSON erneut gelesen"))
+    cached = load_bundeslaender(BUNDESLAND_GEOJSON, cache_dir=str(tmp_path))
+    assert list(cached['name']) == list(gdf['name'])
+    assert cached.geometry.geom_equals(gdf.geometry).all()
+
+
+def test_boundaries_are_memoized_in_process(bundeslaender):
+    assert load_bundeslaender(BUNDESLAND_GEOJSON) is bundeslaender
+    assert validation.bundesland_index(bundeslaender) is validation.bundesland_index(bundeslaender)
@@ -0,0 +1,123 @@
+import os
+
+import pandas as pd
+import pytest
+
+from network_expansion_plan import watch
+from network_expansion_plan.pipeline import DEFAULT_SETTINGS, STEPS
+from network_expansion_plan.watch import (STAGE_DEPENDENCIES, WATCH_STAGES, ChangeQueue, WatchSession,
+                                          changed_paths, downstream, snapshot)
+
+from .conftest import BUNDESLAND_GEOJSON
+
+
+def test_stage_dependencies_are_ordered():
+    assert WATCH_STAGES == ['extract'] + STEPS
+    for stage, dependencies in STAGE_DEPENDENCIES.items():
+        assert all(WATCH_STAGES.index(dep) < WATCH_STAGES.index(stage) for dep in dependencies)
+
+
+@pytest.mark.parametrize('stages, expected', [
+    ({'extract'}, WATCH_STAGES),
+    ({'organize'}, STEPS),
+    ({'geocode'}, ['geocode', 'validate', 'map', 'plots']),
+    ({'validate'}, ['validate', 'map', 'plots']),
+    ({'map'}, ['map']),
+    ({'plots', 'map'}, ['map', 'plots']),
+    (set(), []),
+])
+def test_downstream_closure(stages, expected):
+    assert downstream(stages) == expected
+
+
+def test_queue_waits_for_quiet_period():
+    queue = ChangeQueue(debounce_seconds=5, max_delay_seconds=60)
+    assert not queue.ready(0)
+    queue.add({}, 0)
+    assert not queue.ready(100)
+    queue.add({'a.xlsx': 'organize'}, 0)
+    queue.add({'b.xlsx': 'organize'}, 3)
+    assert not queue.ready(7)
+    assert queue.ready(8)
+    assert queue.drain() == {'a.xlsx': 'organize', 'b.xlsx': 'organize'}
+    assert not queue.ready(100)
+
+
+def test_queue_runs_after_max_delay_despite_constant_changes():
+    queue = ChangeQueue(debounce_seconds=5, max_delay_seconds=20)
+    for now in range(0, 20, 2):
+        queue.add({f"{now}.xlsx": 'organize'}, now)
+        assert not queue.ready(now)
+    queue.add({'20.xlsx': 'organize'}, 20)
+    assert queue.ready(20)
+    assert len(queue.drain()) == 11
+    # Nach dem Leeren beginnt die Frist von vorn
+    queue.add({'a.xlsx': 'geocode'}, 30)
+    assert not queue.ready(31)
+
+
+def test_changed_paths(tmp_path):
+    a, b = tmp_path / "a.csv", tmp_path / "b.csv"
+    a.write_text("1")
+    before = snapshot([str(a), str(b)])
+    assert list(before) == [str(a)]
+    b.write_text("2")
+    a.write_text("11")
+    os.remove(a)
+    assert changed_paths(before, snapshot([str(a), str(b)])) == [str(a), str(b)]
+
+
+@pytest.fixture
+def session(tmp_path, monkeypatch):
+    inputs = tmp_path / "vnb"
+    inputs.mkdir()
+    for vnb in ('A', 'B'):
+        pd.DataFrame({'VNB-Name': [vnb], 'Bundesland': ['Berlin'], 'Ort / Trasse': ['Mitte']}).to_csv(
+            inputs / f"{vnb}.csv", index=False)
+    calls = []
+
+    def run_steps(df, output_dir, steps, settings, state=None, **kwargs):
+        calls.append((list(steps), sorted(df['VNB-Name'].astype(str))))
+        for step in steps:
+            state[step] = df
+        return []
+
+    monkeypatch.setattr(watch, 'run_steps', run_steps)
+    settings = DEFAULT_SETTINGS._replace(bundesland_geojson=BUNDESLAND_GEOJSON, offline=True, geocode_cache=None)
+    session = WatchSession([str(inputs)], str(tmp_path / "ergebnis"), settings=settings)
+    session.calls = calls
+    session.input_dir = inputs
+    return session
+
+
+def test_session_reruns_only_affected_steps(session, monkeypatch):
+    session.scan()
+    session.run()
+    assert session.calls == [(STEPS, ['A', 'B'])]
+    assert session.state['geocoder'] is not None
+
+    # Geänderte Grenzen: offline dienen sie auch dem Geokodierer, daher ab geocode
+    session.mark({BUNDESLAND_GEOJSON: session.watched()[BUNDESLAND_GEOJSON]})
+    assert 'geocoder' not in session.state
+    session.run()
+    assert session.calls[-1] == (['geocode', 'validate', 'map', 'plots'], ['A', 'B'])
+
+    read = []
+    original = watch.read_workbooks
+    monkeypatch.setattr(watch, 'read_workbooks', lambda paths, workers: read.extend(paths) or original(paths, 1))
+    pd.DataFrame({'VNB-Name': ['C'], 'Bundesland': ['Berlin'], 'Ort / Trasse': ['Mitte']}).to_csv(
+        session.input_dir / "B.csv", index=False)
+    changes = session.scan()
+    assert changes == {str(session.input_dir / "B.csv"): 'organize'}
+    session.mark(changes)
+    session.run()
+    assert session.calls[-1] == (STEPS, ['A', 'C'])
+    assert read == [str(session.input_dir / "B.csv")]
+    assert session.scan() == {}
+
+
+def test_failed_run_keeps_steps_pending(session, monkeypatch):
+    session.scan()
+    monkeypatch.setattr(watch, 'run_steps', lambda *args, **kwargs: 1 / 0)
+    assert session.run() == []
+    assert session.dirty == set(STEPS)